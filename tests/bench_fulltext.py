@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""bench_fulltext.py -- benchmark of bulk and per-page text extraction
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+Run as `python tests/bench_fulltext.py [path]'.  Without path, a document
+is made with the simulated backend; give a real XDW/XBD file on Windows
+to compare XDW_GetFullText(W) with XDW_GetPageTextToMemoryW of the DLL.
+"""
+
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import xdwlib
+
+
+def run(path, bulk):
+    doc = xdwlib.xdwopen(path, readonly=True)
+    doc.bulk_text = bulk
+    result = []
+    try:
+        for name in ("content_text", "fulltext"):
+            with xdwlib.measure() as st:
+                t = perf_counter()
+                text = getattr(doc, name)()
+                elapsed = perf_counter() - t
+            result.append((name, text, st.calls, elapsed))
+    finally:
+        doc.close()
+    return result
+
+
+def main(path=None, pages=2000):
+    if path is None:
+        from xdwlib.xdwsim import SimulatedXDWAPI
+        path = os.path.join(tempfile.mkdtemp(), "bench.xdw")
+        SimulatedXDWAPI.make_document(path, pages=pages,
+                text="本文テキスト lorem ipsum " * 50, annotations=1)
+        xdwlib.use_backend("simulated")
+    per_page = run(path, False)
+    bulk = run(path, True)
+    for ((name, text0, calls0, t0), (_, text1, calls1, t1)) in zip(
+            per_page, bulk):
+        print("{0:<14} per-page {1:>7} calls {2:8.1f}ms   "
+                "bulk {3:>7} calls {4:8.1f}ms   {5}".format(
+                name, calls0, t0 * 1e3, calls1, t1 * 1e3,
+                "same" if text0 == text1 else "DIFFERENT"))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
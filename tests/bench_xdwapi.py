@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""bench_xdwapi.py -- micro-benchmark of XDW_* wrapper overhead
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+Run as `python tests/bench_xdwapi.py'.  A backend whose XDW_* functions
+do nothing is used, so that only the cost of wrappers is measured.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xdwlib import xdwapi
+
+
+class NullXDWAPI(object):
+
+    """Backend whose XDW_* functions succeed doing nothing."""
+
+    def __getattr__(self, name):
+        if not name.startswith("XDW_"):
+            raise AttributeError(name)
+        def call(*args):
+            return 0
+        return call
+
+
+### Baseline decorators, copied verbatim from xdwapi.py before functions
+### were resolved once; DLL is the null backend given by main().
+
+from functools import wraps
+from ctypes import byref, create_string_buffer
+
+from xdwlib.xdwapi import XDWErrorFactory, XDW_DOCUMENT_INFO, NULL
+
+DLL = None
+
+
+def RAISE(api):
+    @wraps(api)
+    def apifunc(*args):
+        result = api(*args)
+        if result & 0x80000000:
+            raise XDWErrorFactory(result)
+        return result
+    return apifunc
+
+
+@RAISE
+def TRY(api, *args):
+    return api(*args)
+
+
+def APPEND(*ext, **kw):
+    """Decorator to call XDWAPI with trailing arguments *ext.
+
+    N.B. Decorated function must be of the same name as XDWAPI's one.
+    """
+    def deco(api):
+        @wraps(api)
+        def func(*args, **kw):
+            args = list(args)
+            if "codepage" in kw:
+                args.append(kw["codepage"])
+            args.extend(ext)
+            return TRY(getattr(DLL, api.__name__), *args)
+        return func
+    return deco
+
+
+def QUERY(struct, *ext):
+    """Decorator to call XDWAPI querying XDW_* struct data.
+
+    N.B. Decorated function must be of the same name as XDWAPI's one.
+    """
+    def deco(api):
+        @wraps(api)
+        def func(*args):
+            result = struct()
+            args = list(args)
+            args.append(byref(result))
+            args.extend(ext)
+            TRY(getattr(DLL, api.__name__), *args)
+            return result
+        return func
+    return deco
+
+
+def STRING(api):
+    """Decorator to get a string value via XDWAPI.
+
+    N.B. Decorated function must be of the same name as XDWAPI's one.
+    """
+    @wraps(api)
+    def func(*args):
+        args = list(args)
+        args.extend([NULL, 0, NULL])
+        size = TRY(getattr(DLL, api.__name__), *args)
+        buf = create_string_buffer(size)
+        args[-3:] = [byref(buf), size, NULL]
+        TRY(getattr(DLL, api.__name__), *args)
+        return buf.value
+    return func
+
+
+@APPEND(NULL)
+def XDW_CloseDocumentHandle(doc_handle): pass
+
+@QUERY(XDW_DOCUMENT_INFO)
+def XDW_GetDocumentInformation(doc_handle): pass
+
+@STRING
+def XDW_GetInformation(index): pass
+
+### End of baseline.
+
+
+def main(number=200000):
+    global DLL
+    xdwapi.register_backend("null", NullXDWAPI)
+    DLL = xdwapi.use_backend("null")
+    cases = (
+            ("APPEND", lambda: XDW_CloseDocumentHandle(1),
+                    lambda: xdwapi.XDW_CloseDocumentHandle(1)),
+            ("QUERY", lambda: XDW_GetDocumentInformation(1),
+                    lambda: xdwapi.XDW_GetDocumentInformation(1)),
+            ("STRING", lambda: XDW_GetInformation(1),
+                    lambda: xdwapi.XDW_GetInformation(1)),
+            )
+    print("{0:<8} {1:>14} {2:>14}".format("", "baseline", "current"))
+    for (label, baseline, current) in cases:
+        times = [min(timeit.repeat(stmt, number=number, repeat=3)) / number
+                for stmt in (baseline, current)]
+        print("{0:<8} {1:>8.2f} us/call {2:>8.2f} us/call".format(
+                label, times[0] * 1e6, times[1] * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""test_import.py -- import-time budget of xdwlib
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import sys
+import subprocess
+import unittest
+
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules which `import xdwlib' must not import.
+FORBIDDEN = ("PIL", "Image", "sqlite3", "unicodedata", "xdwlib.xdwcache")
+
+# Upper limit of cumulative import time of xdwlib in microseconds.
+BUDGET = 500000
+
+
+def importtime(code):
+    """Run code with -X importtime; returns {module: cumulative_us}."""
+    env = dict(os.environ, PYTHONPATH=TOP)
+    proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, env=env, check=True)
+    times = dict()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            continue  # header
+    return times
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_no_dll_load(self):
+        importtime("import xdwlib, xdwlib.xdwapi as api; "
+                "assert not api.backend_loaded(), 'DLL loaded on import'")
+
+    def test_no_pil_import(self):
+        times = importtime("import xdwlib")
+        for name in FORBIDDEN:
+            self.assertNotIn(name, times)
+
+    def test_pil_names(self):
+        importtime("from xdwlib.common import *; "
+                "assert PIL_ENABLED in (True, False); "
+                "import xdwlib.common as c; c.Image")
+
+    def test_budget(self):
+        times = importtime("import xdwlib")
+        self.assertLess(times["xdwlib"], BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""test_observer.py -- ObserverMap against a plain list
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import random
+import unittest
+import weakref
+
+from xdwlib.observer import ObserverMap, Observer
+
+
+class Item(Observer):
+
+    def __init__(self, pos):
+        self.pos = pos
+
+
+class ObserverMapTest(unittest.TestCase):
+
+    def check(self, m, model):
+        """Compare ObserverMap with list model of observers or None."""
+        expected = [(pos, obj) for (pos, obj) in enumerate(model) if obj]
+        self.assertEqual(m.items(), expected)
+        self.assertEqual(len(m), len(expected))
+        for (pos, obj) in enumerate(model):
+            if obj is None:
+                self.assertNotIn(pos, m)
+            else:
+                self.assertEqual(obj.pos, pos)
+                self.assertIs(m[pos], obj)
+
+    def test_random(self):
+        rand = random.Random(1)
+        for trial in range(100):
+            m = ObserverMap()
+            model = [None] * 40
+            for step in range(60):
+                r = rand.random()
+                n = len(model)
+                if r < 0.4 and n:
+                    pos = rand.randrange(n)
+                    model[pos] = m[pos] = Item(pos)
+                elif r < 0.6:
+                    pos = rand.randrange(n + 1)
+                    count = rand.randint(1, 3)
+                    m.insert(pos, count)
+                    model[pos:pos] = [None] * count
+                elif r < 0.8 and n:
+                    pos = rand.randrange(n)
+                    count = rand.randint(1, min(3, n - pos))
+                    gone = [obj for obj in model[pos:pos + count] if obj]
+                    m.delete(pos, count)
+                    del model[pos:pos + count]
+                    for obj in gone:
+                        self.assertIsNone(obj._node)
+                elif n:
+                    pos = rand.randrange(n)
+                    if model[pos] is not None:
+                        del m[pos]
+                        model[pos] = None
+                self.check(m, model)
+
+    def test_limit(self):
+        rand = random.Random(2)
+        limit = 4
+        m = ObserverMap(limit=limit)
+        model = [None] * 200  # observers, or weak references if dropped
+        for step in range(2000):
+            r = rand.random()
+            n = len(model)
+            if r < 0.6 and n:
+                pos = rand.randrange(n)
+                obj = Item(pos)
+                m[pos] = obj
+                model[pos] = obj if rand.random() < 0.1 else weakref.ref(obj)
+                del obj
+            elif r < 0.8:
+                pos = rand.randrange(n + 1)
+                m.insert(pos)
+                model.insert(pos, None)
+            elif n:
+                pos = rand.randrange(n)
+                m.delete(pos)
+                del model[pos]
+            alive = [obj() if isinstance(obj, weakref.ref) else obj
+                    for obj in model]
+            self.assertLessEqual(
+                    sum(isinstance(obj, weakref.ref) and obj() is not None
+                    for obj in model), limit)
+            self.check(m, alive)
+            del alive
+        self.assertLess(m.count, 2 * len(model))
+
+    def test_change_limit(self):
+        m = ObserverMap()
+        held = Item(5)
+        m[5] = held
+        for pos in range(10):
+            if pos != 5:
+                m[pos] = Item(pos)
+        m.limit = 2
+        self.assertEqual(len(m.recent), 2)
+        self.assertLessEqual(len(m), 3)
+        self.assertIs(m[5], held)
+        m.limit = 1
+        self.assertLessEqual(len(m), 2)
+        m.limit = None
+        m.insert(0)
+        self.assertEqual(held.pos, 6)
+        self.assertEqual(m.items(), [(pos, m[pos]) for pos in m.keys()])
+        self.assertIn(6, m)
+        self.assertIsNone(m.recent)
+
+
+if __name__ == "__main__":
+    unittest.main()
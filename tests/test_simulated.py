@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""test_simulated.py -- smoke tests of stateful features on simulator
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import gc
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import xdwlib
+from xdwlib import xdwapi
+from xdwlib.xdwsim import SimulatedXDWAPI
+
+
+class SimulatedTestCase(unittest.TestCase):
+
+    """Test case run on the simulated backend in a temporary directory."""
+
+    def setUp(self):
+        self.backend = xdwapi.DLL
+        self.dir = tempfile.mkdtemp()
+        xdwlib.use_backend("simulated")
+
+    def tearDown(self):
+        xdwapi.DLL = self.backend
+        xdwapi._functions.clear()
+        xdwapi._reset_state()
+        shutil.rmtree(self.dir)
+
+    def document(self, name, **kw):
+        return SimulatedXDWAPI.make_document(
+                os.path.join(self.dir, name), **kw)
+
+    def binder(self, name, documents):
+        return SimulatedXDWAPI.make_binder(
+                os.path.join(self.dir, name), documents)
+
+
+class ObserverTest(SimulatedTestCase):
+
+    def test_pages(self):
+        path = self.document("a.xdw", pages=50, text="{page}")
+        doc = xdwlib.xdwopen(path)
+        pages = [doc.page(pos) for pos in range(doc.pages)]
+        del doc[0:20:2]
+        kept = [pg for (pos, pg) in enumerate(pages)
+                if not (pos < 20 and pos % 2 == 0)]
+        self.assertEqual(doc.pages, len(kept))
+        for (pos, pg) in enumerate(kept):
+            self.assertEqual(pg.pos, pos)
+            self.assertIs(doc.page(pos), pg)
+        doc.insert(5, path)
+        self.assertEqual(kept[5].pos, 55)
+        self.assertIs(doc.page(55), kept[5])
+        self.assertIs(doc.page(4), kept[4])
+        doc.close()
+
+    def test_binder(self):
+        paths = [self.document("d{0}.xdw".format(i), pages=1 + i % 3)
+                for i in range(6)]
+        binder = xdwlib.xdwopen(self.binder("b.xbd", paths))
+        expected = [(d, p) for d in range(6) for p in range(1 + d % 3)]
+        got = [(doc.pos, pg.pos) for (doc, pg) in (
+                binder.document_and_page(pos)
+                for pos in range(binder.pages))]
+        self.assertEqual(got, expected)
+        doc = binder.document(4)
+        binder.insert(1, paths[2])  # 3 pages
+        self.assertEqual(doc.pos, 5)
+        self.assertEqual(doc.page_offset, sum(binder.document_pages()[:5]))
+        binder.delete(1)
+        self.assertEqual(doc.pos, 4)
+        self.assertEqual(doc.page_offset, sum(binder.document_pages()[:4]))
+        binder.close()
+
+
+class CacheLimitTest(SimulatedTestCase):
+
+    def alive(self, doc):
+        gc.collect()  # Annotations refer to their pages.
+        return (len(doc.observers),
+                sum(len(pg.observers) for pg in doc.observers.values()))
+
+    def test_limit(self):
+        doc = xdwlib.xdwopen(self.document("a.xdw", pages=40, annotations=3))
+        held = doc.page(30)
+        for pg in doc:
+            pg.annotation_text()
+        self.assertEqual(self.alive(doc), (40, 120))
+        doc.cache_annotations = 1
+        doc.cache_pages = 4
+        self.assertLessEqual(max(self.alive(doc)), 6)
+        for pg in doc:
+            pg.annotation_text()
+        self.assertLessEqual(max(self.alive(doc)), 6)
+        del doc[0:10]
+        self.assertEqual(held.pos, 20)
+        self.assertIs(doc.page(20), held)
+        doc.cache_pages = None
+        for pg in doc:
+            pass
+        self.assertEqual(len(doc.observers), 30)
+        doc.close()
+
+    def test_binder(self):
+        paths = [self.document("d{0}.xdw".format(i), pages=10)
+                for i in range(3)]
+        binder = xdwlib.xdwopen(self.binder("b.xbd", paths))
+        doc = binder.document(0)
+        binder.cache_pages = 2
+        self.assertEqual((doc.cache_pages, binder.document(2).cache_pages),
+                (2, 2))
+        for pg in doc:
+            pass
+        self.assertLessEqual(self.alive(doc)[0], 3)
+        binder.close()
+
+
+class AnnotationTest(SimulatedTestCase):
+
+    def test_geometry(self):
+        doc = xdwlib.xdwopen(self.document("a.xdw", annotations=3))
+        pg = doc.page(0)
+        with xdwlib.measure() as stats:
+            geometries = pg.annotation_geometries()
+        self.assertEqual(len(geometries), 3)
+        self.assertEqual(stats["XDW_GetAnnotationInformation"].calls, 3)
+        ann = pg.annotation(1)
+        with xdwlib.measure() as stats:
+            ann.position, ann.size
+        self.assertEqual(stats.calls, 0)
+        xdwapi.XDW_SetAnnotationPosition(doc.handle, ann.handle, 2500, 3000)
+        self.assertEqual(ann.position, xdwlib.Point(25, 30))
+        doc.close()
+
+    def test_content_text(self):
+        from xdwlib.annotation import AnnotationCache, AnnotationTree
+        doc = xdwlib.xdwopen(self.document("a.xdw", annotations=1))
+        pg = doc.page(0)
+        stamp = pg.add_stamp()
+        stamp.top_field = "T"
+        stamp.bottom_field = "B"
+        link = pg.add_link()
+        link.caption = "C"
+        tree = AnnotationTree.read(pg)
+        for (ann, text) in zip(pg, ("Annotation 1-1", "T <DATE> B", "C")):
+            self.assertEqual(ann.content_text(), text)
+            self.assertEqual(AnnotationCache(ann).content_text(), text)
+            self.assertEqual(tree[ann.pos].content_text(), text)
+        doc.close()
+
+    def test_catalog(self):
+        doc = xdwlib.xdwopen(self.document("a.xdw", pages=3, annotations=2))
+        catalog = doc.annotation_catalog(userattrs=["ReviewId"])
+        self.assertEqual(len(catalog), 6)
+        ann = doc.page(1).annotation(0)
+        ann.set_userattr("ReviewId", b"R-1")
+        ann.set_property("Approved", True)
+        self.assertEqual(catalog.with_userattr("ReviewId", b"R-1"),
+                [(1, ann.handle)])
+        self.assertEqual(catalog.with_property("Approved", True),
+                [(1, ann.handle)])
+        doc.delete(0)
+        self.assertEqual(catalog.with_userattr("ReviewId"),
+                [(0, ann.handle)])
+        self.assertEqual(len(catalog), 4)
+        doc.close()
+
+
+class BulkTextTest(SimulatedTestCase):
+
+    def test_versions(self):
+        path = self.document("a.xdw", pages=3, text="\u65e5\u672c {page}")
+        expected = "\f".join("\u65e5\u672c {0}".format(page)
+                for page in range(1, 4))
+        for (version, name) in (("7.0.0", "XDW_GetFullText"),
+                ("9.0.0", "XDW_GetFullTextW")):
+            xdwlib.use_backend("simulated", version=version)
+            xdwapi._reset_state()
+            doc = xdwlib.xdwopen(path, readonly=True)
+            self.assertFalse(doc.bulk_text)
+            doc.bulk_text = True
+            with xdwlib.measure() as stats:
+                self.assertEqual(doc.content_text(), expected)
+            self.assertEqual(stats[name].calls, 1)
+            self.assertEqual(stats["XDW_GetPageTextToMemoryW"].calls, 0)
+            doc.close()
+
+
+class TextCacheTest(SimulatedTestCase):
+
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        xdwlib.enable_cache(os.path.join(self.dir, "cache"))
+
+    def tearDown(self):
+        xdwlib.enable_cache(None)
+        SimulatedTestCase.tearDown(self)
+
+    def test_cache(self):
+        path = self.document("a.xdw", pages=3, text="abc {page}",
+                annotations=1)
+        doc = xdwlib.xdwopen(path, readonly=True)
+        text = doc.fulltext()
+        doc.close()
+        doc = xdwlib.xdwopen(path, readonly=True)
+        with xdwlib.measure() as stats:
+            self.assertEqual(doc.fulltext(), text)
+            self.assertEqual(doc.content_text(), "abc 1\fabc 2\fabc 3")
+        self.assertEqual(stats["XDW_GetPageTextToMemoryW"].calls, 0)
+        doc.close()
+        self.document("a.xdw", pages=2, text="xyz {page}")
+        doc = xdwlib.xdwopen(path, readonly=True)
+        self.assertEqual(doc.content_text(), "xyz 1\fxyz 2")
+        doc.close()
+
+    def test_empty_document(self):
+        path = self.document("a.xdw", pages=2, text="abc {page}")
+        empty = self.document("e.xdw", pages=0)
+        binder = xdwlib.xdwopen(
+                self.binder("b.xbd", [path, empty, path]), readonly=True)
+        self.assertEqual(binder.document_pages(), [2, 0, 2])
+        texts = [(doc.content_text(), doc.annotation_text(), doc.fulltext())
+                for doc in binder]
+        self.assertEqual(texts[1], (None, None, None))
+        self.assertEqual(texts[2][0], "abc 1\fabc 2")
+        binder.close()
+
+
+class PoolTest(SimulatedTestCase):
+
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.paths = [self.document("d{0}.xdw".format(i), pages=2)
+                for i in range(3)]
+        xdwlib.enable_pool(2)
+        self.pool = xdwlib.document_pool()
+
+    def tearDown(self):
+        xdwlib.enable_pool(0)
+        SimulatedTestCase.tearDown(self)
+
+    def refs(self, path):
+        return [entry.refs for entry in self.pool.entries.values()
+                if entry.doc.name == os.path.splitext(
+                os.path.basename(path))[0]]
+
+    def test_share(self):
+        a = xdwlib.xdwopen(self.paths[0], readonly=True)
+        b = xdwlib.xdwopen(self.paths[0], readonly=True)
+        self.assertIsNot(a, b)
+        self.assertEqual(a.handle, b.handle)
+        self.assertIsNot(a.page(0), b.page(0))
+        self.assertEqual((self.pool.hits, self.pool.misses), (1, 1))
+        self.assertEqual(self.refs(self.paths[0]), [2])
+        a.close()
+        self.assertEqual(self.refs(self.paths[0]), [1])
+        self.assertEqual(b.page(1).content_text(), "")
+        b.close()
+        self.assertEqual(len(self.pool), 1)
+
+    def test_double_close(self):
+        a = xdwlib.xdwopen(self.paths[0], readonly=True)
+        b = xdwlib.xdwopen(self.paths[0], readonly=True)
+        a.close()
+        with self.assertRaises(xdwapi.XDWError):
+            a.close()
+        self.assertEqual(self.refs(self.paths[0]), [1])
+        self.assertEqual(b.pages, 2)
+        b.close()
+
+    def test_evict(self):
+        a = xdwlib.xdwopen(self.paths[0], readonly=True)
+        b = xdwlib.xdwopen(self.paths[1], readonly=True)
+        c = xdwlib.xdwopen(self.paths[2], readonly=True)  # out of pool
+        self.assertIsNone(c._pool_entry)
+        self.assertEqual(len(self.pool), 2)
+        c.close()
+        a.close()
+        handles = len(xdwlib.xdwfile.VALID_DOCUMENT_HANDLES)
+        c = xdwlib.xdwopen(self.paths[2], readonly=True)  # evicts a
+        self.assertEqual(len(xdwlib.xdwfile.VALID_DOCUMENT_HANDLES), handles)
+        self.assertEqual(self.refs(self.paths[0]), [])
+        self.assertEqual(b.pages, 2)
+        b.close()
+        c.close()
+
+    def test_stale(self):
+        a = xdwlib.xdwopen(self.paths[0], readonly=True)
+        SimulatedXDWAPI.make_document(self.paths[0], pages=3)
+        b = xdwlib.xdwopen(self.paths[0], readonly=True)
+        self.assertEqual((a.pages, b.pages), (2, 3))
+        self.assertNotEqual(a.handle, b.handle)
+        self.assertEqual(self.pool.misses, 2)
+        handle = a.handle
+        a.close()  # Discarded while in use; closed now.
+        self.assertNotIn(handle, xdwlib.xdwfile.VALID_DOCUMENT_HANDLES)
+        b.close()
+
+
+class SnapshotTest(SimulatedTestCase):
+
+    def test_snapshot(self):
+        doc = xdwlib.xdwopen(self.document("a.xdw", pages=3, text="abc",
+                annotations=2))
+        doc.set_property("Title2", "abc")
+        doc.page(1).set_userattr("U", b"pg")
+        snapshot = doc.snapshot(userattrs=["U"])
+        text = doc.fulltext()
+        doc.close()
+        with xdwlib.measure() as stats:
+            loaded = pickle.loads(pickle.dumps(snapshot))
+            self.assertEqual(loaded.fulltext(), text)
+            self.assertEqual(loaded.get_property("Title2"), "abc")
+            self.assertEqual(loaded.page(1).get_userattr("U"), b"pg")
+            self.assertEqual(loaded.page(0)[1].geometry().rect,
+                    snapshot.page(0)[1].geometry().rect)
+        self.assertEqual(stats.calls, 0)
+        for obj in (snapshot, loaded):
+            with self.assertRaises(TypeError):
+                obj.properties["Title2"] = "x"
+            with self.assertRaises(TypeError):
+                obj.page_userattrs[0]["U"] = b"x"
+            with self.assertRaises(TypeError):
+                obj.trees[0].geometry[0] = 0
+            with self.assertRaises(AttributeError):
+                obj.trees[0].texts.append("x")
+
+
+class IndexTest(SimulatedTestCase):
+
+    def test_search(self):
+        from xdwlib.index import CorpusIndex
+        top = os.path.join(self.dir, "corpus")
+        os.mkdir(top)
+        SimulatedXDWAPI.make_document(os.path.join(top, "a.xdw"),
+                pages=3, text="alpha page {page}")
+        SimulatedXDWAPI.make_document(os.path.join(top, "b.xdw"),
+                pages=2, text="beta page {page}")
+        index = CorpusIndex(os.path.join(self.dir, "index.db"))
+        updated, removed = index.update(top)
+        self.assertEqual((len(updated), removed), (2, []))
+        result = index.search("ALPHA 2")
+        self.assertEqual([(os.path.basename(path), document, page)
+                for (path, document, page) in result], [("a.xdw", None, 1)])
+        self.assertEqual(index.update(top), ([], []))
+        os.remove(os.path.join(top, "b.xdw"))
+        self.assertEqual(len(index.update(top)[1]), 1)
+        self.assertFalse(index.search("beta"))
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
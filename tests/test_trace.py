@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""test_trace.py -- recording and replaying XDW_* calls
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import xdwlib
+from xdwlib import xdwapi
+from xdwlib.xdwsim import SimulatedXDWAPI
+from xdwlib.xdwtrace import record
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = xdwapi.DLL
+        self.dir = tempfile.mkdtemp()
+        self.path = SimulatedXDWAPI.make_document(
+                os.path.join(self.dir, "a.xdw"), pages=3, text="abc",
+                annotations=1)
+        self.trace = os.path.join(self.dir, "a.xdwtrace")
+        xdwlib.use_backend("simulated")
+        with record(self.trace):
+            doc = xdwlib.xdwopen(self.path)
+            self.text = doc.fulltext()
+            doc.close()
+
+    def tearDown(self):
+        xdwapi.DLL = self.backend
+        xdwapi._functions.clear()
+        shutil.rmtree(self.dir)
+
+    def test_replay(self):
+        xdwlib.use_backend("replay", path=self.trace)
+        doc = xdwlib.xdwopen(self.path)
+        self.assertEqual(doc.fulltext(), self.text)
+        doc.close()
+
+    def test_arguments(self):
+        xdwlib.use_backend("replay", path=self.trace)
+        other = os.path.join(self.dir, "b.xdw")
+        shutil.copy(self.path, other)
+        with self.assertRaises(RuntimeError):
+            xdwlib.xdwopen(other)
+
+    def test_buffer(self):
+        api = xdwlib.use_backend("replay", path=self.trace)
+        name, _, outputs = api.entries[0][:3]
+        self.assertTrue(outputs)
+        with self.assertRaises(RuntimeError):
+            api.replay(name, [None] * (outputs[0][0] + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,11 +13,11 @@ WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
 """
 
+import os
 import sys
 import codecs
-import collections
 
-from xdwlib import xdwopen
+from xdwlib import xdwopen, enable_cache
 from xdwlib.xdwapi import XDWError, InvalidArgError
 
 
@@ -62,6 +62,9 @@ def parse():
     parser.add_option("--comment",
             action="store_const", dest="spec", const="Comments",
             help="document comments")
+    parser.add_option("--cache", dest="cache",
+            default=os.environ.get("XDWLIB_CACHE"),
+            help="directory of persistent text cache (default=$XDWLIB_CACHE)")
     parser.add_option("--encoding", dest="encoding", default="mbcs",
             help="output encoding: mbcs, utf-8, etc. (default=mbcs)")
     parser.add_option("-d", action="store_true", dest="ask",
@@ -92,7 +95,11 @@ if __name__ == "__main__":
         options.pipe = True
 
     try:
-        doc = xdwopen(args[0], readonly=True, authenticate=False)
+        if options.cache and not options.ask:
+            doc = enable_cache(options.cache).read(
+                    args[0], authenticate=False)
+        else:
+            doc = xdwopen(args[0], readonly=True, authenticate=False)
     except XDWError as e:
         if options.ask:
             exit(e, not options.silent)
@@ -108,7 +115,7 @@ if __name__ == "__main__":
     for name in options.spec.split(","):
         try:
             text = getattr(doc, name)
-            if isinstance(text, collections.Callable):
+            if callable(text):
                 text = text()
             out.append("%s=%s" % (name, text))
         except KeyError:
@@ -15,6 +15,9 @@ FOR A PARTICULAR PURPOSE.
 
 import sys
 
+from .xdwapi import use_backend, register_backend
+from .xdwstats import stats, enable_stats, measure
+from .xdwpool import document_pool, enable_pool
 from .struct import Point, Rect
 from .common import environ
 from .xdwtemp import XDWTemp
@@ -25,6 +28,21 @@ from .binder import Binder, create_binder
 from .documentinbinder import DocumentInBinder
 from .page import Page, PageCollection
 from .annotation import Annotation, AnnotationCache
+from .index import CorpusIndex
+
+
+# xdwcache requires sqlite3 etc., so it is imported on the first call.
+
+def text_cache():
+    """Get the process-wide TextCache; see xdwcache.text_cache()."""
+    from .xdwcache import text_cache
+    return text_cache()
+
+
+def enable_cache(directory, **kw):
+    """Enable or disable the text cache; see xdwcache.enable_cache()."""
+    from .xdwcache import enable_cache
+    return enable_cache(directory, **kw)
 
 
 __author__ = "HAYASHI Hideki"
@@ -15,6 +15,7 @@ FOR A PARTICULAR PURPOSE.
 
 import os
 import warnings
+from array import array
 
 from .xdwapi import *
 from .common import *
@@ -45,10 +46,14 @@ _POINTS = (
 
 def relative_points(points):
     """Convert point sequence in absolute coordinate to xdwapi-style."""
-    if len(points) < 2:
-        return points
-    p0 = points[0]
-    return tuple([p0] + [p - p0 for p in points[1:]])
+    return PointArray(points).relative()
+
+
+def c_points(points):
+    """Convert point sequence in absolute coordinate to XDW_POINT array."""
+    data = relative_points(points).data
+    return (XDW_POINT * (len(data) // 2)).from_buffer_copy(
+            array("l", [int(v * 100) for v in data]))
 
 
 class Annotatable(Subject):
@@ -102,9 +107,10 @@ class Annotatable(Subject):
         """Get an annotation by position."""
         from .annotation import Annotation
         pos = self._pos(pos)
-        if pos not in self.observers:
-            self.observers[pos] = Annotation(self, pos, parent=self)
-        return self.observers[pos]
+        ann = self.observers.get(pos)
+        if ann is None:
+            ann = self.observers[pos] = Annotation(self, pos, parent=self)
+        return ann
 
     @staticmethod
     def initial_data(ann_type, **kw):
@@ -154,10 +160,14 @@ class Annotatable(Subject):
         if isinstance(position, (tuple, list)):
             position = Point(*position)
         init_dat = Annotatable.initial_data(ann_type, **kw)
-        ann_handle = self._add(ann_type, position, init_dat)
         pos = self.annotations  # TODO: Ensure this is correct.
+        ann_handle = self._add(ann_type, position, init_dat)
         self.annotations += 1
+        self._annotations_changed()
         ann = self.annotation(pos)
+        catalog = self._catalog()
+        if catalog is not None:
+            catalog.add(ann)
         return ann
 
     def add_text(self, position=_POSITION, **kw):
@@ -319,13 +329,9 @@ class Annotatable(Subject):
 
         Note that `position' attribute is determined automatically.
         """
-        points = relative_points(points)
-        c_points = (XDW_POINT * len(points))()
-        for i, p in enumerate(points):
-            c_points[i].x = int(p.x * 100)
-            c_points[i].y = int(p.y * 100)
+        points = c_points(points)
         ann = self.add(XDW_AID_MARKER, _POSITION,  # position is dummy
-                nCounts=len(points), pPoints=c_points)
+                nCounts=len(points), pPoints=points)
         for k, v in kw.items():
             setattr(ann, k, v)
         return ann
@@ -340,13 +346,9 @@ class Annotatable(Subject):
 
         Note that `position' attribute is determined automatically.
         """
-        points = relative_points(points)
-        c_points = (XDW_POINT * len(points))()
-        for i, p in enumerate(points):
-            c_points[i].x = int(p.x * 100)
-            c_points[i].y = int(p.y * 100)
+        points = c_points(points)
         ann = self.add(XDW_AID_POLYGON, _POSITION,  # position is dummy
-                nCounts=len(points), pPoints=c_points)
+                nCounts=len(points), pPoints=points)
         for k, v in kw.items():
             setattr(ann, k, v)
         return ann
@@ -376,7 +378,8 @@ class Annotatable(Subject):
         elif t == XDW_AID_LINK:
             copy = self.add_link(position=ann.position)
         elif t == XDW_AID_BITMAP:
-            if not PIL_ENABLED:
+            Image = pil_image()
+            if not Image:
                 warnings.warn("install Pillow before copying bitmap annotation",
                         UserWarning, stacklevel=2)
                 return None
@@ -439,6 +442,15 @@ class Annotatable(Subject):
         """Abstract method as a stub for delete()."""
         raise NotImplementedError()
 
+    def _annotations_changed(self):
+        """Abstract method called after annotations are added, removed,
+        moved or modified."""
+        raise NotImplementedError()
+
+    def _catalog(self):
+        """Abstract method to get AnnotationCatalog to update, or None."""
+        raise NotImplementedError()
+
     def delete(self, pos):
         """Remove an annotation.
 
@@ -449,6 +461,10 @@ class Annotatable(Subject):
         self._delete(ann)
         self.detach(ann, EV_ANN_REMOVED)
         self.annotations -= 1
+        self._annotations_changed()
+        catalog = self._catalog()
+        if catalog is not None:
+            catalog.remove(ann.handle)
 
     def content_text(self, recursive=True):
         """Abstract method for concrete content_text()."""
@@ -472,6 +488,20 @@ class Annotatable(Subject):
                 self.content_text(),
                 self.annotation_text(recursive=True)])
 
+    def annotation_geometries(self, recursive=False):
+        """Get geometries of annotations in one pass.
+
+        recursive   also return geometries of descendant annotations
+
+        Returns a list of (Annotation, AnnotationGeometry).
+        """
+        result = []
+        for ann in self:
+            result.append((ann, ann.geometry()))
+            if recursive and ann.annotations:
+                result.extend(ann.annotation_geometries(recursive=True))
+        return result
+
     def find_annotations(self, criteria=None,
             handles=None, types=None, rect=None,
             half_open=True, recursive=False):
@@ -14,7 +14,9 @@ FOR A PARTICULAR PURPOSE.
 """
 
 import re
+from array import array
 
+from . import xdwapi
 from .xdwapi import *
 from .common import *
 from .observer import *
@@ -22,15 +24,136 @@ from .struct import *
 from .annotatable import Annotatable
 
 
-__all__ = ("Annotation", "AnnotationCache")
+__all__ = ("Annotation", "AnnotationCache", "AnnotationGeometry",
+        "AnnotationTree", "AnnotationNode", "AnnotationCatalog")
 
 
 def absolute_points(points):
     """Convert xdwapi-style point sequence in absolute coordinates."""
-    if len(points) < 2:
-        return points
-    p0 = points[0]
-    return tuple([p0] + [p0 + p for p in points[1:]])
+    return PointArray(points).absolute()
+
+
+def attribute_value(anntype, attrname, data_type, value):
+    """Convert annotation attribute value given by XDWAPI for users."""
+    if data_type == XDW_ATYPE_INT:
+        if anntype == "STICKEY" and attrname.endswith(b"Color"):
+            return XDW_COLOR_FUSEN[value]
+        elif anntype == "LINK" and attrname.endswith(b"XdwPage"):
+            return value - 1  # So, -1 for profile view.
+        return scale(attrname, value, store=False)
+    elif data_type == XDW_ATYPE_STRING:
+        return value
+    else:  # data_type == XDW_ATYPE_OTHER:  # Quick hack for points.
+        # Flat x, y, ... in 1/100 mm; see XDW_ANNOTATION_ATTRIBUTE.
+        data = array("l", bytes(value))
+        return PointArray(data=array("d",
+                [v / 100.0 for v in data])).absolute()
+
+
+def custom_properties(handle):
+    """Get dict of custom properties of annotation in order."""
+    result = dict()
+    for order in range(XDW_GetAnnotationCustomAttributeNumber(handle)):
+        name, t, value = XDW_GetAnnotationCustomAttributeByOrder(
+                handle, order + 1)[:3]
+        result[name] = makevalue(t, value)
+    return result
+
+
+def user_attributes(handle, names):
+    """Get dict of user attributes of annotation, of given names if any."""
+    result = dict()
+    for name in names:
+        try:
+            result[uc(name)] = XDW_GetAnnotationUserAttribute(handle, cp(name))
+        except InvalidArgError:
+            continue
+    return result
+
+
+def content_text(anntype, get):
+    """Get content text of annotation like Annotation.content_text().
+
+    anntype     (str) annotation type e.g. 'TEXT'
+    get         function to get attribute value by inner attribute name
+    """
+    if anntype == "TEXT":
+        return get(XDW_ATN_Text)
+    elif anntype == "LINK":
+        return get(XDW_ATN_Caption)
+    elif anntype == "STAMP":
+        return "{0} <DATE> {1}".format(
+                get(XDW_ATN_TopField), get(XDW_ATN_BottomField))
+    return None
+
+
+def page_annotation_text(doc_handle, page, count):
+    """Get annotation text like Page.annotation_text() by handles only.
+
+    doc_handle  document or binder handle
+    page        (int) absolute page number; starts with 0
+    count       (int) number of top level annotations on page
+    """
+    result = []
+
+    def read(parent_handle, count):
+        for i in range(count):
+            info = XDW_GetAnnotationInformation(
+                    doc_handle, page + 1, parent_handle, i + 1)
+            anntype = XDW_ANNOTATION_TYPE[info.nAnnotationType]
+
+            def get(attrname):
+                data_type, value, _ = XDW_GetAnnotationAttributeW(
+                        info.handle, attrname, codepage=CP)
+                return attribute_value(anntype, attrname, data_type, value)
+
+            result.append(content_text(anntype, get))
+            if info.nChildAnnotations:
+                read(info.handle, info.nChildAnnotations)
+
+    read(NULL, count)
+    return joinf(ASEP, result)
+
+
+def inside(bbox, rect):  # Assume rect is half-open.
+    """Test if bbox (Rect) is placed inside rect."""
+    if isinstance(rect, (list, tuple)):
+        rect = Rect(*rect[:4])
+    l, t, r, b = bbox
+    rect = Rect(*(x * 100 for x  in rect))
+    l, t, r, b = l * 100, t * 100, r * 100, b * 100
+    return (rect.left <= l and r < rect.right and
+            rect.top <= t and b < rect.bottom)
+
+
+class AnnotationGeometry(object):
+
+    """Position, size and points of an annotation, taken at once.
+
+    position    (Point) left-top in mm
+    size        (Point) width and height in mm
+    points      (PointArray) absolute points in mm for straightline,
+                marker or polygon, or None for other types
+    rect        (Rect) bounding box; made of points if available
+    """
+
+    def __init__(self, position, size, points=None):
+        self.position = position
+        self.size = size
+        if points is not None and not isinstance(points, PointArray):
+            points = PointArray(points)
+        self.points = points
+        if points:
+            self.rect = points.rect()
+        else:
+            self.rect = Rect(position, position + size)
+
+    def __repr__(self):
+        return "{cls}({pos}, {size}{pts})".format(
+                cls=self.__class__.__name__,
+                pos=self.position,
+                size=self.size,
+                pts="" if self.points is None else ", {0}".format(self.points))
 
 
 class AnnotationCache(object):
@@ -87,20 +210,451 @@ class AnnotationCache(object):
 
     def content_text(self):
         """Returns content text of annotation cache."""
-        if self._t == "TEXT":
-            return self.text
-        elif self._t == "LINK":
-            return self.caption
-        elif self._t == "STAMP":
-            return "{top} <DATE> {bottom}".format(
-                    top=self.top_field, bottom=self.bottom_field)
-        else:
-            return None
+        return content_text(self._t,
+                lambda attrname: getattr(self, outer_attribute_name(attrname)))
 
     def attributes(self):
         return self._a
 
 
+class AnnotationTree(object):
+
+    """Snapshot of all annotations on a page, read in one traversal.
+
+    Annotations are numbered in depth-first order and their information
+    is kept in arrays, so that queries on the tree need no XDWAPI calls.
+    Changes made to the page after reading are not reflected.
+
+    Iterating the tree gives AnnotationNode's in depth-first order.
+    roots() gives top level ones.
+    """
+
+    LINED = (XDW_AID_STRAIGHTLINE, XDW_AID_MARKER, XDW_AID_POLYGON)
+
+    def __init__(self):
+        self.handles = []
+        self.types = array("i")
+        self.parents = array("i")  # -1 for top level
+        self.ends = array("i")  # next to the last descendant
+        self.geometry = array("i")  # x, y, width, height in 1/100 mm
+        self.points = dict()  # pos -> PointArray for lined annotations
+        self.texts = []  # content text
+        self.attrs = None  # list of attributes dict if read
+        self.props = None  # list of custom properties dict if read
+        self.userattrs = None  # list of user attributes dict if read
+
+    @staticmethod
+    def read(pg, attributes=False, properties=False, userattrs=()):
+        """Read annotations on page.
+
+        pg          (Page)
+        attributes  (bool) also read all attributes of each annotation
+        properties  (bool) also read custom properties of each annotation
+        userattrs   (sequence of str) names of user attributes to read
+        """
+        return AnnotationTree._read(pg.doc.handle, pg.absolute_page(),
+                pg.annotations, attributes, properties, userattrs)
+
+    @staticmethod
+    def _read(doc_handle, page, count, attributes=False, properties=False,
+            userattrs=()):
+        tree = AnnotationTree()
+        if attributes:
+            tree.attrs = []
+        if properties:
+            tree.props = []
+        if userattrs:
+            tree.userattrs = []
+
+        def read(parent, parent_handle, count):
+            for i in range(count):
+                info = XDW_GetAnnotationInformation(
+                        doc_handle, page + 1, parent_handle, i + 1)
+                pos = len(tree.handles)
+                tree._add(info, parent, attributes, userattrs)
+                if info.nChildAnnotations:
+                    read(pos, info.handle, info.nChildAnnotations)
+                tree.ends[pos] = len(tree.handles)
+
+        read(-1, NULL, count)
+        return tree
+
+    def _add(self, info, parent, attributes, userattrs=()):
+        handle = info.handle
+        anntype = XDW_ANNOTATION_TYPE[info.nAnnotationType]
+        self.handles.append(handle)
+        self.types.append(info.nAnnotationType)
+        self.parents.append(parent)
+        self.ends.append(0)
+        self.geometry.extend((info.nHorPos, info.nVerPos,
+                info.nWidth, info.nHeight))
+
+        values = dict()
+
+        def get(attrname):
+            if attrname not in values:
+                data_type, value, _ = XDW_GetAnnotationAttributeW(
+                        handle, attrname, codepage=CP)
+                values[attrname] = attribute_value(
+                        anntype, attrname, data_type, value)
+            return values[attrname]
+
+        if info.nAnnotationType in AnnotationTree.LINED:
+            self.points[len(self.handles) - 1] = get(XDW_ATN_Points)
+        self.texts.append(content_text(anntype, get))
+        if attributes:
+            self.attrs.append(dict(
+                    (outer_attribute_name(k), get(k))
+                    for (k, v) in XDW_ANNOTATION_ATTRIBUTE.items()
+                    if info.nAnnotationType in v[2]))
+        if self.props is not None:
+            self.props.append(custom_properties(handle))
+        if self.userattrs is not None:
+            self.userattrs.append(user_attributes(handle, userattrs))
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if not (0 <= pos < len(self)):
+            raise IndexError("annotation number out of range")
+        return AnnotationNode(self, pos)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield AnnotationNode(self, pos)
+
+    def _children(self, parent):
+        pos = parent + 1
+        end = self.ends[parent] if 0 <= parent else len(self)
+        while pos < end:
+            yield AnnotationNode(self, pos)
+            pos = self.ends[pos]
+
+    def roots(self):
+        """Get top level AnnotationNode's."""
+        return list(self._children(-1))
+
+    def annotation_text(self, recursive=True):
+        """Get text in annotations like Page.annotation_text()."""
+        return self._annotation_text(-1, recursive)
+
+    def _annotation_text(self, parent, recursive):
+        result = []
+        for node in self._children(parent):
+            result.append(node.content_text())
+            if recursive and node.annotations:
+                result.append(self._annotation_text(node.pos, True))
+        return joinf(ASEP, result)
+
+    def find_annotations(self, criteria=None,
+            handles=None, types=None, rect=None,
+            half_open=True, recursive=False):
+        """Find annotations like Page.find_annotations().
+
+        Returns a list of AnnotationNode.  criteria takes AnnotationNode.
+        """
+        if handles and not isinstance(handles, (tuple, list)):
+            handles = list(handles)
+        if types:
+            if not isinstance(types, (list, tuple)):
+                types = [types]
+        if rect and not half_open:
+            rect = rect.half_open()
+        return self._find(-1, criteria, handles, types, rect, recursive)
+
+    def _find(self, parent, criteria, handles, types, rect, recursive):
+        result = []
+        for node in self._children(parent):
+            if not ((not rect or inside(node.geometry().rect, rect)) and
+                    (not types or node.type in types) and
+                    (not handles or node.handle in handles) and
+                    (not criteria or criteria(node))):
+                continue
+            result.append(node)
+            if recursive and node.annotations:
+                result.extend(self._find(node.pos,
+                        criteria, handles, types, rect, recursive))
+        return result
+
+
+class AnnotationNode(object):
+
+    """Annotation in AnnotationTree."""
+
+    __slots__ = ("tree", "pos")
+
+    def __init__(self, tree, pos):
+        self.tree = tree
+        self.pos = pos
+
+    def __repr__(self):
+        return "{cls}({pos}: {typ})".format(
+                cls=self.__class__.__name__, pos=self.pos, typ=self.type)
+
+    def __eq__(self, node):
+        if not isinstance(node, AnnotationNode):
+            return NotImplemented
+        return self.tree is node.tree and self.pos == node.pos
+
+    def __hash__(self):
+        return hash((id(self.tree), self.pos))
+
+    @property
+    def handle(self):
+        return self.tree.handles[self.pos]
+
+    @property
+    def type(self):
+        return XDW_ANNOTATION_TYPE[self.tree.types[self.pos]]
+
+    @property
+    def parent(self):
+        parent = self.tree.parents[self.pos]
+        return None if parent < 0 else AnnotationNode(self.tree, parent)
+
+    @property
+    def annotations(self):
+        """Number of child annotations."""
+        return len(self.children())
+
+    def children(self):
+        return list(self.tree._children(self.pos))
+
+    def geometry(self):
+        x, y, w, h = self.tree.geometry[4 * self.pos:4 * self.pos + 4]
+        return AnnotationGeometry(Point(x, y) / 100.0, Point(w, h) / 100.0,
+                points=self.tree.points.get(self.pos))
+
+    @property
+    def position(self):
+        return self.geometry().position
+
+    @property
+    def size(self):
+        return self.geometry().size
+
+    def content_text(self):
+        return self.tree.texts[self.pos]
+
+    def attributes(self):
+        """Returns dict of annotation attribute names and values.
+
+        Available only if the tree is read with attributes.
+        """
+        if self.tree.attrs is None:
+            raise ValueError("attributes are not read; see AnnotationTree")
+        d = dict(self.tree.attrs[self.pos])
+        geometry = self.geometry()
+        d["position"] = geometry.position
+        d["size"] = geometry.size
+        return d
+
+    def _values(self, column, what):
+        values = getattr(self.tree, column)
+        if values is None:
+            raise ValueError("{0} are not read; see AnnotationTree".format(
+                    what))
+        return values[self.pos]
+
+    @property
+    def properties(self):
+        """Number of custom properties."""
+        return len(self._values("props", "properties"))
+
+    def has_property(self, name):
+        """Test if custom property exists; requires properties."""
+        return name in self._values("props", "properties")
+
+    def get_property(self, name, default=None):
+        """Get custom property like Annotation.get_property().
+
+        Available only if the tree is read with properties.
+        """
+        props = self._values("props", "properties")
+        if isinstance(name, int):
+            return list(props.items())[name]
+        return props.get(name, default)
+
+    def get_userattr(self, name, default=None):
+        """Get user attribute like Annotation.get_userattr().
+
+        Available only for names given on reading the tree.
+        """
+        return self._values("userattrs", "user attributes").get(
+                uc(name), default)
+
+    def cache(self):
+        """Get AnnotationCache, which requires attributes."""
+        return AnnotationCache(self)
+
+
+class AnnotationCatalog(object):
+
+    """Index of all annotations in a document or binder.
+
+    Annotations, including descendants, are looked up by type, custom
+    property (name and value) and user attribute (name and value), and
+    given as a list of (absolute_page, handle) in page order.  Lookups
+    need no XDWAPI calls.
+
+    XDWAPI cannot enumerate names of user attributes, so only user
+    attributes named in userattrs are indexed.
+
+    The catalog is kept up to date as long as annotations and pages are
+    added or removed, and properties and user attributes are set, through
+    the document or binder which built it; see XDWFile.annotation_catalog().
+    """
+
+    def __init__(self, handle=None, userattrs=()):
+        self.handle = handle  # document handle
+        self.userattrs = tuple(uc(name) for name in userattrs)
+        self.pages = dict()  # annotation handle -> absolute page
+        self.parents = dict()  # annotation handle -> parent or None
+        self.children = dict()  # annotation handle -> list of handles
+        self.keys = dict()  # annotation handle -> list of index keys
+        self.index = dict()  # key -> dict of annotation handle -> None
+
+    @staticmethod
+    def read(xdwfile, userattrs=()):
+        """Read all annotations in document or binder.
+
+        xdwfile     (Document or Binder)
+        userattrs   (sequence of str) names of user attributes to index
+        """
+        catalog = AnnotationCatalog(xdwfile.handle, userattrs)
+        catalog._read_pages(0, xdwfile.pages)
+        return catalog
+
+    def _read_pages(self, start, stop):
+        for page in range(start, stop):
+            count = XDW_GetPageInformation(self.handle, page + 1).nAnnotations
+            self._read(page, None, count)
+
+    def _read(self, page, parent, count):
+        for i in range(count):
+            info = XDW_GetAnnotationInformation(
+                    self.handle, page + 1, parent or NULL, i + 1)
+            self._add(page, parent, info.handle,
+                    XDW_ANNOTATION_TYPE[info.nAnnotationType])
+            if info.nChildAnnotations:
+                self._read(page, info.handle, info.nChildAnnotations)
+
+    def _add(self, page, parent, handle, anntype):
+        self.pages[handle] = page
+        self.parents[handle] = parent
+        self.children[handle] = []
+        if parent is not None:
+            self.children[parent].append(handle)
+        self.keys[handle] = []
+        self._index(handle, ("type", anntype))
+        self._read_values(handle)
+
+    def _read_values(self, handle):
+        for (name, value) in custom_properties(handle).items():
+            self._index(handle, ("property", name))
+            self._index(handle, ("property", name, value))
+        for (name, value) in user_attributes(handle, self.userattrs).items():
+            self._index(handle, ("userattr", name))
+            self._index(handle, ("userattr", name, value))
+
+    def _index(self, handle, key):
+        self.keys[handle].append(key)
+        self.index.setdefault(key, dict())[handle] = None
+
+    def _unindex(self, handle, keep=("type",)):
+        keys = self.keys[handle]
+        for key in [key for key in keys if key[0] not in keep]:
+            handles = self.index[key]
+            del handles[handle]
+            if not handles:
+                del self.index[key]
+        keys[:] = [key for key in keys if key[0] in keep]
+
+    def _lookup(self, key):
+        handles = self.index.get(key, ())
+        return sorted(((self.pages[h], h) for h in handles),
+                key=lambda entry: entry[0])
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, handle):
+        return handle in self.pages
+
+    def page(self, handle):
+        """Get absolute page number of annotation."""
+        return self.pages[handle]
+
+    def of_type(self, anntype):
+        """Get (absolute_page, handle) of annotations of type anntype."""
+        anntype = XDW_ANNOTATION_TYPE[XDW_ANNOTATION_TYPE.normalize(anntype)]
+        return self._lookup(("type", anntype))
+
+    def with_property(self, name, value=None):
+        """Get (absolute_page, handle) of annotations with custom property.
+
+        name        (str) name of property
+        value       value of property; None means any
+        """
+        if value is None:
+            return self._lookup(("property", name))
+        return self._lookup(("property", name, value))
+
+    def with_userattr(self, name, value=None):
+        """Get (absolute_page, handle) of annotations with user attribute.
+
+        name        (str or bytes) name of user attribute given on reading
+        value       (bytes) value of user attribute; None means any
+        """
+        name = uc(name)
+        if name not in self.userattrs:
+            raise ValueError("user attribute {0} is not indexed".format(name))
+        if value is None:
+            return self._lookup(("userattr", name))
+        return self._lookup(("userattr", name, value))
+
+    def add(self, ann):
+        """Add an annotation just pasted; see Annotatable.add()."""
+        parent = ann.parent.handle if ann.parent else None
+        self._add(ann.page.absolute_page(), parent, ann.handle, ann.type)
+
+    def remove(self, handle):
+        """Remove an annotation and its descendants."""
+        for child in self.children.pop(handle):
+            self.remove(child)
+        self._unindex(handle, keep=())
+        parent = self.parents.pop(handle)
+        if parent is not None and parent in self.children:
+            self.children[parent].remove(handle)
+        del self.pages[handle]
+        del self.keys[handle]
+
+    def update(self, ann):
+        """Read properties and user attributes of an annotation again."""
+        self._unindex(ann.handle)
+        self._read_values(ann.handle)
+
+    def insert_pages(self, start, count):
+        """Shift annotations after page insertion and read new pages."""
+        for (handle, page) in self.pages.items():
+            if start <= page:
+                self.pages[handle] = page + count
+        self._read_pages(start, start + count)
+
+    def delete_pages(self, start, count=1):
+        """Remove annotations on deleted pages and shift the rest."""
+        stop = start + count
+        for handle in [h for (h, page) in self.pages.items()
+                if start <= page < stop and self.parents[h] is None]:
+            self.remove(handle)
+        for (handle, page) in self.pages.items():
+            if stop <= page:
+                self.pages[handle] = page - count
+
+
 class Annotation(Annotatable, Observer):
 
     """Annotation on DocuWorks document page."""
@@ -123,22 +677,22 @@ class Annotation(Annotatable, Observer):
 
     def __init__(self, pg, pos, parent=None):
         self.pos = pos
-        Annotatable.__init__(self)
-        Observer.__init__(self, pg, EV_ANN_INSERTED)
         self.page = pg.page if isinstance(pg, Annotation) else pg
+        Annotatable.__init__(self, limit=self.page.doc.cache_annotations)
+        Observer.__init__(self, pg, EV_ANN_INSERTED)
         self.parent = parent if isinstance(parent, Annotation) else None
         self.reset_attr()
 
     def reset_attr(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
+        info = self._annotation_information()
         self.handle = info.handle
         self.type = XDW_ANNOTATION_TYPE[info.nAnnotationType]
         self.annotations = info.nChildAnnotations
         self.is_unicode = False
+        self._attribute_cache = dict()
+        self._info = info  # for geometry()
+        self._geometry = None
+        self._read_revision = xdwapi._revision
         self._set_property_count()
         #self.locked = unknown  # XDWAPI provides no information on this.
 
@@ -168,13 +722,89 @@ class Annotation(Annotatable, Observer):
                 XDW_ATN_TopField, XDW_ATN_BottomField,
                 )
 
+    def _get_attribute(self, attrname):
+        """Get (data_type, value, text_type) of attribute.
+
+        attrname    (bytes) inner attribute name e.g. %FontName
+
+        Values are cached if cache_annotation_attributes of the document
+        is True.
+        """
+        _get = Annotatable.__getattribute__
+        if not _get(self, "page").doc.cache_annotation_attributes:
+            return XDW_GetAnnotationAttributeW(
+                    _get(self, "handle"), attrname, codepage=CP)
+        cache = _get(self, "_attribute_cache")
+        try:
+            return cache[attrname]
+        except KeyError:
+            result = cache[attrname] = XDW_GetAnnotationAttributeW(
+                    _get(self, "handle"), attrname, codepage=CP)
+            return result
+
+    def _invalidate(self, *attrnames):
+        """Forget cached attributes; all attributes if none is given.
+
+        Geometry is always forgotten since position and size may depend
+        on attributes, e.g. font size of an auto-resized text annotation.
+        """
+        _set = Annotatable.__setattr__
+        _set(self, "_info", None)
+        _set(self, "_geometry", None)
+        cache = Annotatable.__getattribute__(self, "_attribute_cache")
+        if not attrnames:
+            cache.clear()
+        for attrname in attrnames:
+            cache.pop(attrname, None)
+        self._annotations_changed()
+
+    def _annotations_changed(self):
+        """Concrete method over _annotations_changed()."""
+        self.page._annotations_changed()
+
+    def _catalog(self):
+        """Concrete method over _catalog()."""
+        return self.page._catalog()
+
+    def _annotation_information(self):
+        return XDW_GetAnnotationInformation(
+                self.page.doc.handle,
+                self.page.absolute_page() + 1,
+                self.parent.handle if self.parent else NULL,
+                self.pos + 1)
+
+    def geometry(self):
+        """Get AnnotationGeometry, i.e. position and size read at once.
+
+        Geometry is reused until any XDW_* function which may change
+        documents is called, including the information read on creation.
+        If cache_annotation_attributes of the document is True, it is
+        kept further until changed via self.
+        """
+        fresh = (self._read_revision == xdwapi._revision)
+        geometry = self._geometry
+        if geometry is not None and (
+                fresh or self.page.doc.cache_annotation_attributes):
+            return geometry
+        info = self._info if fresh else None
+        self._info = None
+        if info is None:
+            info = self._annotation_information()
+        points = None
+        if self.type in ("STRAIGHTLINE", "MARKER", "POLYGON"):
+            points = self.points
+        geometry = self._geometry = AnnotationGeometry(
+                Point(info.nHorPos, info.nVerPos) / 100.0,
+                Point(info.nWidth, info.nHeight) / 100.0,
+                points=points)
+        self._read_revision = xdwapi._revision
+        return geometry
+
     @property
     def margin(self):
         return tuple([
-                XDW_GetAnnotationAttributeW(
-                        self.handle,
-                        cp("%{0}Margin".format(d))
-                )[1] / 100.0 for d in ("Top", "Right", "Bottom", "Left")
+                self._get_attribute(cp("%{0}Margin".format(d)))[1] / 100.0
+                for d in ("Top", "Right", "Bottom", "Left")
                 ])
 
     @margin.setter
@@ -191,33 +821,26 @@ class Annotation(Annotatable, Observer):
             value = value[:4]
         for i, d in enumerate("Top Right Bottom Left".split()):
             v = c_int(int(value[i] * 100))
+            attrname = cp("%{0}Margin".format(d))
             XDW_SetAnnotationAttributeW(
                     self.page.doc.handle, self.handle,
-                    cp("%{0}Margin".format(d)), XDW_ATYPE_INT, byref(v), 0, 0)
+                    attrname, XDW_ATYPE_INT, byref(v), 0, 0)
+            self._invalidate(attrname)
 
     @property
     def position(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
-        return Point(info.nHorPos, info.nVerPos) / 100.0
+        return self.geometry().position
 
     @position.setter
     def position(self, value):
         XDW_SetAnnotationPosition(
                 self.page.doc.handle, self.handle,
                 int(value.x * 100), int(value.y * 100))
+        self._invalidate()  # Points may be moved.
 
     @property
     def size(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
-        return Point(info.nWidth, info.nHeight) / 100.0
+        return self.geometry().size
 
     @size.setter
     def size(self, value):
@@ -228,30 +851,16 @@ class Annotation(Annotatable, Observer):
         XDW_SetAnnotationSize(
                 self.page.doc.handle, self.handle,
                 int(value.x * 100), int(value.y * 100))
+        self._invalidate()  # Text layout etc. may be changed.
 
     def __getattribute__(self, name):
         attrname = inner_attribute_name(name)
         if attrname not in XDW_ANNOTATION_ATTRIBUTE:
             return Annotatable.__getattribute__(self, name)
-        self_handle = Annotatable.__getattribute__(self, "handle")
         self_type = Annotatable.__getattribute__(self, "type")
-        self_is_unicode = Annotatable.__getattribute__(self, "is_unicode")
-        data_type, value, text_type = XDW_GetAnnotationAttributeW(
-                self_handle, attrname, codepage=CP)
-        if data_type == XDW_ATYPE_INT:
-            if self_type == "STICKEY" and attrname.endswith(b"Color"):
-                return XDW_COLOR_FUSEN[value]
-            elif self_type == "LINK" and attrname.endswith(b"XdwPage"):
-                return value - 1  # So, -1 for profile view.
-            return scale(attrname, value, store=False)
-        elif data_type == XDW_ATYPE_STRING:
-            self_is_unicode = (text_type == XDW_TEXT_UNICODE)
-            return value
-        else:  # data_type == XDW_ATYPE_OTHER:  # Quick hack for points.
-            points = [Point(
-                    scale(attrname, p.x),
-                    scale(attrname, p.y)) for p in value]
-            return absolute_points(points)
+        data_type, value, text_type = Annotatable.__getattribute__(
+                self, "_get_attribute")(attrname)
+        return attribute_value(self_type, attrname, data_type, value)
 
     def __setattr__(self, name, value):
         attrname = inner_attribute_name(name)
@@ -301,6 +910,7 @@ class Annotation(Annotatable, Observer):
             else:
                 raise TypeError(
                         "Invalid type to set attribute value: " + str(value))
+            self._invalidate(attrname)
         else:
             Annotatable.__setattr__(self, name, value)
 
@@ -335,6 +945,7 @@ class Annotation(Annotatable, Observer):
             raise TypeError("user attribute value must be bytes")
         XDW_SetAnnotationUserAttribute(
                 self.page.doc.handle, self.handle, cp(name), value)
+        self._values_changed()
 
     def has_property(self, name):
         """Test if annotationwise custom user defined property exists.
@@ -411,6 +1022,7 @@ class Annotation(Annotatable, Observer):
         XDW_SetAnnotationCustomAttribute(
                 self.page.doc.handle, self.handle, name, t, value)
         self._set_property_count()
+        self._values_changed()
 
     def del_property(self, name):
         """Delete annotationwise custom (i.e. with-type) user defined property.
@@ -420,25 +1032,19 @@ class Annotation(Annotatable, Observer):
         XDW_SetAnnotationCustomAttribute(
                 self.page.doc.handle, self.handle, name, XDW_ATYPE_INT, NULL)
         self._set_property_count()
+        self._values_changed()
+
+    def _values_changed(self):
+        """Update catalog after properties or user attributes are set."""
+        catalog = self._catalog()
+        if catalog is not None:
+            catalog.update(self)
 
     hasprop = has_property
     getprop = get_property
     setprop = set_property
     delprop = del_property
 
-    def update(self, event):
-        """Update self as an observer."""
-        if not isinstance(event, Notification):
-            raise TypeError("not an instance of Notification class")
-        if event.type == EV_ANN_REMOVED:
-            if event.para[0] < self.pos:
-                self.pos -= 1
-        elif event.type == EV_ANN_INSERTED:
-            if event.para[0] < self.pos:
-                self.pos += 1
-        else:
-            raise ValueError("Illegal event type: {0}".format(event.type))
-
     def attributes(self):
         """Returns dict of annotation attribute names and values."""
         tv = XDW_ANNOTATION_TYPE.normalize(self.type)
@@ -451,20 +1057,7 @@ class Annotation(Annotatable, Observer):
 
     def inside(self, rect):  # Assume rect is half-open.
         """Returns if annotation is placed inside rect."""
-        if isinstance(rect, (list, tuple)):
-            rect = Rect(*rect[:4])
-        if hasattr(self, "points"):
-            xs = [p.x for p in self.points]
-            ys = [p.y for p in self.points]
-            l, t = min(xs), min(ys)
-            r, b = max(xs), max(ys)
-        elif hasattr(self, "size"):
-            l, t = self.position
-            r, b = self.position + self.size
-        rect = Rect(*(x * 100 for x  in rect))
-        l, t, r, b = l * 100, t * 100, r * 100, b * 100
-        return (rect.left <= l and r < rect.right and
-                rect.top <= t and b < rect.bottom)
+        return inside(self.geometry().rect, rect)
 
     def _add(self, ann_type, position, init_dat):
         """Concrete method over _add() for add()."""
@@ -488,15 +1081,8 @@ class Annotation(Annotatable, Observer):
         Link annotation --> caption
         Stamp annotation --> [TopField] <DATE> [BottomField]
         """
-        if self.type == "TEXT":
-            return getattr(self, XDW_ATN_Text)
-        elif self.type == "LINK":
-            return getattr(self, XDW_ATN_Caption)
-        elif self.type == "STAMP":
-            return "{0} <DATE> {1}".format(
-                    getattr(self, XDW_ATN_TopField),
-                    getattr(self, XDW_ATN_BottomField))
-        return None
+        return content_text(self.type,
+                lambda attrname: getattr(self, uc(attrname)))
 
     def lock(self):
         """Make annotation unmovable and uneditable.
@@ -590,7 +1176,7 @@ class Annotation(Annotatable, Observer):
                 p0 = self.points[0].rotate(degree, origin=origin)
                 self.position = p0 - gap
                 return
-            points = [p.rotate(degree, origin=origin) for p in self.points]
+            points = self.points.rotate(degree, origin=origin)
             parent = self.parent or self.page
             action = {
                     XDW_AID_STRAIGHTLINE: parent.add_line,
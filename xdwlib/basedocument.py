@@ -23,7 +23,7 @@ from .xdwtemp import XDWTemp
 from .observer import *
 from .struct import Point
 from .xdwfile import xdwopen
-from .page import Page, PageCollection
+from .page import Page, PageCollection, PageTable, iter_page_text
 
 
 __all__ = ("BaseDocument",)
@@ -40,8 +40,24 @@ class BaseDocument(Subject):
     (page_number, Page_object) pairs, and is used to notify page insertion
     or deletion.  Receiving this notification, every Page object should adjust
     its memorized page number.
+
+    Set cache_annotation_attributes to True to let annotations remember
+    attributes once read.  Changes made through other means than the same
+    Annotation object, e.g. DocuWorks Viewer, will not be noticed then.
+
+    Set cache_pages (int) to keep only so many recently used Page objects,
+    and cache_annotations (int) to do so for Annotation objects of each
+    page.  Others are forgotten when not used elsewhere, and created again
+    on demand.  None (default) means to keep all.  Set on a class, they
+    apply to documents opened afterwards; set on a document, they apply
+    at once to the objects already created, too.  Only the number of
+    objects is limited; there is no limit by memory usage.
     """
 
+    cache_annotation_attributes = False
+    cache_pages = None
+    cache_annotations = None
+
     def _pos(self, pos, append=False):
         append = 1 if append else 0
         if not (-self.pages <= pos < self.pages + append):
@@ -61,7 +77,18 @@ class BaseDocument(Subject):
                 1 if pos.step is None else pos.step)
 
     def __init__(self):
-        Subject.__init__(self)
+        Subject.__init__(self, limit=self.cache_pages)
+
+    def __setattr__(self, name, value):
+        Subject.__setattr__(self, name, value)
+        if name == "cache_pages":
+            self.observers.limit = value
+        elif name == "cache_annotations":
+            subjects = self.observers.values()
+            while subjects:
+                subject = subjects.pop()
+                subject.observers.limit = value
+                subjects.extend(subject.observers.values())
 
     def __repr__(self):  # abstract
         raise NotImplementedError()
@@ -104,6 +131,15 @@ class BaseDocument(Subject):
         """Abstract method to update number of pages."""
         raise NotImplementedError()
 
+    def _catalog(self):
+        """Abstract method to get AnnotationCatalog to update, or None."""
+        raise NotImplementedError()
+
+    def _pages_inserted(self, pos, count):
+        catalog = self._catalog()
+        if catalog is not None:
+            catalog.insert_pages(self.absolute_page(pos, append=True), count)
+
     def page(self, pos):
         """Get a Page.
 
@@ -112,9 +148,21 @@ class BaseDocument(Subject):
         Returns a Page object.
         """
         pos = self._pos(pos)
-        if pos not in self.observers:
-            self.observers[pos] = Page(self, pos)
-        return self.observers[pos]
+        pg = self.observers.get(pos)
+        if pg is None:
+            pg = self.observers[pos] = Page(self, pos)
+        return pg
+
+    def page_table(self, color=True):
+        """Get PageTable of all pages without creating Page objects.
+
+        color       (bool) also read color information; one more call/page
+        """
+        if not self.pages:
+            return PageTable()
+        start = self.absolute_page(0)
+        return PageTable.read(self.handle, start, start + self.pages,
+                color=color)
 
     def append(self, obj):
         """Append a Page/PageCollection/Document at the end of document.
@@ -156,14 +204,15 @@ class BaseDocument(Subject):
                     self.handle,
                     self.absolute_page(pos, append=True) + 1,
                     temp if isinstance(temp, str) else temp.path)
-        inslen = XDW_GetDocumentInformation(self.handle).nPages - self.pages
-        self.pages += inslen
+        inslen = self.pages
+        self.update_pages()
+        inslen = self.pages - inslen
         if not isinstance(obj, str):
             temp.close()
-        # Check inserted pages in order to attach them to this document and
-        # shift observer entries appropriately.
-        for p in range(pos, pos + inslen):
-            Page(self, p)
+        # Shift observer entries appropriately.  Inserted pages are attached
+        # later on demand.
+        self.observers.insert(pos, inslen)
+        self._pages_inserted(pos, inslen)
 
     def append_image(self, *args, **kw):
         """Append a page created from image file(s).
@@ -235,10 +284,10 @@ class BaseDocument(Subject):
                     input_path,
                     opt)
         self.update_pages()
-        # Check inserted pages in order to attach them to this document and
-        # shift observer entries appropriately.
-        for p in range(pos, pos + (self.pages - prev_pages)):
-            Page(self, p)
+        # Shift observer entries appropriately.  Inserted pages are attached
+        # later on demand.
+        self.observers.insert(pos, self.pages - prev_pages)
+        self._pages_inserted(pos, self.pages - prev_pages)
 
     def export(self, pos, path=None):
         """Export page to another document.
@@ -403,9 +452,13 @@ class BaseDocument(Subject):
         """
         pos = self._pos(pos)
         pg = self.page(pos)
-        XDW_DeletePage(self.handle, self.absolute_page(pos) + 1)
+        abspos = self.absolute_page(pos)
+        XDW_DeletePage(self.handle, abspos + 1)
         self.detach(pg, EV_PAGE_REMOVED)
         self.pages -= 1
+        catalog = self._catalog()
+        if catalog is not None:
+            catalog.delete_pages(abspos)
 
     def _preprocess(self, pos, direct=False):
         pg = self.page(pos)
@@ -465,7 +518,8 @@ class BaseDocument(Subject):
             XDW_RotatePage(self.handle, abspos + 1, degree)
             return
         # Angle other than 90, 180 or 270 requires some imaging library.
-        if not PIL_ENABLED:
+        Image = pil_image()
+        if not Image:
             raise NotImplementedError("missing PIL (Python Imaging Library)")
         dpi = int(max(10, min(600, max(self.page(pos).resolution))))
         if strategy == 1:
@@ -533,23 +587,71 @@ class BaseDocument(Subject):
         return pc.view(light=light, wait=wait, flat=True,
                         page=page, fullscreen=fullscreen, zoom=zoom)
 
+    def _bulk_content_text(self):
+        """Get list of content text of all pages at once, or None."""
+        return None
+
+    def _cached_text(self):
+        """Abstract method to get TextRecord from the text cache, or None."""
+        raise NotImplementedError()
+
+    def _cached_range(self):
+        start = self.absolute_page(0, append=True)  # even if no pages
+        return (start, start + self.pages)
+
     def content_text(self, type=None):
         """Get all content text.
 
         type    None | 'IMAGE' | 'APPLICATION'
                 None means both.
         """
-        return joinf(PSEP, [pg.content_text(type=type) for pg in self])
+        record = self._cached_text()
+        if record is not None:
+            return record.content_text(type, *self._cached_range())
+        texts = None if type else self._bulk_content_text()
+        if texts is None:
+            texts = [pg.content_text(type=type) for pg in self]
+        return joinf(PSEP, texts)
 
     def annotation_text(self):
         """Get all text in annotations."""
+        record = self._cached_text()
+        if record is not None:
+            return record.annotation_text(*self._cached_range())
         return joinf(PSEP, [pg.annotation_text() for pg in self])
 
     def fulltext(self):
         """Get all content and annotation text."""
+        record = self._cached_text()
+        if record is not None:
+            return record.fulltext(*self._cached_range())
+        texts = self._bulk_content_text()
+        if texts is None:
+            return joinf(PSEP, [
+                    joinf(ASEP, [pg.content_text(), pg.annotation_text()])
+                    for pg in self])
         return joinf(PSEP, [
-                joinf(ASEP, [pg.content_text(), pg.annotation_text()])
-                for pg in self])
+                joinf(ASEP, [text, pg.annotation_text()])
+                for (text, pg) in zip(texts, self)])
+
+    def iter_text(self, kind=None, type=None):
+        """Generate text page by page as it is extracted.
+
+        kind    None | 'CONTENT' | 'ANNOTATION'
+                None means both.
+        type    None | 'IMAGE' | 'APPLICATION' for content text
+                None means both.
+
+        Yields (absolute_page, content_text, annotation_text) for each
+        page, where text not extracted is None.  Unlike content_text()
+        etc., Page objects are not made, so memory use does not grow
+        with the number of pages.
+        """
+        if not self.pages:
+            return iter(())
+        start = self.absolute_page(0)
+        return iter_page_text(self.handle, start, start + self.pages,
+                kind=kind, type=type)
 
     def find_content_text(self, pattern, type=None):
         """Find given pattern (text or regex) in all content text.
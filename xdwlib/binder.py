@@ -13,12 +13,15 @@ WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
 """
 
+from bisect import bisect_right
+from itertools import accumulate
+
 from .xdwapi import *
 from .common import *
 from .observer import *
 from .xdwfile import XDWFile
 from .documentinbinder import DocumentInBinder
-from .page import Page, PageCollection
+from .page import Page, PageCollection, PageTable, iter_page_text
 
 
 __all__ = ("Binder", "create_binder")
@@ -42,7 +45,15 @@ def create_binder(path, color="RED", size="FREE", coding=CODEPAGE):
 
 class Binder(Subject, XDWFile):
 
-    """DocuWorks Binder."""
+    """DocuWorks Binder.
+
+    cache_pages and cache_annotations, unless None, are given to the
+    documents in the binder, both already created and to come; see
+    BaseDocument.
+    """
+
+    cache_pages = None
+    cache_annotations = None
 
     def _pos(self, pos, append=False):
         append = 1 if append else 0
@@ -76,6 +87,45 @@ class Binder(Subject, XDWFile):
     def __init__(self, path):
         Subject.__init__(self)
         XDWFile.__init__(self, path)
+        self._reset_page_index()
+
+    def __setattr__(self, name, value):
+        Subject.__setattr__(self, name, value)
+        if name in ("cache_pages", "cache_annotations") and value is not None:
+            for doc in self.observers.values():
+                setattr(doc, name, value)
+
+    def open(self, *args, **kw):
+        """Opener; see XDWFile.open()."""
+        self._reset_page_index()
+        return XDWFile.open(self, *args, **kw)
+
+    def _reset_page_index(self):
+        self._document_page_counts = None  # pages of each document
+        self._page_offsets = None  # prefix sums of the above
+
+    def _page_counts(self):
+        """Get the cached list of page count for each document."""
+        if self._document_page_counts is None:
+            self._document_page_counts = [
+                    XDW_GetDocumentInformationInBinder(
+                            self.handle, pos + 1).nPages
+                    for pos in range(self.documents)]
+            self._page_offsets = None
+        return self._document_page_counts
+
+    def _set_page_count(self, pos, pages):
+        """Update page count of document pos, e.g. after page insertion."""
+        counts = self._page_counts()
+        self.pages += pages - counts[pos]
+        counts[pos] = pages
+        self._page_offsets = None
+
+    def page_offset(self, pos):
+        """Get absolute page number of the first page of document pos."""
+        if self._page_offsets is None:
+            self._page_offsets = [0] + list(accumulate(self._page_counts()))
+        return self._page_offsets[pos]
 
     def __repr__(self):
         return "{cls}({name}{sts})".format(
@@ -125,28 +175,33 @@ class Binder(Subject, XDWFile):
     def document(self, pos):
         """Get a DocumentInBinder."""
         pos = self._pos(pos)
-        return DocumentInBinder(self, pos)
+        if pos not in self.observers:
+            self.observers[pos] = DocumentInBinder(self, pos)
+        return self.observers[pos]
 
     def page(self, pos):
         """Get a Page for absolute page number."""
         pos = self._pagepos(pos)
         return self.document_and_page(pos)[1]
 
+    def page_table(self, color=True):
+        """Get PageTable of all pages without creating Page objects.
+
+        color       (bool) also read color information; one more call/page
+        """
+        return PageTable.read(self.handle, 0, self.pages, color=color)
+
     def document_pages(self):
         """Get the list of page count for each document. """
-        return [XDW_GetDocumentInformationInBinder(self.handle, pos + 1).nPages
-                for pos in range(self.documents)]
+        return list(self._page_counts())
 
     def document_and_page(self, pos):
         """Get (DocumentInBinder, Page) for absolute page number."""
         pos = self._pagepos(pos)
-        acc = 0
-        for docpos, pages in enumerate(self.document_pages()):
-            acc += pages
-            if pos < acc:
-                doc = self.document(docpos)
-                page = doc.page(pos - (acc - pages))
-                return (doc, page)
+        self.page_offset(0)  # Build the index if necessary.
+        docpos = bisect_right(self._page_offsets, pos) - 1
+        doc = self.document(docpos)
+        return (doc, doc.page(pos - self._page_offsets[docpos]))
 
     def append(self, path):
         """Append a document by path at the end of binder."""
@@ -160,14 +215,27 @@ class Binder(Subject, XDWFile):
         else:
             XDW_InsertDocumentToBinderW(self.handle, pos + 1, path)
         self.documents += 1
-        doc = self.document(pos)
-        self.attach(doc, EV_DOC_INSERTED)
+        pages = XDW_GetDocumentInformationInBinder(
+                self.handle, pos + 1).nPages
+        if self._document_page_counts is not None:
+            self._document_page_counts.insert(pos, pages)
+            self._page_offsets = None
+        self.pages += pages
+        self.attach(DocumentInBinder(self, pos), EV_DOC_INSERTED)
+        if self._annotation_catalog is not None:
+            self._annotation_catalog.insert_pages(self.page_offset(pos), pages)
 
     def delete(self, pos):
         """Delete a document."""
         pos = self._pos(pos)
         doc = self.document(pos)
+        counts = self._page_counts()
+        if self._annotation_catalog is not None:
+            self._annotation_catalog.delete_pages(
+                    self.page_offset(pos), counts[pos])
         XDW_DeleteDocumentInBinder(self.handle, doc.pos + 1)
+        self.pages -= counts.pop(pos)
+        self._page_offsets = None
         self.detach(doc, EV_DOC_REMOVED)
         self.documents -= 1
 
@@ -212,15 +280,42 @@ class Binder(Subject, XDWFile):
         type    None | 'IMAGE' | 'APPLICATION'
                 None means both.
         """
-        return joinf(PSEP, [doc.content_text(type=type) for doc in self])
+        record = self._cached_text()
+        if record is not None:
+            return record.content_text(type)
+        texts = None if type else self._bulk_content_text()
+        if texts is None:
+            texts = [doc.content_text(type=type) for doc in self]
+        return joinf(PSEP, texts)
 
     def annotation_text(self):
         """Get all text in annotations."""
+        record = self._cached_text()
+        if record is not None:
+            return record.annotation_text()
         return joinf(PSEP, [doc.annotation_text() for doc in self])
 
     def fulltext(self):
         """Get all content text and annotation text."""
-        return joinf(PSEP, [doc.fulltext() for doc in self])
+        record = self._cached_text()
+        if record is not None:
+            return record.fulltext()
+        texts = self._bulk_content_text()
+        if texts is None:
+            return joinf(PSEP, [doc.fulltext() for doc in self])
+        pages = (pg for doc in self for pg in doc)
+        return joinf(PSEP, [
+                joinf(ASEP, [text, pg.annotation_text()])
+                for (text, pg) in zip(texts, pages)])
+
+    def iter_text(self, kind=None, type=None):
+        """Generate text page by page as it is extracted.
+
+        See BaseDocument.iter_text() for arguments.  Page numbers are
+        absolute in binder.
+        """
+        return iter_page_text(self.handle, 0, self.pages,
+                kind=kind, type=type)
 
     def find_fulltext(self, pattern):
         """Find given pattern (text or regex) throughout binder.
@@ -26,7 +26,7 @@ from .timezone import *
 
 
 __all__ = (
-        "PIL_ENABLED",
+        "PIL_ENABLED", "pil_image",
         "CP", "CODEPAGE", "DEFAULT_TZ",
         "EV_DOC_REMOVED", "EV_DOC_INSERTED",
         "EV_PAGE_REMOVED", "EV_PAGE_INSERTED",
@@ -35,21 +35,65 @@ __all__ = (
         "mm2in", "in2mm", "mm2px", "px2mm",
         "environ", "get_viewer",
         "inner_attribute_name", "outer_attribute_name",
-        "adjust_path", "cp", "uc", "derivative_path",
+        "adjust_path", "cp", "uc", "derivative_path", "file_stamp",
         "joinf", "flagvalue", "typevalue", "makevalue", "scale", "unpack",
         )
 
 
-PIL_ENABLED = True
-try:
-    import Image
-except ImportError:
-    try:
-        from PIL import Image
-    except ImportError:
-        PIL_ENABLED = False
-if PIL_ENABLED:
-    __all__ += ("Image",)
+_PIL_IMAGE = False  # not yet probed
+
+
+def pil_image():
+    """Import Image module of PIL on demand.
+
+    Returns Image module, or None if PIL (or Pillow) is not installed.
+    """
+    global _PIL_IMAGE
+    if _PIL_IMAGE is False:
+        try:
+            import Image
+        except ImportError:
+            try:
+                from PIL import Image
+            except ImportError:
+                Image = None
+        _PIL_IMAGE = Image
+    return _PIL_IMAGE
+
+
+class _PILEnabled(object):
+
+    """True if PIL is available; PIL is imported on the first test."""
+
+    def __bool__(self):
+        return pil_image() is not None
+
+    def __eq__(self, other):
+        return bool(self) == other
+
+    def __hash__(self):
+        return hash(bool(self))
+
+    def __repr__(self):
+        return repr(bool(self))
+
+
+class _LazyImage(object):
+
+    """Image module of PIL, imported on the first attribute access."""
+
+    def __bool__(self):
+        return pil_image() is not None
+
+    def __getattr__(self, name):
+        image = pil_image()
+        if image is None:
+            raise AttributeError("PIL (or Pillow) is not installed")
+        return getattr(image, name)
+
+
+PIL_ENABLED = _PILEnabled()
+Image = _LazyImage()
 
 
 PSEP = "\f"  # page separator
@@ -252,6 +296,23 @@ def derivative_path(path):
     return derivative
 
 
+def file_stamp(path, block=4096):
+    """Get (size, mtime, digest) to identify file contents cheaply.
+
+    mtime is in nanoseconds, and digest is a SHA-1 hex digest of leading
+    and trailing block bytes.
+    """
+    import hashlib
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(block))
+        if block < st.st_size:
+            f.seek(max(block, st.st_size - block))
+            h.update(f.read(block))
+    return (st.st_size, st.st_mtime_ns, h.hexdigest())
+
+
 def flagvalue(table, value, store=True):
     """Sum up flag values according to XDWConst table."""
     if store and isinstance(value, (int, float)):
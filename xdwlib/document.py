@@ -219,6 +219,18 @@ class Document(BaseDocument, XDWFile):
         """Concrete method over update_pages()."""
         XDWFile.update_pages(self)
 
+    def _bulk_content_text(self):
+        """Concrete method over _bulk_content_text()."""
+        return XDWFile._bulk_content_text(self)
+
+    def _cached_text(self):
+        """Concrete method over _cached_text()."""
+        return XDWFile._cached_text(self)
+
+    def _catalog(self):
+        """Concrete method over _catalog()."""
+        return self._annotation_catalog
+
     def dirname(self):
         """Concrete method over dirname()."""
         return self.dir
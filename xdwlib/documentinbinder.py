@@ -31,12 +31,26 @@ class DocumentInBinder(BaseDocument, Observer):
         self.pos = pos
         Observer.__init__(self, bdoc, EV_DOC_INSERTED)
         self.binder = bdoc
-        self._set_page_offset()  # self.page_offset
+        for name in ("cache_pages", "cache_annotations"):
+            value = getattr(bdoc, name)
+            if value is not None:
+                setattr(self, name, value)
         docinfo = XDW_GetDocumentInformationInBinder(
                 self.binder.handle, pos + 1)
-        self.pages = docinfo.nPages
         self.original_data = docinfo.nOriginalData  # TODO
 
+    @property
+    def pages(self):
+        return self.binder._page_counts()[self.pos]
+
+    @pages.setter
+    def pages(self, value):
+        self.binder._set_page_count(self.pos, value)
+
+    @property
+    def page_offset(self):
+        return self.binder.page_offset(self.pos)
+
     @property
     def handle(self):
         return self.binder.handle
@@ -55,9 +69,17 @@ class DocumentInBinder(BaseDocument, Observer):
     def update_pages(self):
         """Concrete method over update_pages()."""
         docinfo = XDW_GetDocumentInformationInBinder(
-                self.binder.handle, pos + 1)
+                self.binder.handle, self.pos + 1)
         self.pages = docinfo.nPages
 
+    def _catalog(self):
+        """Concrete method over _catalog()."""
+        return self.binder._annotation_catalog
+
+    def _cached_text(self):
+        """Concrete method over _cached_text()."""
+        return self.binder._cached_text()
+
     def __repr__(self):
         return "{cls}({name} ({bdoc}[{pos}]){status})".format(
                 cls=self.__class__.__name__,
@@ -77,24 +99,6 @@ class DocumentInBinder(BaseDocument, Observer):
                 atts=self.original_data,
                 status="" if self.binder.handle else "; CLOSED")
 
-    def update(self, event):
-        if not isinstance(event, Notification):
-            raise TypeError("not an instance of Notification class")
-        if event.type == EV_DOC_REMOVED:
-            if event.para[0] < self.pos:
-                self.pos -= 1
-                self._set_page_offset()
-        elif event.type == EV_DOC_INSERTED:
-            if event.para[0] < self.pos:
-                self.pos += 1
-                self._set_page_offset()
-        else:
-            raise ValueError("illegal event type: {0}".format(event.type))
-
-    def _set_page_offset(self):
-        """Private method to renew the page offset for DocumentInBinder."""
-        self.page_offset = sum(self.binder.document_pages()[:self.pos])
-
     def absolute_page(self, pos, append=False):
         """Concrete method over absolute_page()."""
         pos = self._pos(pos, append=append)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""index.py -- inverted full-text index over DocuWorks files
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+
+from .xdwapi import *
+from .common import *
+from .page import PageCollection
+from .xdwfile import xdwopen
+
+
+__all__ = ("CorpusIndex", "IndexResult", "normalize_text", "ngrams")
+
+INDEX_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id          INTEGER PRIMARY KEY,
+    path        TEXT UNIQUE NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       INTEGER NOT NULL,
+    digest      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id          INTEGER PRIMARY KEY,
+    file        INTEGER NOT NULL,
+    document    INTEGER,
+    page        INTEGER NOT NULL,
+    text        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_file ON pages (file);
+CREATE TABLE IF NOT EXISTS postings (
+    gram        TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    PRIMARY KEY (gram, page)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_page ON postings (page);
+"""
+
+EXTENSIONS = (".xdw", ".xbd")
+MAX_GRAMS = 64  # n-grams of a term to look up; the rest are verified
+
+
+def normalize_text(text):
+    """Normalize text for indexing and query, i.e. NFKC and lower case."""
+    import unicodedata
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def ngrams(text, n=2):
+    """Get set of n-grams in normalized text, except those with spaces.
+
+    Character n-grams need no word segmentation, which suits Japanese
+    text.  Page and annotation separators are regarded as spaces.
+    """
+    grams = set()
+    for word in text.split():
+        for pos in range(len(word) - n + 1):
+            grams.add(word[pos:pos + n])
+    return grams
+
+
+class IndexResult(list):
+
+    """List of hits, each of which is (path, document, page).
+
+    document is the position of document in binder, or None for XDW.
+    page is the position of page in the document, both starting with 0.
+    """
+
+    def paths(self):
+        """Get list of files hit, in order."""
+        return sorted(set(path for (path, _, _) in self))
+
+    def pages(self, authenticate=True):
+        """Open files read-only and get hits as PageCollection.
+
+        Documents and binders are left open; close them, e.g.
+        pg.doc.close() or pg.doc.binder.close(), when no longer used.
+        """
+        docs = dict()
+        pc = PageCollection()
+        for (path, document, page) in self:
+            doc = docs.get(path)
+            if doc is None:
+                doc = docs[path] = xdwopen(
+                        path, readonly=True, authenticate=authenticate)
+            if document is not None:
+                pc.append(doc.document(document).page(page))
+            else:
+                pc.append(doc.page(page))
+        return pc
+
+
+class CorpusIndex(object):
+
+    """Inverted n-gram index of text in DocuWorks files, kept in SQLite.
+
+    path    (str) index database file
+    n       (int) length of n-grams; 2 (bigram) is good for Japanese
+
+    Content text and annotation text of each page are indexed, where
+    pages in binders are distinguished by document.  update() indexes
+    only files added or changed since the last update, identified by
+    size, modification time and a digest like TextCache.
+
+    Queries are normalized by NFKC and case-folded like indexed text.
+    Pages having all n-grams of a term are looked up in the index and
+    then checked against the stored text, so hits are exact.
+    """
+
+    def __init__(self, path, n=2):
+        import sqlite3
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(_SCHEMA)
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        if not meta:
+            with self.db:
+                self.db.executemany("INSERT INTO meta VALUES (?, ?)", (
+                        ("version", str(INDEX_VERSION)), ("n", str(n))))
+        elif int(meta["version"]) != INDEX_VERSION:
+            raise ValueError("unsupported index version {0}".format(
+                    meta["version"]))
+        elif int(meta["n"]) != n:
+            raise ValueError("index is built with n={0}".format(meta["n"]))
+        self.n = n
+
+    def __repr__(self):
+        return "{cls}({path}; {n} files)".format(
+                cls=self.__class__.__name__, path=self.path, n=len(self))
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def __contains__(self, path):
+        return self._file(path) is not None
+
+    def close(self):
+        """Close the index database."""
+        self.db.close()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _file(self, path):
+        return self.db.execute("SELECT id, size, mtime, digest FROM files "
+                "WHERE path = ?", (self._key(path),)).fetchone()
+
+    def add(self, path, authenticate=False):
+        """Index a file, replacing old entries if any."""
+        size, mtime, digest = file_stamp(path)
+        with xdwopen(path, readonly=True, authenticate=authenticate) as doc:
+            if doc.type == "BINDER":
+                places = [(d, p) for (d, pages)
+                        in enumerate(doc.document_pages())
+                        for p in range(pages)]
+            else:
+                places = [(None, p) for p in range(doc.pages)]
+            record = doc._cached_text()
+            if record is not None:
+                texts = zip(record.contents, record.annotations)
+            else:
+                texts = ((c, a) for (_, c, a) in doc.iter_text())
+            with self.db:
+                self._remove(path)
+                file_id = self.db.execute("INSERT INTO files "
+                        "(path, size, mtime, digest) VALUES (?, ?, ?, ?)",
+                        (self._key(path), size, mtime, digest)).lastrowid
+                for ((document, page), (content, annotation)) in zip(
+                        places, texts):
+                    text = normalize_text(
+                            joinf(ASEP, [content, annotation]))
+                    page_id = self.db.execute("INSERT INTO pages "
+                            "(file, document, page, text) "
+                            "VALUES (?, ?, ?, ?)",
+                            (file_id, document, page, text)).lastrowid
+                    self.db.executemany(
+                            "INSERT INTO postings VALUES (?, ?)",
+                            ((gram, page_id) for gram
+                            in ngrams(text, self.n)))
+
+    def remove(self, path):
+        """Remove a file from the index."""
+        with self.db:
+            self._remove(path)
+
+    def _remove(self, path):
+        row = self._file(path)
+        if row is None:
+            return
+        file_id = row[0]
+        self.db.execute("DELETE FROM postings WHERE page IN "
+                "(SELECT id FROM pages WHERE file = ?)", (file_id,))
+        self.db.execute("DELETE FROM pages WHERE file = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def update(self, top, authenticate=False):
+        """Index XDW/XBD files in directory tree, incrementally.
+
+        top     (str) top directory
+        authenticate    (bool) whether to authenticate protected files
+
+        Files removed from the tree are removed from the index, too.
+        Files which cannot be opened, e.g. protected ones, are skipped.
+
+        Returns (updated, removed), the lists of paths.
+        """
+        updated = []
+        seen = set()
+        for (dirpath, _, filenames) in os.walk(top):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in EXTENSIONS:
+                    continue
+                path = os.path.join(dirpath, filename)
+                seen.add(self._key(path))
+                row = self._file(path)
+                if row is not None and tuple(row[1:]) == file_stamp(path):
+                    continue
+                try:
+                    self.add(path, authenticate=authenticate)
+                except XDWError:
+                    self.remove(path)
+                    continue
+                updated.append(path)
+        prefix = os.path.join(self._key(top), "")
+        removed = [path for (path,) in self.db.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)) if path not in seen]
+        for path in removed:
+            self.remove(path)
+        return (updated, removed)
+
+    def _term_pages(self, term):
+        """Get set of page id's whose text contains term."""
+        grams = sorted(ngrams(term, self.n))[:MAX_GRAMS]
+        if not grams:  # Too short; scan texts.
+            return set(page_id for (page_id,) in self.db.execute(
+                    "SELECT id FROM pages WHERE instr(text, ?)", (term,)))
+        query = ("SELECT id FROM pages WHERE id IN ("
+                "SELECT page FROM postings WHERE gram IN ({0}) "
+                "GROUP BY page HAVING COUNT(*) = ?) "
+                "AND instr(text, ?)").format(", ".join("?" * len(grams)))
+        return set(page_id for (page_id,) in self.db.execute(
+                query, grams + [len(grams), term]))
+
+    def search(self, query):
+        """Find pages which contain all terms in query.
+
+        query   (str) terms separated by spaces
+
+        Returns IndexResult.
+        """
+        terms = normalize_text(query).split()
+        if not terms:
+            return IndexResult()
+        pages = None
+        for term in sorted(terms, key=len, reverse=True):
+            found = self._term_pages(term)
+            pages = found if pages is None else (pages & found)
+            if not pages:
+                return IndexResult()
+        pages = sorted(pages)
+        hits = []
+        for chunk in range(0, len(pages), 500):
+            ids = pages[chunk:chunk + 500]
+            hits.extend(self.db.execute(
+                    "SELECT files.path, pages.document, pages.page "
+                    "FROM pages JOIN files ON pages.file = files.id "
+                    "WHERE pages.id IN ({0})".format(
+                    ", ".join("?" * len(ids))), ids))
+        hits.sort(key=lambda hit: (hit[0], hit[1] or 0, hit[2]))
+        return IndexResult(tuple(hit) for hit in hits)
@@ -13,43 +13,362 @@ WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
 """
 
-__all__ = ("Subject", "Observer", "Notification")
+import random
+import weakref
+from collections import OrderedDict
 
 
-class Subject(object):
+__all__ = ("Subject", "Observer", "Notification", "ObserverMap")
+
+
+class _Node(object):
+
+    """Node of treap in ObserverMap."""
+
+    __slots__ = ("observer", "gap", "span", "priority",
+            "left", "right", "parent")
+
+    def __init__(self, observer, gap):
+        self.observer = observer
+        self.gap = gap  # number of positions without observer just before
+        self.span = gap + 1  # number of positions covered by subtree
+        self.priority = random.random()
+        self.left = self.right = self.parent = None
+
+    def position(self):
+        pos = _span(self.left) + self.gap
+        node = self
+        while node.parent is not None:
+            if node is node.parent.right:
+                pos += node.parent.span - node.span
+            node = node.parent
+        return pos
+
+
+def _span(node):
+    return 0 if node is None else node.span
+
+
+def _fix(node):
+    node.span = _span(node.left) + node.gap + 1 + _span(node.right)
+    if node.left is not None:
+        node.left.parent = node
+    if node.right is not None:
+        node.right.parent = node
+
+
+def _split(node, pos):
+    """Split subtree into nodes before pos and the others."""
+    if node is None:
+        return (None, None)
+    here = _span(node.left) + node.gap
+    if here < pos:
+        left, right = _split(node.right, pos - here - 1)
+        node.right = left
+        _fix(node)
+        return (node, right)
+    left, right = _split(node.left, pos)
+    node.left = right
+    _fix(node)
+    return (left, node)
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if right.priority < left.priority:
+        left.right = _merge(left.right, right)
+        _fix(left)
+        return left
+    right.left = _merge(left, right.left)
+    _fix(right)
+    return right
+
+
+def _grow(node, delta):
+    """Widen the gap just before the leftmost node in subtree by delta."""
+    while node.left is not None:
+        node = node.left
+    node.gap += delta
+    while node is not None:
+        node.span += delta
+        node = node.parent
+
+
+def _walk(node, offset=0):
+    """Generate (position, node) in order."""
+    stack = []
+    while stack or node is not None:
+        if node is not None:
+            stack.append((node, offset))
+            node = node.left
+            continue
+        node, offset = stack.pop()
+        offset += _span(node.left) + node.gap
+        yield (offset, node)
+        offset += 1
+        node = node.right
+
+
+class ObserverMap(object):
+
+    """Mapping of position to observer, like dict.
+
+    Positions are held as gaps between observers in a treap, so that
+    insert() and delete() shift all the positions after in O(log n).
+    Observers in this map get their pos from it.
+
+    limit       (int) number of recently used observers to keep alive;
+                the others are held with weak references and forgotten
+                when no longer used elsewhere.  None means to keep all.
+                The limit is a count of observers; their memory usage is
+                not measured.  It may be changed at any time.
+    """
+
+    def __init__(self, limit=None):
+        self.root = None
+        self.count = 0  # number of nodes, including dead ones
+        self.dead = 0  # number of nodes whose observer has gone
+        self._limit = limit
+        self.recent = None if limit is None else OrderedDict()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @limit.setter
+    def limit(self, value):
+        if value == self._limit:
+            return
+        if self._limit is not None and value is not None:
+            self._limit = value
+            while value < len(self.recent):
+                self.recent.popitem(last=False)
+            return
+        if self.dead:
+            self._purge()
+        # Keep observers alive while their references are replaced.
+        observers = [(node, self._observer(node))
+                for (_, node) in _walk(self.root)]
+        self._limit = value
+        self.recent = None if value is None else OrderedDict()
+        for (node, observer) in observers:
+            node.observer = self._ref(observer)
+            self._touch(node, observer)
+
+    def _find(self, pos):
+        node = self.root
+        while node is not None:
+            left = _span(node.left)
+            if pos < left:
+                node = node.left
+                continue
+            pos -= left
+            if pos <= node.gap:
+                return node if pos == node.gap else None
+            pos -= node.gap + 1
+            node = node.right
+        return None
 
-    def __init__(self):
-        self.observers = dict()
+    def _split(self, node, pos):
+        left, right = _split(node, pos)
+        for node in (left, right):
+            if node is not None:
+                node.parent = None
+        return (left, right)
 
-    def shift_keys(self, border, delete=False, count=1):
-        for pos in sorted([p for p in self.observers.keys() if border < p],
-                reverse=(not delete)):
-            gap = -count if delete else count
-            self.observers[pos + gap] = self.observers[pos]
-            del self.observers[pos]
+    def _join(self, *nodes):
+        root = None
+        for node in nodes:
+            root = _merge(root, node)
+        if root is not None:
+            root.parent = None
+        self.root = root
+
+    def _died(self, ref):
+        self.dead += 1
+
+    def _ref(self, observer):
+        if self.limit is None:
+            return observer
+        return weakref.ref(observer, self._died)
+
+    def _observer(self, node):
+        if self.limit is None:
+            return node.observer
+        return node.observer()
+
+    def _touch(self, node, observer):
+        """Keep observer alive as one of the recently used."""
+        recent = self.recent
+        if recent is None:
+            return
+        if node in recent:
+            recent.move_to_end(node)
+            return
+        recent[node] = observer
+        while self.limit < len(recent):
+            recent.popitem(last=False)
+
+    def _lookup(self, pos):
+        node = self._find(pos)
+        if node is None:
+            return None
+        observer = self._observer(node)
+        if observer is not None:
+            self._touch(node, observer)
+        return observer
+
+    def _purge(self):
+        """Forget nodes whose observer has gone."""
+        for (pos, node) in list(_walk(self.root)):
+            if self._observer(node) is None:
+                self.delete(pos)
+                self.insert(pos)
+
+    def __len__(self):
+        return self.count - self.dead
+
+    def __contains__(self, pos):
+        return self._lookup(pos) is not None
+
+    def __getitem__(self, pos):
+        observer = self._lookup(pos)
+        if observer is None:
+            raise KeyError(pos)
+        return observer
+
+    def __setitem__(self, pos, observer):
+        node = self._find(pos)
+        if node is not None:
+            old = self._observer(node)
+            if old is None:
+                self.dead -= 1
+            else:
+                _release(old, pos)
+                if self.recent is not None:
+                    self.recent.pop(node, None)
+            node.observer = self._ref(observer)
+            observer._node = node
+            self._touch(node, observer)
+            return
+        if pos < 0:
+            raise KeyError(pos)
+        left, right = self._split(self.root, pos)
+        node = _Node(self._ref(observer), pos - _span(left))
+        if right is not None:
+            _grow(right, -node.span)
+        observer._node = node
+        self.count += 1
+        self._join(left, node, right)
+        self._touch(node, observer)
+        if 64 < self.dead and self.count < self.dead * 2:
+            self._purge()
+
+    def __delitem__(self, pos):
+        """Forget observer at pos without shifting the others."""
+        if pos not in self:
+            raise KeyError(pos)
+        self.delete(pos)
+        self.insert(pos)
+
+    def __iter__(self):
+        for (pos, _) in self.items():
+            yield pos
+
+    def get(self, pos, default=None):
+        observer = self._lookup(pos)
+        return default if observer is None else observer
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [observer for (_, observer) in self.items()]
+
+    def items(self):
+        result = []
+        for (pos, node) in _walk(self.root):
+            observer = self._observer(node)
+            if observer is not None:
+                result.append((pos, observer))
+        return result
+
+    def insert(self, pos, count=1):
+        """Move observers at and after pos backward by count."""
+        left, right = self._split(self.root, pos)
+        if right is not None:
+            _grow(right, count)
+        self._join(left, right)
+
+    def delete(self, pos, count=1):
+        """Forget observers in [pos, pos + count) and move the after."""
+        left, right = self._split(self.root, pos)
+        offset = _span(left)
+        middle, right = self._split(right, pos + count - offset)
+        if right is not None:
+            _grow(right, _span(middle) - count)
+        for (p, node) in _walk(middle, offset):
+            observer = self._observer(node)
+            if observer is None:
+                self.dead -= 1
+            else:
+                _release(observer, p)
+                if self.recent is not None:
+                    self.recent.pop(node, None)
+            node.observer = None  # Drop weak reference not to call _died().
+            self.count -= 1
+        self._join(left, right)
+
+
+def _release(observer, pos):
+    observer._node = None
+    observer._position = pos
+
+
+class Subject(object):
+
+    def __init__(self, limit=None):
+        self.observers = ObserverMap(limit=limit)
 
     def attach(self, observer, event):
-        self.shift_keys(observer.pos)
+        # Observers at and after the new one are moved backward.
+        self.observers.insert(observer.pos)
         self.observers[observer.pos] = observer
-        self.notify(event=Notification(event, observer.pos))
 
     def detach(self, observer, event=None):
-        del self.observers[observer.pos]
-        self.shift_keys(observer.pos, delete=True)
-        self.notify(event=Notification(event, observer.pos))
+        self.observers.delete(observer.pos)
 
     def notify(self, event=None):
-        for pos in self.observers:
-            self.observers[pos].update(event)
+        for observer in self.observers.values():
+            observer.update(event)
 
 
 class Observer(object):
 
+    """Observer whose position is kept by Subject.observers."""
+
+    _node = None  # set by ObserverMap
+    _position = None  # used unless in ObserverMap
+
     def __init__(self, subject, event):
         pass
 
+    @property
+    def pos(self):
+        node = self._node
+        return self._position if node is None else node.position()
+
+    @pos.setter
+    def pos(self, value):
+        if self._node is not None:
+            raise AttributeError("position is managed by subject")
+        self._position = value
+
     def update(self, event):
-        raise NotImplementedError  # abstract
+        pass  # Positions are kept by ObserverMap.
 
 
 class Notification(object):
@@ -15,19 +15,22 @@ FOR A PARTICULAR PURPOSE.
 
 import os
 import re
+import mmap
+import codecs
 import subprocess
 import itertools
+from array import array
 from os.path import abspath, split as splitpath, join as joinpath
 
 from .xdwapi import *
 from .common import *
 from .xdwtemp import XDWTemp
 from .observer import *
-from .struct import Point, Rect
+from .struct import Point, Rect, SpatialIndex
 from .annotatable import Annotatable
 
 
-__all__ = ("Page", "PageCollection")
+__all__ = ("Page", "PageCollection", "PageInformation", "PageTable")
 
 U0000 = chr(0)
 XDWRES = 100.0  # XDWAPI resolution is 1/100 mm.
@@ -216,9 +219,227 @@ class PageCollection(list):
         return path
 
 
+class PageTable(object):
+
+    """Page information of many pages in columns, without Page objects.
+
+    Each column is an array.array of the same length, e.g. table["width"].
+    Types and compressions are kept as XDWAPI constants; see row() for
+    decoded values.
+
+    width, height           (d) size in mm
+    type                    (i) XDW_PGT_*
+    horizontal_resolution   (i) dpi
+    vertical_resolution     (i) dpi
+    compress_type           (i) XDW_COMPRESS_*
+    annotations             (i) number of annotations
+    degree                  (i) rotation
+    is_color                (b) 1 if colored; -1 if color info is skipped
+    bpp                     (i) bits per pixel; -1 if color info is skipped
+    """
+
+    COLUMNS = (
+            ("width", "d"), ("height", "d"), ("type", "i"),
+            ("horizontal_resolution", "i"), ("vertical_resolution", "i"),
+            ("compress_type", "i"), ("annotations", "i"), ("degree", "i"),
+            ("is_color", "b"), ("bpp", "i"),
+            )
+
+    def __init__(self):
+        self.columns = dict((name, array(code)) for (name, code)
+                in PageTable.COLUMNS)
+
+    @staticmethod
+    def read(handle, start, stop, color=True):
+        """Read page information of absolute pages [start, stop).
+
+        handle      document or binder handle
+        color       (bool) also call XDW_GetPageColorInformation
+        """
+        table = PageTable()
+        cols = [table.columns[name] for (name, _) in PageTable.COLUMNS]
+        (width, height, type_, hres, vres,
+                compress, anns, degree, is_color, bpp) = cols
+        norm_res = Page.norm_res
+        for page in range(start + 1, stop + 1):
+            info = XDW_GetPageInformation(handle, page, extend=True)
+            width.append(info.nWidth / XDWRES)
+            height.append(info.nHeight / XDWRES)
+            type_.append(info.nPageType)
+            hres.append(norm_res(info.nHorRes))
+            vres.append(norm_res(info.nVerRes))
+            compress.append(info.nCompressType)
+            anns.append(info.nAnnotations)
+            degree.append(info.nDegree)
+            if color:
+                pci = XDW_GetPageColorInformation(handle, page)
+                is_color.append(1 if pci.nColor else 0)
+                bpp.append(pci.nImageDepth)
+            else:
+                is_color.append(-1)
+                bpp.append(-1)
+        return table
+
+    def __repr__(self):
+        return "{cls}({n} pages)".format(
+                cls=self.__class__.__name__, n=len(self))
+
+    def __len__(self):
+        return len(self.columns["width"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self.row(pos)
+
+    def row(self, pos):
+        """Get page information of page pos as a dict of decoded values."""
+        d = dict((name, self.columns[name][pos]) for (name, _)
+                in PageTable.COLUMNS)
+        d["size"] = Point(d.pop("width"), d.pop("height"))
+        d["resolution"] = Point(d.pop("horizontal_resolution"),
+                d.pop("vertical_resolution"))
+        d["type"] = XDW_PAGE_TYPE[d["type"]]
+        d["compress_type"] = XDW_COMPRESS[d["compress_type"]]
+        d["is_color"] = None if d["is_color"] < 0 else bool(d["is_color"])
+        if d["bpp"] < 0:
+            d["bpp"] = None
+        return d
+
+    def numpy(self):
+        """Get columns as a dict of NumPy arrays; requires NumPy."""
+        import numpy
+        return dict((name, numpy.frombuffer(self.columns[name], dtype=code))
+                for (name, code) in PageTable.COLUMNS)
+
+
+def iter_page_text(handle, start, stop, kind=None, type=None):
+    """Generate text of absolute pages [start, stop) without Page objects.
+
+    handle      document or binder handle
+    kind        None | 'CONTENT' | 'ANNOTATION'
+                None means both.
+    type        None | 'IMAGE' | 'APPLICATION' for content text
+                None means both.
+
+    Yields (absolute_page, content_text, annotation_text) for each page.
+    Text not extracted is given as None.
+    """
+    from .annotation import page_annotation_text
+    kind = kind.upper() if kind else None
+    if kind not in (None, "CONTENT", "ANNOTATION"):
+        raise ValueError("kind must be 'CONTENT', 'ANNOTATION' or None")
+    for page in range(start, stop):
+        content = annotation = None
+        if kind != "CONTENT" or type:
+            info = XDW_GetPageInformation(handle, page + 1)
+        if kind != "ANNOTATION" and (
+                not type or type.upper() == XDW_PAGE_TYPE[info.nPageType]):
+            content = XDW_GetPageTextToMemoryW(handle, page + 1)
+        if kind != "CONTENT" and info.nAnnotations:
+            annotation = page_annotation_text(handle, page, info.nAnnotations)
+        yield (page, content, annotation)
+
+
+def read_fulltext(handle, pages):
+    """Get content text of all pages at once with XDW_GetFullText(W).
+
+    handle      document or binder handle
+    pages       (int) number of pages of document or binder
+
+    XDWAPI writes text of all pages separated by PSEP into a file, which
+    is read through mmap and split into pages.
+
+    Returns a list of content text for each page, or None if the output
+    is missing or empty, e.g. with a replayed trace which has no files,
+    or does not consist of so many pages, e.g. when some text has PSEP.
+    """
+    with XDWTemp(suffix=".txt") as temp:
+        if XDWVER < 8:
+            XDW_GetFullText(handle, cp(temp.path))
+            encoding, width = CODEPAGE, 1
+        else:
+            XDW_GetFullTextW(handle, temp.path)
+            encoding, width = "utf-16-le", 2
+        try:
+            f = open(temp.path, "rb")
+        except OSError:  # FileNotFoundError is shadowed by xdwapi.
+            return None
+        with f:
+            if not os.fstat(f.fileno()).st_size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return _split_text(m, encoding, width, pages)
+
+
+def _split_text(m, encoding, width, pages):
+    sep = PSEP.encode(encoding)
+    start = 0
+    if width == 2 and m[:2] == codecs.BOM_UTF16_LE:
+        start = 2
+    result = []
+    pos = start
+    while len(result) < pages and start <= len(m):
+        end = m.find(sep, pos)
+        if end < 0:
+            end = len(m)
+        elif (end - start) % width:
+            pos = end + 1  # Not aligned to a character.
+            continue
+        result.append(m[start:end].decode(encoding))
+        start = pos = end + len(sep)
+    if len(result) < pages:
+        return None
+    if start < len(m) and m[start:].decode(encoding).strip(PSEP + "\r\n"):
+        return None  # More pages than expected.
+    return result
+
+
+class PageInformation(object):
+
+    """Page attribute loaded on demand together with its group.
+
+    name        (str) attribute name
+    loader      (str) name of Page method to set all attributes in the group
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+
+    def __get__(self, pg, cls=None):
+        if pg is None:
+            return self
+        # Loader sets instance attributes, which hide this descriptor.
+        getattr(pg, self.loader)()
+        return pg.__dict__[self.name]
+
+
 class Page(Annotatable, Observer):
 
-    """Page of DocuWorks document."""
+    """Page of DocuWorks document.
+
+    Page information such as size, resolution and is_color is not read
+    until any of them is accessed.
+    """
+
+    PAGE_INFO = ("size", "type", "resolution", "compress_type", "annotations",
+            "degree", "original_size", "original_resolution", "image_size")
+    COLOR_INFO = ("is_color", "bpp")
+
+    size = PageInformation("size", "_load_info")
+    type = PageInformation("type", "_load_info")
+    resolution = PageInformation("resolution", "_load_info")
+    compress_type = PageInformation("compress_type", "_load_info")
+    annotations = PageInformation("annotations", "_load_info")
+    degree = PageInformation("degree", "_load_info")
+    original_size = PageInformation("original_size", "_load_info")
+    original_resolution = PageInformation("original_resolution", "_load_info")
+    image_size = PageInformation("image_size", "_load_info")
+    is_color = PageInformation("is_color", "_load_color_info")
+    bpp = PageInformation("bpp", "_load_color_info")
 
     @staticmethod
     def norm_res(n):
@@ -226,10 +447,9 @@ class Page(Annotatable, Observer):
             return (100, 200, 400, 200, 300, 400, 200)[n]
         return n
 
-    def reset_attr(self):
-        abspos = self.doc.absolute_page(self.pos)
+    def _load_info(self):
         pginfo = XDW_GetPageInformation(
-                self.doc.handle, abspos + 1, extend=True)
+                self.doc.handle, self.absolute_page() + 1, extend=True)
         self.size = Point(
                 pginfo.nWidth / XDWRES,
                 pginfo.nHeight / XDWRES)  # float, in mm
@@ -250,17 +470,24 @@ class Page(Annotatable, Observer):
         self.image_size = Point(
                 pginfo.nImageWidth,
                 pginfo.nImageHeight)  # px
-        # Page color info.
-        pci = XDW_GetPageColorInformation(self.doc.handle, abspos + 1)
+
+    def _load_color_info(self):
+        pci = XDW_GetPageColorInformation(
+                self.doc.handle, self.absolute_page() + 1)
         self.is_color = bool(pci.nColor)
         self.bpp = pci.nImageDepth
 
+    def reset_attr(self):
+        """Forget page information to read it again on demand."""
+        for name in Page.PAGE_INFO + Page.COLOR_INFO:
+            self.__dict__.pop(name, None)
+
     def __init__(self, doc, pos):
         self.pos = pos
-        Annotatable.__init__(self)
+        Annotatable.__init__(self, limit=doc.cache_annotations)
         Observer.__init__(self, doc, EV_PAGE_INSERTED)
         self.doc = doc
-        self.reset_attr()
+        self._annotation_index = None
 
     def absolute_page(self, append=False):
         return self.doc.absolute_page(self.pos, append=append)
@@ -383,17 +610,56 @@ class Page(Annotatable, Observer):
         XDW_SetPageUserAttribute(
                 self.doc.handle, self.absolute_page() + 1, cp(name), value)
 
-    def update(self, event):
-        if not isinstance(event, Notification):
-            raise TypeError("not an instance of Notification class")
-        if event.type == EV_PAGE_REMOVED:
-            if event.para[0] < self.pos:
-                self.pos -= 1
-        elif event.type == EV_PAGE_INSERTED:
-            if event.para[0] < self.pos:
-                self.pos += 1
-        else:
-            raise ValueError("illegal event type: {0}".format(event.type))
+    def annotation_tree(self, attributes=False, properties=False,
+            userattrs=()):
+        """Get AnnotationTree, a snapshot of all annotations on page.
+
+        attributes  (bool) also read all attributes of each annotation
+        properties  (bool) also read custom properties of each annotation
+        userattrs   (sequence of str) names of user attributes to read
+        """
+        from .annotation import AnnotationTree
+        return AnnotationTree.read(self, attributes=attributes,
+                properties=properties, userattrs=userattrs)
+
+    def annotation_index(self):
+        """Get SpatialIndex of all annotations on page.
+
+        Keys are AnnotationNode's of annotation_tree() and rectangles are
+        bounding boxes in absolute page coordinate, unlike position of
+        child annotations which is relative to the parent.  The index is
+        kept until annotations are changed through this page.
+
+        Example:
+
+            for node in pg.annotation_index().contain(field_rect):
+                if node.type == "STAMP":
+                    ...
+        """
+        if self._annotation_index is None:
+            tree = self.annotation_tree()
+            items = []
+            origins = dict()  # pos -> absolute position
+            for node in tree:
+                geometry = node.geometry()
+                parent = tree.parents[node.pos]
+                if 0 <= parent:
+                    origin = origins[parent]
+                    items.append((node, geometry.rect.shift(origin)))
+                    origins[node.pos] = origin + geometry.position
+                else:
+                    items.append((node, geometry.rect))
+                    origins[node.pos] = geometry.position
+            self._annotation_index = SpatialIndex(items)
+        return self._annotation_index
+
+    def _annotations_changed(self):
+        """Concrete method over _annotations_changed()."""
+        self._annotation_index = None
+
+    def _catalog(self):
+        """Concrete method over _catalog()."""
+        return self.doc._catalog()
 
     def _add(self, ann_type, position, init_dat):
         """Concrete method over _add() for add()."""
@@ -458,6 +724,13 @@ class Page(Annotatable, Observer):
         doc, pos = self.doc, self.pos
         doc.rotate(pos, degree=degree, auto=auto, direct=direct)
         self.reset_attr()
+        # Annotations are moved together.
+        anns = list(self.observers.values())
+        while anns:
+            ann = anns.pop()
+            ann._invalidate()
+            anns.extend(ann.observers.values())
+        self._annotations_changed()
 
     def reduce_noise(self, level="NORMAL"):
         """Process page by noise reduction engine.
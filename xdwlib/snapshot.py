@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""snapshot.py -- DocumentSnapshot, read-only copy of document or binder
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+from array import array
+from types import MappingProxyType
+
+from .xdwapi import *
+from .common import *
+from .page import PageTable
+from .annotation import AnnotationTree
+
+
+__all__ = ("DocumentSnapshot", "PageSnapshot", "AttachmentSnapshot")
+
+
+def _freeze(value):
+    """Get read-only copy of value, i.e. dict, list, array and objects
+    holding them as AnnotationTree and PageTable do.
+
+    Values in dict, i.e. properties and attributes, are kept as they are
+    except arrays, e.g. columns of PageTable.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType(dict(
+                (k, _freeze(v) if isinstance(v, array) else v)
+                for (k, v) in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, array):
+        return memoryview(array(value.typecode, value)).toreadonly()
+    if isinstance(value, (AnnotationTree, PageTable)):
+        obj = value.__class__.__new__(value.__class__)
+        obj.__dict__.update((k, _freeze(v)) for (k, v) in vars(value).items())
+        return obj
+    return value
+
+
+def _thaw(value):
+    """Get picklable copy of value made by _freeze()."""
+    if isinstance(value, MappingProxyType):
+        return dict((k, _thaw(v) if isinstance(v, memoryview) else v)
+                for (k, v) in value.items())
+    if isinstance(value, tuple):
+        return tuple(_thaw(v) for v in value)
+    if isinstance(value, memoryview):
+        result = array(value.format)
+        result.frombytes(value.tobytes())
+        return result
+    if isinstance(value, (AnnotationTree, PageTable)):
+        obj = value.__class__.__new__(value.__class__)
+        obj.__dict__.update((k, _thaw(v)) for (k, v) in vars(value).items())
+        return obj
+    return value
+
+
+def _snapshot(state):
+    return DocumentSnapshot(**state)
+
+
+class _ReadOnly(object):
+
+    """Base class to refuse assignment, like AnnotationCache."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("assignment is not supported for {0}".format(
+                                self.__class__.__name__))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+
+class AttachmentSnapshot(_ReadOnly):
+
+    """Information on an attachment aka original data, without data."""
+
+    __slots__ = ("name", "size", "datetime", "text_type")
+
+    def __init__(self, name, size, datetime, text_type):
+        self._set("name", name)
+        self._set("size", size)
+        self._set("datetime", datetime)
+        self._set("text_type", text_type)
+
+    def __repr__(self):
+        return "{cls}({name}; {size} bytes)".format(
+                cls=self.__class__.__name__, name=self.name, size=self.size)
+
+    def __reduce__(self):
+        return (AttachmentSnapshot,
+                (self.name, self.size, self.datetime, self.text_type))
+
+
+class DocumentSnapshot(_ReadOnly):
+
+    """Read-only copy of document or binder, with no handle.
+
+    Pages, their information and text, annotations with attributes,
+    custom properties and user attributes, document properties and
+    attachment information are all read at once, so that the snapshot
+    needs no more XDWAPI calls and can be pickled, e.g. to be passed to
+    other processes.
+
+    Methods of BaseDocument to read pages and text are available, and
+    pages are given as PageSnapshot.  For binders, pages are numbered
+    throughout the binder.  Documents in binder are not given as objects,
+    i.e. there is no document() or document_and_page(); documents holds
+    (name, pages) of each document instead.
+
+    Mappings, sequences and arrays in the snapshot, e.g. properties and
+    columns of page_table, are read-only, too.
+
+    XDWAPI cannot enumerate names of user attributes, so only those named
+    on reading are kept.
+    """
+
+    def __init__(self, **kw):
+        for (k, v) in kw.items():
+            self._set(k, _freeze(v))
+
+    def __reduce__(self):
+        return (_snapshot, (dict(
+                (k, _thaw(v)) for (k, v) in vars(self).items()),))
+
+    @staticmethod
+    def read(xdwfile, userattrs=()):
+        """Read document or binder.
+
+        xdwfile     (Document or Binder)
+        userattrs   (sequence of str) names of user attributes to read
+                    from the document, pages and annotations
+        """
+        handle = xdwfile.handle
+        userattrs = tuple(uc(name) for name in userattrs)
+        table = PageTable.read(handle, 0, xdwfile.pages)
+        texts = []
+        trees = []
+        page_userattrs = []
+        for page in range(xdwfile.pages):
+            texts.append(XDW_GetPageTextToMemoryW(handle, page + 1))
+            trees.append(AnnotationTree._read(handle, page,
+                    table["annotations"][page], attributes=True,
+                    properties=True, userattrs=userattrs))
+            values = dict()
+            for name in userattrs:
+                try:
+                    values[name] = XDW_GetPageUserAttribute(
+                            handle, page + 1, cp(name))
+                except InvalidArgError:
+                    continue
+            page_userattrs.append(values)
+        properties = dict(
+                xdwfile.get_property(order) for order
+                in range(xdwfile.properties))
+        doc_userattrs = dict()
+        for name in userattrs:
+            value = xdwfile.get_userattr(name)
+            if value is not None:
+                doc_userattrs[name] = value
+        attachments = tuple(AttachmentSnapshot(
+                att.name, att.size, att.datetime, att.text_type)
+                for att in xdwfile.attachments)
+        if xdwfile.type == "BINDER":
+            documents = tuple(
+                    (XDW_GetDocumentNameInBinderW(
+                            handle, pos + 1, codepage=CP)[0], pages)
+                    for (pos, pages) in enumerate(xdwfile.document_pages()))
+        else:
+            documents = None
+        return DocumentSnapshot(
+                dir=xdwfile.dir,
+                name=xdwfile.name,
+                type=xdwfile.type,
+                version=xdwfile.version,
+                pages=xdwfile.pages,
+                documents=documents,
+                properties=properties,
+                userattrs=doc_userattrs,
+                attachments=attachments,
+                page_table=table,
+                texts=tuple(texts),
+                trees=tuple(trees),
+                page_userattrs=tuple(page_userattrs),
+                )
+
+    def __repr__(self):
+        return "{cls}({name}; {pages} pages)".format(
+                cls=self.__class__.__name__, name=self.name, pages=self.pages)
+
+    def __len__(self):
+        return self.pages
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.page(p) for p in range(*pos.indices(self.pages))]
+        return self.page(pos)
+
+    def __iter__(self):
+        for pos in range(self.pages):
+            yield PageSnapshot(self, pos)
+
+    def _pos(self, pos):
+        if not (-self.pages <= pos < self.pages):
+            raise IndexError(
+                    "Page number must be in [{0}, {1}), {2} given".format(
+                    -self.pages, self.pages, pos))
+        if pos < 0:
+            pos += self.pages
+        return pos
+
+    def page(self, pos):
+        """Get a PageSnapshot."""
+        return PageSnapshot(self, self._pos(pos))
+
+    def filename(self):
+        """Get filename with extension."""
+        return self.name + {"DOCUMENT": ".xdw", "BINDER": ".xbd"}[self.type]
+
+    def document_pages(self):
+        """Get the list of page count for each document in binder."""
+        return [pages for (_, pages) in self.documents]
+
+    def has_property(self, name):
+        """Test if user defined property exists."""
+        return name in self.properties
+
+    def get_property(self, name, default=None):
+        """Get user defined property like XDWFile.get_property()."""
+        if isinstance(name, int):
+            return list(self.properties.items())[name]
+        return self.properties.get(name, default)
+
+    def get_userattr(self, name, default=None):
+        """Get user defined attribute of name given on reading."""
+        return self.userattrs.get(uc(name), default)
+
+    def content_text(self, type=None):
+        """Get all content text.
+
+        type    None | 'IMAGE' | 'APPLICATION'
+                None means both.
+        """
+        return joinf(PSEP, [pg.content_text(type=type) for pg in self])
+
+    def annotation_text(self):
+        """Get all text in annotations."""
+        return joinf(PSEP, [pg.annotation_text() for pg in self])
+
+    def fulltext(self):
+        """Get all content and annotation text."""
+        return joinf(PSEP, [pg.fulltext() for pg in self])
+
+    def find_content_text(self, pattern, type=None):
+        """Find given pattern (text or regex) in all content text."""
+        return self.find(pattern, func=lambda pg: pg.content_text(type=type))
+
+    def find_annotation_text(self, pattern):
+        """Find given pattern (text or regex) in all annotation text."""
+        return self.find(pattern, func=lambda pg: pg.annotation_text())
+
+    def find_fulltext(self, pattern):
+        """Find given pattern in all content and annotation text."""
+        return self.find(pattern)
+
+    def find(self, pattern, func=None):
+        """Find given pattern (text or regex) like BaseDocument.find().
+
+        Returns a list of PageSnapshot.
+        """
+        func = func or (lambda pg: pg.fulltext())
+        if isinstance(pattern, str):
+            f = lambda pg: pattern in (func(pg) or "")
+        else:
+            f = lambda pg: pattern.search(func(pg) or "")
+        return list(filter(f, self))
+
+
+class PageSnapshot(_ReadOnly):
+
+    """Page of DocumentSnapshot.
+
+    Page information in PageTable, i.e. size, type, resolution,
+    compress_type, annotations, degree, is_color and bpp, is available.
+    Annotations are given as AnnotationNode read with attributes,
+    properties and user attributes.
+    """
+
+    __slots__ = ("doc", "pos")
+
+    _INFO = ("size", "type", "resolution", "compress_type", "annotations",
+            "degree", "is_color", "bpp")
+
+    def __init__(self, doc, pos):
+        self._set("doc", doc)
+        self._set("pos", pos)
+
+    def __reduce__(self):
+        return (PageSnapshot, (self.doc, self.pos))
+
+    def __repr__(self):
+        return "{cls}({doc}[{pos}])".format(
+                cls=self.__class__.__name__, doc=self.doc.name, pos=self.pos)
+
+    def __eq__(self, other):
+        return (isinstance(other, PageSnapshot) and
+                self.doc is other.doc and self.pos == other.pos)
+
+    def __hash__(self):
+        return hash((id(self.doc), self.pos))
+
+    def __getattr__(self, name):
+        if name in PageSnapshot._INFO:
+            return self.doc.page_table.row(self.pos)[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return self.annotations
+
+    def __getitem__(self, pos):
+        return self.annotation_tree().roots()[pos]
+
+    def __iter__(self):
+        return iter(self.annotation_tree().roots())
+
+    def absolute_page(self):
+        return self.pos
+
+    def annotation(self, pos):
+        """Get a top level AnnotationNode."""
+        return self[pos]
+
+    def annotation_tree(self):
+        """Get AnnotationTree of annotations on page."""
+        return self.doc.trees[self.pos]
+
+    def get_userattr(self, name, default=None):
+        """Get pagewise user defined attribute of name given on reading."""
+        return self.doc.page_userattrs[self.pos].get(uc(name), default)
+
+    def content_text(self, type=None):
+        """Returns content text of page.
+
+        type    None | "IMAGE" | "APPLICATION"
+                None means both.
+        """
+        if type and type.upper() != self.type:
+            return None
+        return self.doc.texts[self.pos]
+
+    def annotation_text(self, recursive=True):
+        """Get text in annotations."""
+        return self.annotation_tree().annotation_text(recursive=recursive)
+
+    def fulltext(self):
+        """Get text in page and all annotations."""
+        return joinf(ASEP, [self.content_text(), self.annotation_text()])
+
+    def find_annotations(self, *args, **kw):
+        """Find annotations like Page.find_annotations().
+
+        Returns a list of AnnotationNode.
+        """
+        return self.annotation_tree().find_annotations(*args, **kw)
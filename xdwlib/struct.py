@@ -14,9 +14,10 @@ FOR A PARTICULAR PURPOSE.
 """
 
 import math
+from array import array
 
 
-__all__ = ("Point", "Rect", "EPSILON")
+__all__ = ("Point", "Rect", "PointArray", "SpatialIndex", "EPSILON")
 
 PI = math.pi
 EPSILON = 0.01  # mm
@@ -65,6 +66,8 @@ class Point(object):
     Point(1.34, 5.00)
     """
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x=0, y=0):
         self.x = float(x)
         self.y = float(y)
@@ -196,6 +199,8 @@ class Rect(object):
     (Point(0.00, 10.00), Point(20.00, 20.00))
     """
 
+    __slots__ = ("left", "top", "right", "bottom")
+
     def __init__(self, *args, **kw):
         left = top = right = bottom = width = height = None
         half_open = True
@@ -265,7 +270,7 @@ class Rect(object):
 
     def int(self):
         """Special method to adapt to XDW_RECT."""
-        result = Rect()
+        result = Rect(0, 0, 0, 0)
         result.left = int(self.left)
         result.top = int(self.top)
         result.right = int(self.right)
@@ -308,7 +313,7 @@ class Rect(object):
     def shift(self, pnt, _y=0):
         if isinstance(pnt, Point):
             x, y = pnt.x, pnt.y
-        elif isinstace(pnt, (tuple, list)):
+        elif isinstance(pnt, (tuple, list)):
             x, y = pnt
         elif isinstance(pnt, (int, float)) and isinstance(_y, (int, float)):
             x, y = pnt, _y
@@ -321,6 +326,309 @@ class Rect(object):
         return Rect(p.rotate(degree, origin=origin) for p in self)
 
 
+class PointArray(object):
+
+    """Sequence of Points held in a flat array of x, y, x, y, ...
+
+    Operations are applied to all points at once without making Point
+    objects, which matters for markers of thousands of points.
+
+    >>> pa = PointArray([Point(0, 10), (20, 30), Point(40, 0)])
+    >>> pa
+    PointArray([Point(0.00, 10.00), Point(20.00, 30.00), Point(40.00, 0.00)])
+    >>> len(pa)
+    3
+    >>> pa[1]
+    Point(20.00, 30.00)
+    >>> pa[-1]
+    Point(40.00, 0.00)
+    >>> pa[1:]
+    PointArray([Point(20.00, 30.00), Point(40.00, 0.00)])
+    >>> pa + Point(5, 10)
+    PointArray([Point(5.00, 20.00), Point(25.00, 40.00), Point(45.00, 10.00)])
+    >>> pa.shift(5)
+    PointArray([Point(5.00, 10.00), Point(25.00, 30.00), Point(45.00, 0.00)])
+    >>> pa * 2
+    PointArray([Point(0.00, 20.00), Point(40.00, 60.00), Point(80.00, 0.00)])
+    >>> pa.scale(2, origin=Point(40, 0))
+    PointArray([Point(-40.00, 20.00), Point(0.00, 60.00), Point(40.00, 0.00)])
+    >>> pa.rotate(90)[0]
+    Point(-10.00, 0.00)
+    >>> pa.rotate(30, origin=Point(10, 10))[0] == Point(0, 10).rotate(
+    ...         30, origin=Point(10, 10))
+    True
+    >>> pa.rect()
+    Rect(0.00, 0.00, 40.00, 30.00)
+    >>> pa.relative()
+    PointArray([Point(0.00, 10.00), Point(20.00, 20.00), Point(40.00, -10.00)])
+    >>> pa.relative().absolute() == pa
+    True
+    >>> pa == [Point(0, 10), Point(20, 30), Point(40, 0)]
+    True
+    >>> pa == None, pa != "ab"
+    (False, True)
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, points=(), data=None):
+        if data is not None:
+            self.data = data
+        elif isinstance(points, PointArray):
+            self.data = array("d", points.data)
+        else:
+            self.data = array("d")
+            for p in points:
+                if isinstance(p, Point):
+                    self.data.append(p.x)
+                    self.data.append(p.y)
+                else:
+                    self.data.extend(p[:2])
+
+    def __repr__(self):
+        return "{cls}([{pts}])".format(
+                cls=self.__class__.__name__,
+                pts=", ".join(repr(p) for p in self))
+
+    def __len__(self):
+        return len(self.data) // 2
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            data = self.data
+            return PointArray(data=array("d", [v
+                    for i in range(*pos.indices(len(self)))
+                    for v in data[2 * i:2 * i + 2]]))
+        if pos < 0:
+            pos += len(self)
+        if not (0 <= pos < len(self)):
+            raise IndexError("point number out of range")
+        return Point(self.data[2 * pos], self.data[2 * pos + 1])
+
+    def __iter__(self):
+        data = self.data
+        for i in range(0, len(data), 2):
+            yield Point(data[i], data[i + 1])
+
+    def __eq__(self, points):
+        if not isinstance(points, PointArray):
+            try:
+                points = PointArray(points)
+            except (TypeError, ValueError, IndexError):
+                return NotImplemented
+        return self.data == points.data
+
+    def __ne__(self, points):
+        result = self.__eq__(points)
+        return result if result is NotImplemented else not result
+
+    @property
+    def xs(self):
+        return self.data[0::2]
+
+    @property
+    def ys(self):
+        return self.data[1::2]
+
+    def _map(self, fx, fy):
+        data = array("d", self.data)
+        data[0::2] = array("d", map(fx, self.data[0::2]))
+        data[1::2] = array("d", map(fy, self.data[1::2]))
+        return PointArray(data=data)
+
+    def __add__(self, pnt):
+        return self.shift(pnt)
+
+    def __sub__(self, pnt):
+        return self.shift(-pnt)
+
+    def __neg__(self):
+        return self * -1
+
+    def __mul__(self, n):
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        return self.scale(n)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, n):
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        return self._map(lambda x: x / n, lambda y: y / n)
+
+    def shift(self, pnt, _y=0):
+        x, y = Point(0, 0).shift(pnt, _y)
+        return self._map(lambda v: v + x, lambda v: v + y)
+
+    def scale(self, n, origin=None):
+        """Scale distances from origin (default: (0, 0)) by n."""
+        ox, oy = origin or (0, 0)
+        return self._map(lambda v: (v - ox) * n + ox,
+                lambda v: (v - oy) * n + oy)
+
+    def rotate(self, degree, origin=None):
+        ox, oy = origin or (0, 0)
+        rad = PI * degree / 180.0
+        sin, cos = math.sin(rad), math.cos(rad)
+        data = array("d")
+        for (x, y) in zip(self.data[0::2], self.data[1::2]):
+            x, y = x - ox, y - oy
+            data.append(x * cos - y * sin + ox)
+            data.append(x * sin + y * cos + oy)
+        return PointArray(data=data)
+
+    def rect(self):
+        """Get bounding box."""
+        xs, ys = self.xs, self.ys
+        return Rect(min(xs), min(ys), max(xs), max(ys))
+
+    def relative(self):
+        """Get points relative to the first one as XDWAPI expects."""
+        if len(self) < 2:
+            return PointArray(self)
+        result = self - self[0]
+        result.data[0:2] = self.data[0:2]
+        return result
+
+    def absolute(self):
+        """Get absolute points from ones relative to the first one."""
+        if len(self) < 2:
+            return PointArray(self)
+        result = self + self[0]
+        result.data[0:2] = self.data[0:2]
+        return result
+
+    def numpy(self):
+        """Get the points as an n x 2 numpy.ndarray sharing memory."""
+        import numpy
+        return numpy.frombuffer(self.data, dtype=numpy.float64).reshape(-1, 2)
+
+
+class SpatialIndex(object):
+
+    """Uniform grid of rectangles for region queries.
+
+    items       sequence of (key, Rect)
+    cell        (float) size of grid cell; None means to guess from items
+
+    >>> si = SpatialIndex([("a", Rect(0, 0, 10, 10)), ("b", Rect(20, 0, 30, 5)),
+    ...         ("c", Rect(5, 40, 8, 60))])
+    >>> si.intersect(Rect(8, 0, 25, 20))
+    ['a', 'b']
+    >>> si.contain(Rect(0, 0, 31, 11))
+    ['a', 'b']
+    >>> si.contain(Rect(0, 0, 30, 11))
+    ['a']
+    >>> si.nearest(Point(9, 30))
+    ['c']
+    >>> si.nearest(Point(15, 0), count=2)
+    ['a', 'b']
+    """
+
+    def __init__(self, items, cell=None):
+        self.keys = []
+        self.bounds = array("d")  # left, top, right, bottom, ...
+        for (key, rect) in items:
+            self.keys.append(key)
+            self.bounds.extend(rect)
+        if cell is None:
+            cell = 1.0
+            if self.keys:
+                area = ((max(self.bounds[2::4]) - min(self.bounds[0::4])) *
+                        (max(self.bounds[3::4]) - min(self.bounds[1::4])))
+                cell = max(math.sqrt(area / len(self.keys)), cell)
+        self.cell = float(cell)
+        self.grid = dict()  # (column, row) -> [item number, ...]
+        for i in range(len(self.keys)):
+            for c in self._cells(*self.bounds[4 * i:4 * i + 4]):
+                self.grid.setdefault(c, []).append(i)
+        if self.grid:
+            xs = [c[0] for c in self.grid]
+            ys = [c[1] for c in self.grid]
+            self.extent = (min(xs), min(ys), max(xs), max(ys))  # in cells
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _cells(self, left, top, right, bottom):
+        cell = self.cell
+        for x in range(int(left // cell), int(right // cell) + 1):
+            for y in range(int(top // cell), int(bottom // cell) + 1):
+                yield (x, y)
+
+    def _candidates(self, rect):
+        found = set()
+        for c in self._cells(*rect):
+            found.update(self.grid.get(c, ()))
+        return sorted(found)
+
+    def intersect(self, rect):
+        """Get keys of rectangles which overlap rect."""
+        left, top, right, bottom = rect
+        result = []
+        for i in self._candidates(rect):
+            l, t, r, b = self.bounds[4 * i:4 * i + 4]
+            if l < right and left <= r and t < bottom and top <= b:
+                result.append(self.keys[i])
+        return result
+
+    def contain(self, rect):
+        """Get keys of rectangles which are placed inside rect.
+
+        rect is half-open as in Annotation.inside().
+        """
+        left, top, right, bottom = rect
+        result = []
+        for i in self._candidates(rect):
+            l, t, r, b = self.bounds[4 * i:4 * i + 4]
+            if left <= l and r < right and top <= t and b < bottom:
+                result.append(self.keys[i])
+        return result
+
+    def _distance(self, i, x, y):
+        l, t, r, b = self.bounds[4 * i:4 * i + 4]
+        dx = max(l - x, 0, x - r)
+        dy = max(t - y, 0, y - b)
+        return math.hypot(dx, dy)
+
+    def nearest(self, point, count=1):
+        """Get keys of rectangles nearest to point, in the nearest order."""
+        x, y = point
+        cell = self.cell
+        cx, cy = int(x // cell), int(y // cell)
+        if not self.keys:
+            return []
+        # Search rings of cells around point while something can be nearer.
+        left, top, right, bottom = self.extent
+        reach = max(cx - left, right - cx, cy - top, bottom - cy)
+        found = dict()  # item number -> distance
+        for ring in range(reach + 1):
+            for i in set(i for c in _ring(cx, cy, ring)
+                    for i in self.grid.get(c, ())):
+                if i not in found:
+                    found[i] = self._distance(i, x, y)
+            best = sorted(found.values())[:count]
+            if len(best) == min(count, len(self.keys)) and \
+                    best[-1] <= ring * cell:
+                break
+        order = sorted(found, key=lambda i: (found[i], i))[:count]
+        return [self.keys[i] for i in order]
+
+
+def _ring(cx, cy, n):
+    """Generate cells on the square ring of radius n around (cx, cy)."""
+    if n == 0:
+        yield (cx, cy)
+        return
+    for x in range(cx - n, cx + n + 1):
+        yield (x, cy - n)
+        yield (x, cy + n)
+    for y in range(cy - n + 1, cy + n):
+        yield (cx - n, y)
+        yield (cx + n, y)
+
+
 if __name__ == "__main__":
 
     import doctest
@@ -11,9 +11,17 @@ THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
 WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
 WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
+
+XDW_* functions are resolved from the backend once, but no prototypes
+(argtypes/restype) are declared for them.  The DocuWorks headers are not
+part of this package, and a guessed prototype could only break calls,
+while every XDW_* function returns int, which is the default restype of
+ctypes, and the wrappers pass ctypes objects, byref() pointers, None and
+ints as they are.
 """
 
 
+import os
 from ctypes import *
 
 from .bitmap import Bitmap
@@ -167,9 +175,16 @@ class XDWConst(dict):
     def __init__(self, constants, default=None):
         dict.__init__(self, constants)
         self.constants = constants
-        self.reverse = dict((v, k) for (k, v) in constants.items())
+        self._reverse = None
         self.default = default
 
+    @property
+    def reverse(self):
+        """Reverse lookup table, which is built at the first access."""
+        if self._reverse is None:
+            self._reverse = dict((v, k) for (k, v) in self.constants.items())
+        return self._reverse
+
     def inner(self, value):
         return self.reverse.get(str(value).upper(), self.default)
 
@@ -2104,7 +2119,130 @@ XDW_AID_INITIAL_DATA = {
 ### API ##############################################################
 
 
-DLL = windll.LoadLibrary("xdwapi.dll")
+### backends
+
+BACKENDS = dict()
+
+
+def register_backend(name, loader):
+    """Register a backend which serves XDW_* functions.
+
+    name        (str) backend name
+    loader      (callable) function which takes keyword arguments and
+                returns an object with XDW_* functions e.g. a ctypes DLL
+    """
+    BACKENDS[name] = loader
+
+
+def _load_dll():
+    from ctypes import windll
+    return windll.LoadLibrary("xdwapi.dll")
+
+
+def _load_simulator(**kw):
+    from .xdwsim import SimulatedXDWAPI
+    return SimulatedXDWAPI(**kw)
+
+
+def _load_replayer(**kw):
+    from .xdwtrace import ReplayXDWAPI
+    return ReplayXDWAPI(**kw)
+
+
+register_backend("dll", _load_dll)
+register_backend("simulated", _load_simulator)
+register_backend("replay", _load_replayer)
+
+
+def use_backend(name, **kw):
+    """Switch the backend which serves XDW_* functions.
+
+    name        (str) registered backend name; 'dll', 'simulated' or
+                'replay'
+    **kw        arguments to the backend loader e.g. latency=0.001
+
+    Returns the backend object.
+
+    Note that XDWVER is probed once with the backend which serves the
+    first DocuWorks API call.
+    """
+    global DLL
+    try:
+        loader = BACKENDS[name]
+    except KeyError:
+        raise ValueError("unknown backend '{0}'".format(name))
+    DLL = loader(**kw)
+    _functions.clear()
+    return DLL
+
+
+class _LazyBackend(object):
+
+    """Placeholder of DLL which loads the actual backend at the first use.
+
+    Loading xdwapi.dll is deferred so that importing xdwlib costs little.
+    """
+
+    def __init__(self, name, **kw):
+        self._name = name
+        self._kw = kw
+
+    def __getattr__(self, name):
+        return getattr(use_backend(self._name, **self._kw), name)
+
+
+def backend_loaded():
+    """Returns True if the backend has been loaded actually."""
+    return not isinstance(DLL, _LazyBackend)
+
+
+DLL = _LazyBackend(os.environ.get("XDWLIB_BACKEND", "dll"))
+
+
+class _FunctionTable(object):
+
+    """XDW_* functions resolved from the current backend.
+
+    Each function is looked up in DLL only once and kept in the instance
+    dictionary, so that following calls are plain attribute accesses.
+    Prototypes are not declared; every XDW_* function returns int, which
+    is the default restype of ctypes, and the wrappers pass ctypes
+    objects as they are.
+
+    Functions other than XDW_Get* count up _revision on each call since
+    they may change documents.
+    """
+
+    def __getattr__(self, name):
+        func = getattr(DLL, name)
+        for wrap in _function_wrappers:
+            func = wrap(name, func)
+        if not name.startswith("XDW_Get"):
+            func = _revising(func)
+        self.__dict__[name] = func
+        return func
+
+    def clear(self):
+        self.__dict__.clear()
+
+
+def _revising(func):
+    def call(*args):
+        global _revision
+        _revision += 1
+        return func(*args)
+    return call
+
+
+_functions = _FunctionTable()
+
+# Number of calls which may have changed documents.  Values read via
+# XDW_Get* functions are up to date while this is unchanged.
+_revision = 0
+
+# Callables (name, func) -> func to hook XDW_* functions, e.g. to measure
+# or record calls.  Call _functions.clear() after changing this.
+_function_wrappers = []
 
 ### decorators and utility functions
 
@@ -2127,9 +2265,11 @@ def RAISE(api):
     return apifunc
 
 
-@RAISE
 def TRY(api, *args):
-    return api(*args)
+    result = api(*args)
+    if result & 0x80000000:
+        raise XDWErrorFactory(result)
+    return result
 
 
 def APPEND(*ext, **kw):
@@ -2138,13 +2278,15 @@ def APPEND(*ext, **kw):
     N.B. Decorated function must be of the same name as XDWAPI's one.
     """
     def deco(api):
+        name = api.__name__
         @wraps(api)
         def func(*args, **kw):
-            args = list(args)
             if "codepage" in kw:
-                args.append(kw["codepage"])
-            args.extend(ext)
-            return TRY(getattr(DLL, api.__name__), *args)
+                args += (kw["codepage"],)
+            result = getattr(_functions, name)(*(args + ext))
+            if result & 0x80000000:
+                raise XDWErrorFactory(result)
+            return result
         return func
     return deco
 
@@ -2155,50 +2297,86 @@ def QUERY(struct, *ext):
     N.B. Decorated function must be of the same name as XDWAPI's one.
     """
     def deco(api):
+        name = api.__name__
         @wraps(api)
         def func(*args):
             result = struct()
-            args = list(args)
-            args.append(byref(result))
-            args.extend(ext)
-            TRY(getattr(DLL, api.__name__), *args)
+            code = getattr(_functions, name)(*args, byref(result), *ext)
+            if code & 0x80000000:
+                raise XDWErrorFactory(code)
             return result
         return func
     return deco
 
 
-def STRING(api):
-    """Decorator to get a string value via XDWAPI.
+# Strings and attributes are read at once into a reusable buffer sized by
+# the largest value ever seen, and the size is asked for (two-pass) only
+# when XDW_E_INSUFFICIENT_BUFFER is returned.  Set False to always ask.
+SINGLE_PASS = True
 
-    N.B. Decorated function must be of the same name as XDWAPI's one.
-    """
+_SIZE_HINT = 256  # initial size of buffers
+_SIZE_HINT_LIMIT = 0x10000  # values larger than this are read in two-pass
+_size_hints = dict()
+_buffers = dict()
+
+
+def _create_buffer(wide):
+    return create_unicode_buffer if wide else create_string_buffer
+
+
+def _buffer(name, wide):
+    """Get a reusable buffer for XDWAPI name."""
+    size = _size_hints.get(name, _SIZE_HINT)
+    buf = _buffers.get(name)
+    if buf is None or len(buf) < size:
+        buf = _buffers[name] = _create_buffer(wide)(size)
+    return buf
+
+
+def _hint(name, size):
+    """Feed the size of value actually read by XDWAPI name."""
+    if _size_hints.get(name, _SIZE_HINT) < size <= _SIZE_HINT_LIMIT:
+        _size_hints[name] = size
+
+
+def _string(api, wide):
+    name = api.__name__
     @wraps(api)
     def func(*args):
-        args = list(args)
-        args.extend([NULL, 0, NULL])
-        size = TRY(getattr(DLL, api.__name__), *args)
-        buf = create_string_buffer(size)
-        args[-3:] = [byref(buf), size, NULL]
-        TRY(getattr(DLL, api.__name__), *args)
+        f = getattr(_functions, name)
+        if SINGLE_PASS:
+            buf = _buffer(name, wide)
+            code = f(*args, byref(buf), len(buf), NULL)
+            if not code & 0x80000000:
+                return buf.value
+            if code != XDW_E_INSUFFICIENT_BUFFER:
+                raise XDWErrorFactory(code)
+        size = f(*args, NULL, 0, NULL)
+        if size & 0x80000000:
+            raise XDWErrorFactory(size)
+        _hint(name, size)
+        buf = _create_buffer(wide)(size)
+        code = f(*args, byref(buf), size, NULL)
+        if code & 0x80000000:
+            raise XDWErrorFactory(code)
         return buf.value
     return func
 
 
+def STRING(api):
+    """Decorator to get a string value via XDWAPI.
+
+    N.B. Decorated function must be of the same name as XDWAPI's one.
+    """
+    return _string(api, False)
+
+
 def UNICODE(api):
     """Decorator to get a unicode (wchar) string value via XDWAPI.
 
     N.B. Decorated function must be of the same name as XDWAPI's one.
     """
-    @wraps(api)
-    def func(*args):
-        args = list(args)
-        args.extend([NULL, 0, NULL])
-        size = TRY(getattr(DLL, api.__name__), *args)
-        buf = create_unicode_buffer(size)
-        args[-3:] = [byref(buf), size, NULL]
-        TRY(getattr(DLL, api.__name__), *args)
-        return buf.value
-    return func
+    return _string(api, True)
 
 
 def ATTR(byorder=False, widename=False, multitype=False, widevalue=False):
@@ -2206,46 +2384,58 @@ def ATTR(byorder=False, widename=False, multitype=False, widevalue=False):
 
     N.B. Decorated function must be of the same name as XDWAPI's one.
     """
+    wide = multitype and widename or widevalue
     def deco(api):
+        name = api.__name__
         @wraps(api)
         def func(*args, **kw):
+            f = getattr(_functions, name)
             args = list(args)
-            codepage = kw.get("codepage", 932)
-            def create_buffer(wide):
-                return create_unicode_buffer if wide else create_string_buffer
-            # Pass 1 - get the size of value.
             if byorder:
-                attrname = create_buffer(widename)(256)
+                attrname = _create_buffer(widename)(256)
                 args.append(byref(attrname))
             if multitype:
                 attrtype = c_int()
                 args.append(byref(attrtype))
             else:
-                attrtype = c_int(XDW_ANNOTATION_ATTRIBUTE[args[1]][0])
+                # XDW_ANNOTATION_ATTRIBUTE tells 2 for points.
+                t = XDW_ANNOTATION_ATTRIBUTE[args[1]][0]
+                attrtype = c_int(XDW_ATYPE_OTHER if t == 2 else t)
             if widevalue:
                 texttype = c_int()
-                args.extend([NULL, 0, byref(texttype), codepage])
-            else:
-                args.extend([NULL, 0])
-            args.append(NULL)
-            size = TRY(getattr(DLL, api.__name__), *args)
-            # Pass 2 - read the actual value.
-            if attrtype.value in (XDW_ATYPE_INT, XDW_ATYPE_DATE, XDW_ATYPE_BOOL, XDW_ATYPE_OCTS):
-                attrvalue = c_int()
-            elif attrtype.value == XDW_ATYPE_STRING:
-                attrvalue = create_buffer(multitype and widename or widevalue)(size)
-            else:  # if attrtype.value == XDW_ATYPE_OTHER:
-                attrvalue = (XDW_POINT * int(size / sizeof(XDW_POINT)))()
-            if widevalue:
-                args[-5:-3] = [byref(attrvalue), size]
+                tail = [byref(texttype), kw.get("codepage", 932), NULL]
             else:
-                args[-3:-1] = [byref(attrvalue), size]
-            TRY(getattr(DLL, api.__name__), *args)
+                tail = [NULL]
+            # Try to read the value at once unless it is points, whose
+            # length can be known only by its size.
+            code = XDW_E_INSUFFICIENT_BUFFER
+            if SINGLE_PASS and attrtype.value != XDW_ATYPE_OTHER:
+                attrvalue = _buffer(name, wide)
+                code = f(*(args + [byref(attrvalue), len(attrvalue)] + tail))
+                if code & 0x80000000:
+                    if code != XDW_E_INSUFFICIENT_BUFFER:
+                        raise XDWErrorFactory(code)
+                elif attrtype.value == XDW_ATYPE_OTHER:
+                    code = XDW_E_INSUFFICIENT_BUFFER  # Read again for size.
+            if code == XDW_E_INSUFFICIENT_BUFFER:
+                # Pass 1 - get the size of value.
+                size = TRY(f, *(args + [NULL, 0] + tail))
+                _hint(name, size)
+                # Pass 2 - read the actual value.
+                attrvalue = _create_buffer(wide)(max(size, sizeof(c_int)))
+                TRY(f, *(args + [byref(attrvalue), size] + tail))
             # Build the result.
+            if attrtype.value == XDW_ATYPE_STRING:
+                value = attrvalue.value
+            elif attrtype.value == XDW_ATYPE_OTHER:
+                value = (XDW_POINT * int(size / sizeof(XDW_POINT))
+                        ).from_buffer_copy(attrvalue)
+            else:  # XDW_ATYPE_INT, XDW_ATYPE_DATE, XDW_ATYPE_BOOL, ...
+                value = c_int.from_buffer_copy(attrvalue).value
             result = []
             if byorder:
                 result.append(attrname.value)
-            result.extend([attrtype.value, attrvalue.value])
+            result.extend([attrtype.value, value])
             if widevalue:
                 result.append(texttype.value)
             return tuple(result)
@@ -2260,24 +2450,80 @@ def ATTR(byorder=False, widename=False, multitype=False, widevalue=False):
 def XDW_GetInformation(index): pass
 
 
-XDWVER = int(XDW_GetInformation(XDW_GI_VERSION).decode("ascii").split(".")[0])
-if 8 <= XDWVER:
-    XDW_AID_INITIAL_DATA[XDW_AID_BITMAP] = XDW_AA_BITMAP_INITIAL_DATAW
+_XDWVER = None
+
+
+def xdwver():
+    """Get the major version of DocuWorks, probing it at the first call."""
+    global _XDWVER
+    if _XDWVER is None:
+        version = XDW_GetInformation(XDW_GI_VERSION).decode("ascii")
+        # Stop running immediately if the fatal version is running.
+        if version == "8.0.3":
+            raise SystemExit("""\
+THIS VERSION OF DOCUWORKS HAS A FATAL ERROR THAT MAY CAUSE MASSIVE DATA LOSS.
+CONSULT YOUR SYSTEM ADMINISTRATOR AS SOON AS POSSIBLE.
+PROGRAM STOPS RUNNING TO AVOID ANY ACCIDENT.""")
+        _XDWVER = int(version.split(".")[0])
+        if 8 <= _XDWVER:
+            XDW_AID_INITIAL_DATA[XDW_AID_BITMAP] = XDW_AA_BITMAP_INITIAL_DATAW
+    return _XDWVER
+
+
+def _reset_state():
+    """Forget the version and buffer size hints to repeat the same calls."""
+    global _XDWVER
+    _XDWVER = None
+    _size_hints.clear()
+    _buffers.clear()
+
+
+class _XDWVersion(object):
+
+    """Major version of DocuWorks which behaves like int lazily."""
+
+    def __int__(self):
+        return xdwver()
+
+    __index__ = __int__
+
+    def __hash__(self):
+        return hash(xdwver())
+
+    def __repr__(self):
+        return repr(xdwver())
+
+    def __eq__(self, other):
+        return xdwver() == other
+
+    def __ne__(self, other):
+        return xdwver() != other
+
+    def __lt__(self, other):
+        return xdwver() < other
+
+    def __le__(self, other):
+        return xdwver() <= other
+
+    def __gt__(self, other):
+        return xdwver() > other
+
+    def __ge__(self, other):
+        return xdwver() >= other
+
+
+XDWVER = _XDWVersion()
 
 
 def XDWVERSION(ver):
     """Decorator to indicate if the following function is valid or not."""
     def deco(api):
-        if ver <= XDWVER:
-            @wraps(api)
-            def func(*args):
-                return api(*args)
-            return func
-        else:
-            @wraps(api)
-            def func(*args):
+        @wraps(api)
+        def func(*args):
+            if (_XDWVER or xdwver()) < ver:
                 raise NotImplementedError
-            return func
+            return api(*args)
+        return func
     return deco
 
 
@@ -2286,13 +2532,6 @@ def XDWVERSION(ver):
 def XDW_GetInformationW(index): pass
 
 
-# Stop running immediately if the fatal version is running.
-if XDW_GetInformation(XDW_GI_VERSION) == "8.0.3":
-    raise SystemExit("""\
-THIS VERSION OF DOCUWORKS HAS A FATAL ERROR THAT MAY CAUSE MASSIVE DATA LOSS.
-CONSULT YOUR SYSTEM ADMINISTRATOR AS SOON AS POSSIBLE.
-PROGRAM STOPS RUNNING TO AVOID ANY ACCIDENT.""")
-
 @APPEND(NULL)
 def XDW_AddSystemFolder(index): pass
 
@@ -2300,24 +2539,24 @@ def XDW_AddSystemFolder(index): pass
 def XDW_MergeXdwFiles(input_paths, output_path):
     n = len(input_paths)
     _input_paths = (c_char_p * n)(*input_paths)
-    return DLL.XDW_MergeXdwFiles(ptr(_input_paths), n, output_path, NULL)
+    return _functions.XDW_MergeXdwFiles(ptr(_input_paths), n, output_path, NULL)
 
 @XDWVERSION(8)
 @RAISE
 def XDW_MergeXdwFilesW(input_paths, output_path):
     n = len(input_paths)
     _input_paths = (c_wchar_p * n)(*input_paths)
-    return DLL.XDW_MergeXdwFilesW(ptr(_input_paths), n, output_path, NULL)
+    return _functions.XDW_MergeXdwFilesW(ptr(_input_paths), n, output_path, NULL)
 
 def XDW_OpenDocumentHandle(path, open_mode):
     doc_handle = XDW_DOCUMENT_HANDLE()
-    TRY(DLL.XDW_OpenDocumentHandle, path, byref(doc_handle), byref(open_mode))
+    TRY(_functions.XDW_OpenDocumentHandle, path, byref(doc_handle), byref(open_mode))
     return doc_handle
 
 @XDWVERSION(8)
 def XDW_OpenDocumentHandleW(path, open_mode):
     doc_handle = XDW_DOCUMENT_HANDLE()
-    TRY(DLL.XDW_OpenDocumentHandleW, path, byref(doc_handle), byref(open_mode))
+    TRY(_functions.XDW_OpenDocumentHandleW, path, byref(doc_handle), byref(open_mode))
     return doc_handle
 
 @APPEND(NULL)
@@ -2328,7 +2567,7 @@ def XDW_GetDocumentInformation(doc_handle): pass
 
 def XDW_GetPageInformation(doc_handle, page, extend=False):
     page_info = XDW_PAGE_INFO_EX() if extend else XDW_PAGE_INFO()
-    TRY(DLL.XDW_GetPageInformation, doc_handle, page, byref(page_info))
+    TRY(_functions.XDW_GetPageInformation, doc_handle, page, byref(page_info))
     return page_info
 
 @APPEND(NULL)
@@ -2343,12 +2582,12 @@ def XDW_GetPageText(doc_handle, page, output_path): pass
 
 @RAISE
 def XDW_ConvertPageToImageFile(doc_handle, page, output_path, img_option):
-    return DLL.XDW_ConvertPageToImageFile(doc_handle, page, output_path, byref(img_option))
+    return _functions.XDW_ConvertPageToImageFile(doc_handle, page, output_path, byref(img_option))
 
 @XDWVERSION(8)
 @RAISE
 def XDW_ConvertPageToImageFileW(doc_handle, page, output_path, img_option):
-    return DLL.XDW_ConvertPageToImageFileW(doc_handle, page, output_path, byref(img_option))
+    return _functions.XDW_ConvertPageToImageFileW(doc_handle, page, output_path, byref(img_option))
 
 @APPEND(NULL)
 def XDW_GetPage(doc_handle, page, output_path): pass
@@ -2368,12 +2607,12 @@ def XDW_SaveDocument(doc_handle): pass
 
 @RAISE
 def XDW_CreateXdwFromImageFile(input_path, output_path, cre_option):
-    return DLL.XDW_CreateXdwFromImageFile(input_path, output_path, byref(cre_option))
+    return _functions.XDW_CreateXdwFromImageFile(input_path, output_path, byref(cre_option))
 
 @XDWVERSION(8)
 @RAISE
 def XDW_CreateXdwFromImageFileW(input_path, output_path, cre_option):
-    return DLL.XDW_CreateXdwFromImageFile(input_path, output_path, byref(cre_option))
+    return _functions.XDW_CreateXdwFromImageFile(input_path, output_path, byref(cre_option))
 
 @QUERY(XDW_ORGDATA_INFO, NULL)
 def XDW_GetOriginalDataInformation(doc_handle, org_dat): pass
@@ -2412,17 +2651,17 @@ def XDW_GetUserAttribute(doc_handle, attr_name): pass
 
 @RAISE
 def XDW_SetUserAttribute(doc_handle, attr_name, attr_val):
-    return DLL.XDW_SetUserAttribute(doc_handle, attr_name, attr_val, len(attr_val or b""), NULL)
+    return _functions.XDW_SetUserAttribute(doc_handle, attr_name, attr_val, len(attr_val or b""), NULL)
 
 @QUERY(XDW_ANNOTATION_INFO, NULL)
 def XDW_GetAnnotationInformation(doc_handle, page, parent_ann_handle, index): pass
 
-@ATTR
+@ATTR()
 def XDW_GetAnnotationAttribute(ann_handle, attr_name): pass
 
 def XDW_AddAnnotation(doc_handle, ann_type, page, hpos, vpos, init_dat):
     new_ann_handle = XDW_ANNOTATION_HANDLE()
-    TRY(DLL.XDW_AddAnnotation, doc_handle, ann_type, page, hpos, vpos, ptr(init_dat), byref(new_ann_handle), NULL)
+    TRY(_functions.XDW_AddAnnotation, doc_handle, ann_type, page, hpos, vpos, ptr(init_dat), byref(new_ann_handle), NULL)
     return new_ann_handle
 
 @APPEND(NULL)
@@ -2453,7 +2692,7 @@ def XDW_ExtractFromSfxDocumentW(input_path, output_path): pass
 
 def XDW_ConvertPageToImageHandle(doc_handle, page, img_option):
     handle = XDW_HGLOBAL()
-    TRY(DLL.XDW_ConvertPageToImageHandle, doc_handle, page, byref(handle), byref(img_option))
+    TRY(_functions.XDW_ConvertPageToImageHandle, doc_handle, page, byref(handle), byref(img_option))
     windll.kernel32.GlobalLock.argtypes = [c_void_p]
     windll.kernel32.GlobalLock.restype = c_void_p
     bitmap = Bitmap(windll.kernel32.GlobalLock(handle))
@@ -2463,7 +2702,7 @@ def XDW_ConvertPageToImageHandle(doc_handle, page, img_option):
 def XDW_GetThumbnailImageHandle(doc_handle, page):
     """XDW_GetThumbnailImageHandle(doc_handle, page) --> Bitmap"""
     handle = XDW_HGLOBAL()
-    TRY(DLL.XDW_GetThumbnailImageHandle, doc_handle, page, byref(handle), NULL)
+    TRY(_functions.XDW_GetThumbnailImageHandle, doc_handle, page, byref(handle), NULL)
     windll.kernel32.GlobalLock.argtypes = [c_void_p]
     windll.kernel32.GlobalLock.restype = c_void_p
     bitmap = Bitmap(windll.kernel32.GlobalLock(handle))
@@ -2483,7 +2722,7 @@ def XDW_GetPageUserAttribute(doc_handle, page, attr_name): pass
 
 @RAISE
 def XDW_SetPageUserAttribute(doc_handle, page, attr_name, attr_val):
-    return DLL.XDW_SetPageUserAttribute(doc_handle, page, attr_name, attr_val, len(attr_val or b""), NULL)
+    return _functions.XDW_SetPageUserAttribute(doc_handle, page, attr_name, attr_val, len(attr_val or b""), NULL)
 
 @APPEND(NULL)
 def XDW_ReducePageNoise(doc_handle, page, level): pass
@@ -2507,23 +2746,27 @@ def XDW_InsertDocumentW(doc_handle, page, input_path): pass
 
 @RAISE
 def XDW_ApplyOcr(doc_handle, page, ocr_engine, option):
-    return DLL.XDW_ApplyOcr(doc_handle, page, ocr_engine, ptr(option), NULL)
+    return _functions.XDW_ApplyOcr(doc_handle, page, ocr_engine, ptr(option), NULL)
 
 @APPEND(NULL)
 def XDW_RotatePageAuto(doc_handle, page): pass
 
 @RAISE
 def XDW_CreateBinder(output_path, binder_init_dat):
-    return DLL.XDW_CreateBinder(output_path, ptr(binder_init_dat), NULL)
+    return _functions.XDW_CreateBinder(output_path, ptr(binder_init_dat), NULL)
 
 @XDWVERSION(8)
 @RAISE
 def XDW_CreateBinderW(output_path, binder_init_dat):
-    return DLL.XDW_CreateBinder(output_path, ptr(binder_init_dat), NULL)
+    return _functions.XDW_CreateBinder(output_path, ptr(binder_init_dat), NULL)
 
 @APPEND(NULL)
 def XDW_InsertDocumentToBinder(doc_handle, pos, input_path): pass
 
+@XDWVERSION(8)
+@APPEND(NULL)
+def XDW_InsertDocumentToBinderW(doc_handle, pos, input_path): pass
+
 @APPEND(NULL)
 def XDW_GetDocumentFromBinder(doc_handle, pos, output_path): pass
 
@@ -2558,21 +2801,21 @@ def XDW_OptimizeDocumentW(input_path, output_path): pass
 
 @RAISE
 def XDW_ProtectDocument(input_path, output_path, protect_type, module_option, protect_option):
-    return DLL.XDW_ProtectDocument(input_path, output_path, protect_type, byref(module_option), byref(protect_option))
+    return _functions.XDW_ProtectDocument(input_path, output_path, protect_type, byref(module_option), byref(protect_option))
 
 @XDWVERSION(8)
 @RAISE
 def XDW_ProtectDocumentW(input_path, output_path, protect_type, module_option, protect_option):
-    return DLL.XDW_ProtectDocument(input_path, output_path, protect_type, byref(module_option), byref(protect_option))
+    return _functions.XDW_ProtectDocument(input_path, output_path, protect_type, byref(module_option), byref(protect_option))
 
 @RAISE
 def XDW_CreateXdwFromImageFileAndInsertDocument(doc_handle, page, input_path, create_option):
-    return DLL.XDW_CreateXdwFromImageFileAndInsertDocument(doc_handle, page, input_path, byref(create_option), NULL)
+    return _functions.XDW_CreateXdwFromImageFileAndInsertDocument(doc_handle, page, input_path, byref(create_option), NULL)
 
 @XDWVERSION(8)
 @RAISE
 def XDW_CreateXdwFromImageFileAndInsertDocumentW(doc_handle, page, input_path, create_option):
-    return DLL.XDW_CreateXdwFromImageFileAndInsertDocument(doc_handle, page, input_path, byref(create_option), NULL)
+    return _functions.XDW_CreateXdwFromImageFileAndInsertDocument(doc_handle, page, input_path, byref(create_option), NULL)
 
 @APPEND(NULL)
 def XDW_GetDocumentAttributeNumber(doc_handle): pass
@@ -2631,7 +2874,7 @@ def XDW_GetLinkRootFolderNumberW(): pass
 
 def XDW_GetPageTextInformation(doc_handle, page):
     gpti_info = XDW_GPTI_INFO()  # right?
-    TRY(DLL.XDW_GetPageTextInformation, doc_handle, page, byref(gpti_info), NULL)
+    TRY(_functions.XDW_GetPageTextInformation, doc_handle, page, byref(gpti_info), NULL)
     return gpti_info
 
 @APPEND(NULL)
@@ -2639,14 +2882,14 @@ def XDW_GetDocumentSignatureNumber(doc_handle): pass
 
 def XDW_AddAnnotationOnParentAnnotation(doc_handle, ann_handle, ann_type, hpos, vpos, init_dat):
     new_ann_handle = XDW_ANNOTATION_HANDLE()
-    TRY(DLL.XDW_AddAnnotationOnParentAnnotation, doc_handle, ann_handle, ann_type, hpos, vpos, ptr(init_dat), byref(new_ann_handle), NULL)
+    TRY(_functions.XDW_AddAnnotationOnParentAnnotation, doc_handle, ann_handle, ann_type, hpos, vpos, ptr(init_dat), byref(new_ann_handle), NULL)
     return new_ann_handle
 
 @RAISE
 def XDW_SignDocument(input_path, output_path, option, module_option):
     module_status = XDW_SIGNATURE_MODULE_STATUS()
     try:
-        TRY(DLL.XDW_SignDocument, input_path, output_path, ptr(option), ptr(module_option), NULL, ptr(module_status))
+        TRY(_functions.XDW_SignDocument, input_path, output_path, ptr(option), ptr(module_option), NULL, ptr(module_status))
     except SignatureModuleError as e:
         if module_status.nSignatureType == XDW_SIGNATURE_STAMP:
             msg = XDW_SIGNATURE_STAMP_ERROR[module_status.nErrorStatus]
@@ -2660,7 +2903,7 @@ def XDW_SignDocument(input_path, output_path, option, module_option):
 def XDW_SignDocumentW(input_path, output_path, option, module_option):
     module_status = XDW_SIGNATURE_MODULE_STATUS()
     try:
-        TRY(DLL.XDW_SignDocument, input_path, output_path, ptr(option), ptr(module_option), NULL, ptr(module_status))
+        TRY(_functions.XDW_SignDocument, input_path, output_path, ptr(option), ptr(module_option), NULL, ptr(module_status))
     except SignatureModuleError as e:
         if module_status.nSignatureType == XDW_SIGNATURE_STAMP:
             msg = XDW_SIGNATURE_STAMP_ERROR[module_status.nErrorStatus]
@@ -2677,12 +2920,12 @@ def XDW_GetSignatureInformation(doc_handle, pos):
     Note that accessing module_info.pSignerCert is expected to raise error like GPE.
     """
     signature_info = XDW_SIGNATURE_INFO_V5()
-    TRY(DLL.XDW_GetSignatureInformation, doc_handle, pos, byref(signature_info), NULL, NULL, NULL)
+    TRY(_functions.XDW_GetSignatureInformation, doc_handle, pos, byref(signature_info), NULL, NULL, NULL)
     if signature_info.nSignatureType == XDW_SIGNATURE_STAMP:
         module_info = XDW_SIGNATURE_STAMP_INFO_V5()
         module_status = XDW_SIGNATURE_MODULE_STATUS()
         try:
-            TRY(DLL.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
+            TRY(_functions.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
         except SignatureModuleError as e:
             raise SignatureModuleError("signature type {0}, error status {1}".format(
                     module_status.nSignatureType, module_status.nErrorStatus))
@@ -2693,13 +2936,13 @@ def XDW_GetSignatureInformation(doc_handle, pos):
         module_status = XDW_SIGNATURE_MODULE_STATUS()
         try:  # Try to get certificate size.
             #module_info.pSignerCert = NULL
-            TRY(DLL.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
+            TRY(_functions.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
         except SignatureModuleError as e:
             raise SignatureModuleError("signature type {0}, error status {1}".format( module_status.nSignatureType, module_status.nErrorStatus))
         signer_cert = c_char * module_info.nSignerCertSize
         module_info.pSignerCert = byref(signer_cert)
         try:  # Actually get certificate and other attributes.
-            TRY(DLL.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
+            TRY(_functions.XDW_GetSignatureInformation, doc_handle, pos, ptr(signature_info), ptr(module_info), NULL, ptr(module_status))
         except SignatureModuleError as e:
             raise SignatureModuleError("signature type {0}, error status {1}".format(module_status.nSignatureType, module_status.nErrorStatus))
         # N.B. signature_info.nSignedTime is UTC Unix time.
@@ -2711,7 +2954,7 @@ def XDW_UpdateSignatureStatus(doc_handle, pos, module_option, module_status):
     """The 3rd argument, module_option, should currently be specified as NULL."""
     module_status = XDW_SIGNATURE_MODULE_STATUS()
     try:
-        TRY(DLL.XDW_UpdateSignatureStatus, doc_handle, pos, NULL, NULL, ptr(module_status))
+        TRY(_functions.XDW_UpdateSignatureStatus, doc_handle, pos, NULL, NULL, ptr(module_status))
     except SignatureModuleError as e:
         raise SignatureModuleError("signature type {0}, error status {1}".format(module_status.nSignatureType, module_status.nErrorStatus))
     # Note that signature information (XDW_GetSignatureInformation()) may be altered.
@@ -2719,15 +2962,15 @@ def XDW_UpdateSignatureStatus(doc_handle, pos, module_option, module_status):
 
 @RAISE
 def XDW_GetOcrImage(doc_handle, page, output_path, img_option):
-    return DLL.XDW_GetOcrImage(doc_handle, page, output_path, byref(img_option), NULL)
+    return _functions.XDW_GetOcrImage(doc_handle, page, output_path, byref(img_option), NULL)
 
 @XDWVERSION(8)
 @RAISE
 def XDW_GetOcrImageW(doc_handle, page, output_path, img_option):
-    return DLL.XDW_GetOcrImage(doc_handle, page, output_path, byref(img_option), NULL)
+    return _functions.XDW_GetOcrImage(doc_handle, page, output_path, byref(img_option), NULL)
 
 def XDW_SetOcrData(doc_handle, page, ocr_textinfo):
-    TRY(DLL.XDW_SetOcrData, doc_handle, page, byref(ocr_textinfo) if ocr_textinfo else NULL, NULL)
+    TRY(_functions.XDW_SetOcrData, doc_handle, page, byref(ocr_textinfo) if ocr_textinfo else NULL, NULL)
 
 @APPEND(NULL)
 def XDW_GetDocumentAttributeNumberInBinder(doc_handle, pos): pass
@@ -2746,45 +2989,45 @@ def XDW_CreateXdwFromImagePdfFile(input_path, output_path): pass
 
 def XDW_FindTextInPage(doc_handle, page, text, find_text_option):
     found_handle = XDW_FOUND_HANDLE()
-    TRY(DLL.XDW_FindTextInPage, doc_handle, page, text, ptr(find_text_option), byref(found_handle), NULL)
+    TRY(_functions.XDW_FindTextInPage, doc_handle, page, text, ptr(find_text_option), byref(found_handle), NULL)
     return found_handle
 
 def XDW_FindNext(found_handle):
-    TRY(DLL.XDW_FindNext, byref(found_handle), NULL)
+    TRY(_functions.XDW_FindNext, byref(found_handle), NULL)
     return found_handle
 
 @RAISE
 def XDW_GetNumberOfRectsInFoundObject(found_handle):
-    return DLL.XDW_GetNumberOfRectsInFoundObject(found_handle, NULL)
+    return _functions.XDW_GetNumberOfRectsInFoundObject(found_handle, NULL)
 
 def XDW_GetRectInFoundObject(found_handle, pos):
     rect = XDW_RECT()
     status = c_int()
-    TRY(DLL.XDW_GetRectInFoundObject, found_handle, pos, byref(rect), byref(status), NULL)
+    TRY(_functions.XDW_GetRectInFoundObject, found_handle, pos, byref(rect), byref(status), NULL)
     return (rect, status.value)
 
 @RAISE
 def XDW_CloseFoundHandle(found_handle):
-    return DLL.XDW_CloseFoundHandle(found_handle)
+    return _functions.XDW_CloseFoundHandle(found_handle)
 
 @STRING
 def XDW_GetAnnotationUserAttribute(ann_handle, attr_name): pass
 
 @RAISE
 def XDW_SetAnnotationUserAttribute(doc_handle, ann_handle, attr_name, attr_val):
-    return DLL.XDW_SetAnnotationUserAttribute(doc_handle, ann_handle, attr_name, attr_val, len(attr_val or b""), NULL)
+    return _functions.XDW_SetAnnotationUserAttribute(doc_handle, ann_handle, attr_name, attr_val, len(attr_val or b""), NULL)
 
 @APPEND(NULL)
 def XDW_StarchAnnotation(doc_handle, ann_handle, starch): pass
 
 @RAISE
 def XDW_ReleaseProtectionOfDocument(input_path, output_path, release_protection_option):
-    return DLL.XDW_ReleaseProtectionOfDocument(input_path, output_path, byref(release_protection_option))
+    return _functions.XDW_ReleaseProtectionOfDocument(input_path, output_path, byref(release_protection_option))
 
 @XDWVERSION(8)
 @RAISE
 def XDW_ReleaseProtectionOfDocumentW(input_path, output_path, release_protection_option):
-    return DLL.XDW_ReleaseProtectionOfDocument(input_path, output_path, byref(release_protection_option))
+    return _functions.XDW_ReleaseProtectionOfDocument(input_path, output_path, byref(release_protection_option))
 
 @QUERY(XDW_PROTECTION_INFO, NULL)
 def XDW_GetProtectionInformation(input_path): pass
@@ -2804,7 +3047,7 @@ def XDW_GetAnnotationCustomAttributeNumber(ann_handle): pass
 
 @RAISE
 def XDW_SetAnnotationCustomAttribute(doc_handle, ann_handle, attr_name, attr_type, attr_val):
-    return DLL.XDW_SetAnnotationCustomAttribute(doc_handle, ann_handle, attr_name, attr_type, attr_val, NULL)
+    return _functions.XDW_SetAnnotationCustomAttribute(doc_handle, ann_handle, attr_name, attr_type, attr_val, NULL)
 
 @UNICODE
 def XDW_GetPageTextToMemoryW(doc_handle, page): pass
@@ -2835,9 +3078,9 @@ def XDW_SetDocumentAttributeW(doc_handle, attr_name, attr_type, attr_val, text_t
 
 def XDW_GetDocumentNameInBinderW(doc_handle, pos, codepage=932):
     text_type = c_int()
-    size = TRY(DLL.XDW_GetDocumentNameInBinderW, doc_handle, pos, NULL, 0, byref(text_type), codepage, NULL)
+    size = TRY(_functions.XDW_GetDocumentNameInBinderW, doc_handle, pos, NULL, 0, byref(text_type), codepage, NULL)
     doc_name = create_unicode_buffer(size)
-    TRY(DLL.XDW_GetDocumentNameInBinderW, doc_handle, pos, byref(doc_name), size, byref(text_type), codepage, NULL)
+    TRY(_functions.XDW_GetDocumentNameInBinderW, doc_handle, pos, byref(doc_name), size, byref(text_type), codepage, NULL)
     return (doc_name.value, text_type.value)
 
 @APPEND(NULL)
@@ -2846,7 +3089,7 @@ def XDW_SetDocumentNameInBinderW(doc_handle, pos, doc_name, text_type, codepage=
 def XDW_GetOriginalDataInformationW(doc_handle, org_data, codepage=932):
     text_type = c_int()
     orgdata_infow = XDW_ORGDATA_INFOW()
-    TRY(DLL.XDW_GetOriginalDataInformationW, doc_handle, org_data, byref(orgdata_infow), byref(text_type), codepage, NULL)
+    TRY(_functions.XDW_GetOriginalDataInformationW, doc_handle, org_data, byref(orgdata_infow), byref(text_type), codepage, NULL)
     return (orgdata_infow, text_type.value)  # N.B. orgdata_infow.nDate is UTC Unix time.
 
 @XDWVERSION(8)
@@ -2862,7 +3105,7 @@ def XDW_GroupAnnotations(doc_handle, page, ann_handle, indexes):
     new_ann_handle = XDW_ANNOTATION_HANDLE()
     count = len(indexes)
     indexlist = (c_int * count)(*indexes)
-    TRY(DLL.XDW_GroupAnnotations, doc_handle, page, ann_handle, byref(indexlist), count, byref(new_ann_handle), NULL)
+    TRY(_functions.XDW_GroupAnnotations, doc_handle, page, ann_handle, byref(indexlist), count, byref(new_ann_handle), NULL)
     return new_ann_handle
 
 @XDWVERSION(8)
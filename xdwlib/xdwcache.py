@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""xdwcache.py -- persistent cache of text and properties of documents
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import time
+import json
+import sqlite3
+import datetime
+
+from .xdwapi import *
+from .common import *
+from .page import PageTable, iter_page_text
+from .xdwfile import xdwopen
+
+
+__all__ = ("TextCache", "TextRecord", "text_cache", "enable_cache")
+
+CACHE_FILENAME = "xdwcache.sqlite3"
+CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime       INTEGER NOT NULL,
+    digest      TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    pages       INTEGER NOT NULL,
+    attributes  TEXT NOT NULL,
+    properties  TEXT NOT NULL,
+    bytes       INTEGER NOT NULL,
+    atime       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_atime ON files (atime);
+CREATE TABLE IF NOT EXISTS pages (
+    path        TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    content     TEXT,
+    annotation  TEXT,
+    info        TEXT NOT NULL,
+    PRIMARY KEY (path, page)
+);
+"""
+
+
+def _dump_value(value):
+    if isinstance(value, datetime.date):
+        return {"date": value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        return datetime.datetime.strptime(value["date"], "%Y-%m-%d").date()
+    return value
+
+
+class TextRecord(object):
+
+    """Text, properties and page information of a file kept in TextCache.
+
+    Methods to get text have the same names as those of Document and
+    Binder, and take optional absolute page range [start, stop).
+    Document attributes are accessible as title, Title or '%Title' etc.
+    """
+
+    def __init__(self, path, type, pages, attributes, properties,
+            contents, annotations, page_table):
+        self.path = path
+        self.type = type
+        self.pages = pages
+        self.attributes = attributes  # {'%Title': value, ...}
+        self.properties = properties  # [(name, value), ...] in order
+        self.contents = contents
+        self.annotations = annotations
+        self.page_table = page_table
+
+    def __repr__(self):
+        return "{cls}({path}; {pages} pages)".format(
+                cls=self.__class__.__name__, path=self.path, pages=self.pages)
+
+    def __getattr__(self, name):
+        attributes = self.__dict__.get("attributes", {})
+        for inner in attributes:
+            if name in (outer_attribute_name(cp(inner)), inner[1:], inner):
+                return attributes[inner]
+        raise AttributeError(name)
+
+    @staticmethod
+    def read(xdwfile):
+        """Read text, properties and page information of Document/Binder."""
+        handle = xdwfile.handle
+        pages = xdwfile.pages
+        contents = xdwfile._bulk_content_text()
+        annotations = []
+        kind = "ANNOTATION" if contents else None
+        texts = []
+        for (_, content, annotation) in iter_page_text(
+                handle, 0, pages, kind=kind):
+            texts.append(content)
+            annotations.append(annotation)
+        attributes = dict(
+                (inner, getattr(xdwfile, inner[1:])) for inner
+                in (uc(name) for name in XDW_DOCUMENT_ATTRIBUTE_W))
+        properties = [xdwfile.get_property(order)
+                for order in range(xdwfile.properties)]
+        return TextRecord(xdwfile.pathname(), xdwfile.type, pages,
+                attributes, properties, tuple(contents or texts),
+                tuple(annotations), PageTable.read(handle, 0, pages))
+
+    def has_property(self, name):
+        """Test if user defined property exists."""
+        return any(k == name for (k, _) in self.properties)
+
+    def get_property(self, name, default=None):
+        """Get user defined property like XDWFile.get_property()."""
+        if isinstance(name, int):
+            return self.properties[name]
+        for (k, v) in self.properties:
+            if k == name:
+                return v
+        return default
+
+    def _range(self, start, stop):
+        return range(start, self.pages if stop is None else stop)
+
+    def content_text(self, type=None, start=0, stop=None):
+        """Get content text of absolute pages [start, stop).
+
+        type    None | 'IMAGE' | 'APPLICATION'
+                None means both.
+        """
+        if type:
+            types = self.page_table["type"]
+            type = type.upper()
+            return joinf(PSEP, [self.contents[pos]
+                    if XDW_PAGE_TYPE[types[pos]] == type else None
+                    for pos in self._range(start, stop)])
+        return joinf(PSEP, self.contents[start:stop])
+
+    def annotation_text(self, start=0, stop=None):
+        """Get text in annotations on absolute pages [start, stop)."""
+        return joinf(PSEP, self.annotations[start:stop])
+
+    def fulltext(self, start=0, stop=None):
+        """Get content and annotation text of absolute pages [start, stop)."""
+        return joinf(PSEP, [
+                joinf(ASEP, [self.contents[pos], self.annotations[pos]])
+                for pos in self._range(start, stop)])
+
+
+class TextCache(object):
+
+    """Persistent cache of text and properties of DocuWorks files.
+
+    directory   (str) directory to keep the cache database in
+    max_size    (int) max total bytes of text and information kept
+    max_files   (int) max number of files kept
+
+    Content text, annotation text and page information of each page,
+    document attributes and user defined properties are kept in a
+    SQLite database, keyed by absolute path.  Entries are valid while
+    size, modification time and a digest of leading and trailing bytes
+    of the file are unchanged.  Least recently used files are evicted
+    when either limit is exceeded.
+
+    The cache can be shared by processes, but a TextCache object is not
+    thread-safe.
+    """
+
+    def __init__(self, directory, max_size=256 * 1024 * 1024,
+            max_files=10000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(
+                os.path.join(directory, CACHE_FILENAME), timeout=30)
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            self.db.executescript(
+                    "PRAGMA auto_vacuum = FULL;"
+                    "DROP TABLE IF EXISTS files;"
+                    "DROP TABLE IF EXISTS pages;"
+                    "VACUUM;")
+            self.db.execute("PRAGMA user_version = {0}".format(CACHE_VERSION))
+        self.db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return "{cls}({dir}; {n} files, {hits} hits, {misses} misses)" \
+                .format(cls=self.__class__.__name__, dir=self.directory,
+                        n=len(self), hits=self.hits, misses=self.misses)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def size(self):
+        """Get total bytes of text and information kept."""
+        return self.db.execute(
+                "SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path):
+        """Get TextRecord of file if cached and valid, or None."""
+        key = self._key(path)
+        row = self.db.execute(
+                "SELECT size, mtime, digest, type, pages, attributes, "
+                "properties FROM files WHERE path = ?", (key,)).fetchone()
+        if row is None or tuple(row[:3]) != file_stamp(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        (_, _, _, type, pages, attributes, properties) = row
+        contents = [None] * pages
+        annotations = [None] * pages
+        table = PageTable()
+        cols = [table.columns[name] for (name, _) in PageTable.COLUMNS]
+        for (page, content, annotation, info) in self.db.execute(
+                "SELECT page, content, annotation, info FROM pages "
+                "WHERE path = ? ORDER BY page", (key,)):
+            contents[page] = content
+            annotations[page] = annotation
+            for (col, value) in zip(cols, json.loads(info)):
+                col.append(value)
+        with self.db:
+            self.db.execute("UPDATE files SET atime = ? WHERE path = ?",
+                    (time.time(), key))
+        attributes = dict((k, _load_value(v)) for (k, v)
+                in json.loads(attributes).items())
+        properties = [(k, _load_value(v)) for (k, v)
+                in json.loads(properties)]
+        return TextRecord(path, type, pages, attributes, properties,
+                tuple(contents), tuple(annotations), table)
+
+    def store(self, xdwfile):
+        """Read Document/Binder and keep it in the cache.
+
+        Returns TextRecord.  Modified documents should be saved in
+        advance, or what is stored does not match the file.
+        """
+        record = TextRecord.read(xdwfile)
+        key = self._key(xdwfile.pathname())
+        size, mtime, digest = file_stamp(xdwfile.pathname())
+        attributes = json.dumps(dict((k, _dump_value(v)) for (k, v)
+                in record.attributes.items()), ensure_ascii=False)
+        properties = json.dumps([(k, _dump_value(v)) for (k, v)
+                in record.properties], ensure_ascii=False)
+        rows = []
+        nbytes = len(attributes) + len(properties)
+        for (pos, info) in enumerate(zip(*(record.page_table[name]
+                for (name, _) in PageTable.COLUMNS))):
+            content = record.contents[pos]
+            annotation = record.annotations[pos]
+            info = json.dumps(info)
+            nbytes += len(info) + sum(len(s.encode("utf-8"))
+                    for s in (content, annotation) if s)
+            rows.append((key, pos, content, annotation, info))
+        with self.db:
+            self.db.execute("DELETE FROM pages WHERE path = ?", (key,))
+            self.db.execute(
+                    "INSERT OR REPLACE INTO files VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, size, mtime, digest, record.type, record.pages,
+                    attributes, properties, nbytes, time.time()))
+            self.db.executemany(
+                    "INSERT INTO pages VALUES (?, ?, ?, ?, ?)", rows)
+        self._evict()
+        return record
+
+    def get(self, xdwfile):
+        """Get TextRecord of open Document/Binder, storing it if required."""
+        return self.lookup(xdwfile.pathname()) or self.store(xdwfile)
+
+    def read(self, path, authenticate=True):
+        """Get TextRecord of file, opening it read-only if not cached."""
+        record = self.lookup(path)
+        if record is not None:
+            return record
+        with xdwopen(path, readonly=True, authenticate=authenticate) as doc:
+            return self.store(doc)
+
+    def discard(self, path):
+        """Forget a file."""
+        key = self._key(path)
+        with self.db:
+            self.db.execute("DELETE FROM pages WHERE path = ?", (key,))
+            self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+
+    def clear(self):
+        """Forget all files."""
+        with self.db:
+            self.db.execute("DELETE FROM pages")
+            self.db.execute("DELETE FROM files")
+
+    def close(self):
+        """Close the cache database."""
+        self.db.close()
+
+    def _evict(self):
+        count, total = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM files"
+                ).fetchone()
+        if count <= self.max_files and total <= self.max_size:
+            return
+        victims = []
+        for (key, nbytes) in self.db.execute(
+                "SELECT path, bytes FROM files ORDER BY atime"):
+            if count <= self.max_files and total <= self.max_size:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= nbytes
+        with self.db:
+            self.db.executemany("DELETE FROM pages WHERE path = ?", victims)
+            self.db.executemany("DELETE FROM files WHERE path = ?", victims)
+
+
+_CACHE = None
+
+
+def text_cache():
+    """Get the process-wide TextCache, or None if not enabled."""
+    return _CACHE
+
+
+def enable_cache(directory, max_size=256 * 1024 * 1024, max_files=10000):
+    """Enable or disable the process-wide persistent text cache.
+
+    directory   (str) directory to keep the cache database in; None to
+                disable
+    max_size    (int) max total bytes of text and information kept
+    max_files   (int) max number of files kept
+
+    While enabled, content_text(), annotation_text() and fulltext() of
+    documents and binders opened read-only are given from the cache;
+    see TextCache.
+    """
+    global _CACHE
+    if _CACHE is not None:
+        _CACHE.close()
+    _CACHE = TextCache(directory, max_size=max_size, max_files=max_files) \
+            if directory else None
+    return _CACHE
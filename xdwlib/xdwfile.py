@@ -26,7 +26,7 @@ from .observer import Subject, Observer
 
 
 __all__ = (
-        "XDWFile", "PageForm", "AttachmentList", "Attachment",
+        "XDWFile", "DocumentAttribute", "PageForm", "AttachmentList", "Attachment",
         "StampSignature", "PKISignature",
         "xdwopen", "create_sfx", "extract_sfx", "optimize", "copy",
         "protection_info", "protect", "unprotect", "sign",
@@ -44,7 +44,9 @@ except NameError:
 @atexit.register
 def atexithandler():
     """Close all files and perform finalization before finishing process."""
-    for handle in VALID_DOCUMENT_HANDLES:
+    if not backend_loaded():
+        return
+    for handle in list(VALID_DOCUMENT_HANDLES):
         try:
             XDW_CloseDocumentHandle(handle)
         except:
@@ -96,7 +98,19 @@ def xdwopen(path, readonly=False, authenticate=True, autosave=False):
     """General opener.
 
     Returns Document or Binder object.
+
+    If the document pool is enabled, documents opened read-only are
+    taken from the pool; see xdwpool.enable_pool().
     """
+    from .xdwpool import document_pool
+    pool = document_pool()
+    if readonly and pool is not None:
+        return pool.open(path, authenticate=authenticate)
+    return _xdwopen(path, readonly=readonly, authenticate=authenticate,
+            autosave=autosave)
+
+
+def _xdwopen(path, readonly=False, authenticate=True, autosave=False):
     from .document import Document
     from .binder import Binder
     XDW_TYPES = {".XDW": Document, ".XBD": Binder}
@@ -139,7 +153,7 @@ def extract_sfx(input_path, output_path=None):
         XDW_ExtractFromSfxDocumentW(input_path, output_path)
     # Created file can be either document or binder.  We have to examine
     # which type of file was generated and rename if needed.
-    doc = xdwopen(output_path, readonly=True)
+    doc = _xdwopen(output_path, readonly=True)  # not from pool
     doctype = doc.type
     doc.close()
     if doctype == XDW_DT_DOCUMENT:
@@ -390,8 +404,7 @@ class AttachmentList(Subject):
         pos = self._pos(pos, append=True)
         XDW_InsertOriginalData(self.doc.handle, pos + 1, path)
         self.size += 1
-        att = self.attachment(pos)
-        self.attach(att, EV_ATT_INSERTED)
+        self.attach(Attachment(self.doc, pos), EV_ATT_INSERTED)
 
     def delete(self, pos):
         """Remove an attachment, aka original data."""
@@ -419,19 +432,6 @@ class Attachment(Observer):
         self.datetime = fromunixtime(info.nDate)
         self.name = info.szName
 
-    def update(self, event):
-        """Update self as an observer."""
-        if not isinstance(event, Notification):
-            raise TypeError("not an instance of Notification class")
-        if event.type == EV_ATT_REMOVED:
-            if event.para[0] < self.pos:
-                self.pos -= 1
-        elif event.type == EV_ATT_INSERTED:
-            if event.para[0] < self.pos:
-                self.pos += 1
-        else:
-            raise ValueError("Illegal event type: {0}".format(event.type))
-
     def save(self, path=None):
         """Save attached file.
 
@@ -442,9 +442,42 @@ class Attachment(Observer):
         return path
 
 
+class DocumentAttribute(object):
+
+    """Descriptor for document attribute e.g. title, author."""
+
+    def __init__(self, name):
+        self.name = name  # inner attribute name e.g. %Title
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        t, value, _ = XDW_GetDocumentAttributeByNameW(
+                obj.handle, self.name, codepage=CP)
+        return makevalue(t, value)
+
+    def __set__(self, obj, value):
+        t, value = typevalue(value)
+        XDW_SetDocumentAttributeW(
+                obj.handle, self.name, t, value,
+                XDW_TEXT_UNICODE_IFNECESSARY, codepage=CP)
+
+
 class XDWFile(object):
 
-    """Docuworks file, XDW or XBD."""
+    """Docuworks file, XDW or XBD.
+
+    Document attributes are accessible as title, Title or '%Title' etc.
+
+    Set bulk_text to True to get content text of all pages at once by
+    XDW_GetFullText(W) in content_text() and fulltext().  It is False by
+    default, i.e. text is read page by page.  It also falls back to
+    reading page by page when the output does not match the pages.
+    """
+
+    bulk_text = False
+    _pool_entry = None  # see xdwpool.DocumentPool
+    _text_record = None  # see xdwcache.TextCache
 
     @staticmethod
     def all_attributes():  # for debugging
@@ -478,6 +511,8 @@ class XDWFile(object):
                 ext.lower(), "DOCUMENT")
         self.protection = protection_info(path)
         self.handle = None
+        self._annotation_catalog = None
+        self._text_record = None
 
     def open(self, readonly=False, authenticate=True, autosave=False):
         """Opener."""
@@ -496,6 +531,8 @@ class XDWFile(object):
         else:
             self.handle = XDW_OpenDocumentHandleW(self.pathname(), open_mode)
         self.register()
+        self._annotation_catalog = None
+        self._text_record = None
         # Set document properties.
         docinfo = XDW_GetDocumentInformation(self.handle)
         self.pages = docinfo.nPages
@@ -536,6 +573,64 @@ class XDWFile(object):
         """Get full pathname with extension."""
         return os.path.join(self.dir, self.filename())
 
+    def annotation_catalog(self, userattrs=()):
+        """Get AnnotationCatalog of all annotations.
+
+        userattrs   (sequence of str) names of user attributes to index
+
+        The catalog is read in one pass at first and then kept up to date
+        through this object.  It is read again if new user attribute names
+        are given.
+
+        Example:
+
+            catalog = doc.annotation_catalog(userattrs=["ReviewId"])
+            for (page, handle) in catalog.of_type("STAMP"):
+                ...
+            catalog.with_property("Approved", True)
+            catalog.with_userattr("ReviewId", b"R-1024")
+        """
+        from .annotation import AnnotationCatalog
+        catalog = self._annotation_catalog
+        names = [uc(name) for name in userattrs]
+        if catalog is None or set(names) - set(catalog.userattrs):
+            if catalog is not None:
+                names = list(catalog.userattrs) + names
+            catalog = AnnotationCatalog.read(
+                    self, userattrs=sorted(set(names)))
+            self._annotation_catalog = catalog
+        return catalog
+
+    def snapshot(self, userattrs=()):
+        """Get DocumentSnapshot, a picklable read-only copy.
+
+        userattrs   (sequence of str) names of user attributes to keep
+        """
+        from .snapshot import DocumentSnapshot
+        return DocumentSnapshot.read(self, userattrs=userattrs)
+
+    def _bulk_content_text(self):
+        """Get list of content text of all pages at once, or None."""
+        if not self.bulk_text or self.pages < 2:
+            return None
+        from .page import read_fulltext
+        return read_fulltext(self.handle, self.pages)
+
+    def _cached_text(self):
+        """Get TextRecord from the text cache, or None.
+
+        Text is cached only for files opened read-only; see enable_cache().
+        """
+        if not self.readonly:
+            return None
+        from .xdwcache import text_cache
+        cache = text_cache()
+        if cache is None:
+            return None
+        if self._text_record is None:
+            self._text_record = cache.get(self)
+        return self._text_record
+
     def update_pages(self):
         """Update number of pages; used after insert multiple pages in."""
         docinfo = XDW_GetDocumentInformation(self.handle)
@@ -546,7 +641,10 @@ class XDWFile(object):
         XDW_SaveDocument(self.handle)
 
     def close(self):
-        """Close document."""
+        """Close document, or give it back if taken from document pool."""
+        if self._pool_entry is not None:
+            self._pool_entry.pool.release(self)
+            return
         if self._autosave:
             self.save()
         XDW_CloseDocumentHandle(self.handle)
@@ -569,28 +667,16 @@ class XDWFile(object):
         self._show_annotations = value
         return
 
-    def __getattribute__(self, name):
-        attribute_name = inner_attribute_name(name)
-        if attribute_name not in XDW_DOCUMENT_ATTRIBUTE_W:
-            self_signatures = object.__getattribute__(self, "signatures")
-            if name == "status" and self_signatures:
-                self_signature = object.__getattribute__(self, "signature")
-                self_signature(0)  # Update document verification status.
-            return object.__getattribute__(self, name)
-        self_handle = object.__getattribute__(self, "handle")
-        t, value, _ = XDW_GetDocumentAttributeByNameW(
-                self_handle, attribute_name, codepage=CP)
-        return makevalue(t, value)
+    @property
+    def status(self):
+        """Document verification status."""
+        if self.signatures:
+            self.signature(0)  # Update document verification status.
+        return self._status
 
-    def __setattr__(self, name, value):
-        attribute_name = inner_attribute_name(name)
-        if attribute_name in XDW_DOCUMENT_ATTRIBUTE_W:
-            t, value = typevalue(value)
-            XDW_SetDocumentAttributeW(
-                    self.handle, attribute_name, t, value,
-                    XDW_TEXT_UNICODE_IFNECESSARY, codepage=CP)
-            return
-        object.__setattr__(self, name, value)
+    @status.setter
+    def status(self, value):
+        self._status = value
 
     def __enter__(self):
         return self
@@ -605,10 +691,7 @@ class XDWFile(object):
         default     value to return if no attribute named name exist
         """
         try:
-            if XDWVER < 8:
-                return XDW_GetUserAttribute(self.handle, cp(name))
-            else:
-                return XDW_GetUserAttributeW(self.handle, name)
+            return XDW_GetUserAttribute(self.handle, cp(name))
         except InvalidArgError:
             return default
 
@@ -618,10 +701,8 @@ class XDWFile(object):
         name        (str or bytes) attribute name in OEM encoding
         value       (str or bytes) attribute value in OEM encoding
         """
-        if XDWVER < 8:
-            XDW_SetUserAttribute(self.handle, cp(name), value)
-        else:
-            XDW_SetUserAttributeW(self.handle, name, value)
+        # XDWAPI provides no unicode version for user attributes.
+        XDW_SetUserAttribute(self.handle, cp(name), cp(value))
 
     def has_property(self, name):
         """Test if user defined property exists.
@@ -878,6 +959,13 @@ class XDWFile(object):
         return self._process(optimize, output_path=output_path)
 
 
+for _name in XDW_DOCUMENT_ATTRIBUTE_W:
+    _attr = DocumentAttribute(_name)
+    for _alias in (outer_attribute_name(_name), uc(_name)[1:], uc(_name)):
+        setattr(XDWFile, _alias, _attr)  # e.g. title, Title and %Title
+del _name, _attr, _alias
+
+
 class BaseSignature(object):
 
     """Base class for StampSignature and PKISignature."""
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""xdwpool.py -- pool of documents and binders opened read-only
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import copy
+from collections import OrderedDict
+
+from .observer import Subject
+from .xdwfile import VALID_DOCUMENT_HANDLES, _xdwopen
+
+
+__all__ = ("DocumentPool", "document_pool", "enable_pool")
+
+
+class _Entry(object):
+
+    __slots__ = ("pool", "key", "doc", "stamp", "refs")
+
+    def __init__(self, pool, key, doc, stamp):
+        self.pool = pool
+        self.key = key
+        self.doc = doc
+        self.stamp = stamp  # (size, mtime) of file
+        self.refs = 1
+
+
+class DocumentPool(object):
+
+    """Pool of Document/Binder objects opened read-only.
+
+    open() gives the same document again as long as size and modification
+    time of the file are unchanged, instead of opening the file again.
+    Each open() gives a separate object which shares the document handle
+    and has its own pages.  close() of the object only gives it back
+    once, and the pool keeps the document open until evicted.
+
+    capacity    (int) max number of documents kept open by the pool
+
+    Documents not in use are evicted in least recently used order when
+    more than capacity documents are kept.  If all of them are in use,
+    open() gives a document out of the pool, which is closed by close()
+    as usual.  Documents kept by the pool are closed at exit like any
+    other documents; see VALID_DOCUMENT_HANDLES.
+
+    Documents in the pool are shared, so do not modify them.  The pool
+    is not thread-safe.
+    """
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # key -> _Entry, least recent first
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "{cls}({n}/{cap} documents, {hits} hits, {misses} misses)" \
+                .format(cls=self.__class__.__name__, n=len(self.entries),
+                        cap=self.capacity, hits=self.hits,
+                        misses=self.misses)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def open(self, path, authenticate=True):
+        """Get an open Document or Binder; see xdwopen().
+
+        Call close() of the returned object when it is no longer used.
+        """
+        key = (os.path.normcase(os.path.abspath(path)), bool(authenticate))
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.stamp == stamp and self._valid(entry.doc):
+                self.hits += 1
+                entry.refs += 1
+                self.entries.move_to_end(key)
+                return self._lease(entry)
+            self._discard(entry)
+        self.misses += 1
+        self._evict(self.capacity - 1)
+        doc = _xdwopen(path, readonly=True, authenticate=authenticate)
+        if len(self.entries) < self.capacity:
+            entry = self.entries[key] = _Entry(self, key, doc, stamp)
+            return self._lease(entry)
+        return doc
+
+    @staticmethod
+    def _lease(entry):
+        """Get a copy of the pooled document for a caller."""
+        doc = copy.copy(entry.doc)
+        Subject.__init__(doc, limit=entry.doc.observers.limit)
+        doc._pool_entry = entry
+        return doc
+
+    def release(self, doc):
+        """Give back a document; called by close() of the document.
+
+        The document is closed for the caller as usual, i.e. its handle
+        is no longer available.
+        """
+        entry = doc._pool_entry
+        doc._pool_entry = None
+        doc.handle = None
+        entry.refs -= 1
+        if entry.refs:
+            return
+        if self.entries.get(entry.key) is not entry:
+            self._close(entry)  # Discarded while in use.
+        else:
+            self._evict(self.capacity)
+
+    def clear(self):
+        """Close documents not in use and forget those in use.
+
+        Documents in use are closed when they are given back.
+        """
+        for entry in list(self.entries.values()):
+            self._discard(entry)
+
+    @staticmethod
+    def _valid(doc):
+        # atexithandler() or someone else may have closed the handle.
+        return doc.handle in VALID_DOCUMENT_HANDLES
+
+    def _evict(self, size):
+        for entry in list(self.entries.values()):
+            if len(self.entries) <= size:
+                break
+            if not entry.refs:
+                self._discard(entry)
+
+    def _discard(self, entry):
+        del self.entries[entry.key]
+        if not entry.refs:
+            self._close(entry)
+
+    def _close(self, entry):
+        doc = entry.doc
+        if self._valid(doc):
+            doc.close()
+
+
+_POOL = None
+
+
+def document_pool():
+    """Get the process-wide DocumentPool, or None if not enabled."""
+    return _POOL
+
+
+def enable_pool(capacity=8):
+    """Enable or disable the process-wide pool of read-only documents.
+
+    capacity    (int) max number of documents kept open; 0 to disable
+
+    While enabled, xdwopen(path, readonly=True) gives documents from the
+    pool; see DocumentPool.
+    """
+    global _POOL
+    if _POOL is not None:
+        _POOL.clear()
+    _POOL = DocumentPool(capacity) if capacity else None
@@ -0,0 +1,1093 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""xdwsim.py -- simulated DocuWorks API
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import time
+import json
+import itertools
+from functools import wraps
+
+from .xdwapi import *
+
+
+__all__ = ("SimulatedXDWAPI", "SimDocument", "SimPage", "SimAnnotation")
+
+
+SIM_FORMAT = "xdwsim"
+SIM_FORMAT_VERSION = 1
+
+A4 = (21000, 29700)  # portrait, in 1/100 mm
+CODEPAGE = "cp932"
+ALL_PERMISSIONS = (XDW_PERM_DOC_EDIT | XDW_PERM_ANNO_EDIT |
+                   XDW_PERM_PRINT | XDW_PERM_COPY)
+
+DEFAULT_ANNOTATION_SIZE = {
+        XDW_AID_TEXT            : (5000, 1000),
+        XDW_AID_LINK            : (5000, 1000),
+        XDW_AID_STAMP           : (7500, 2500),
+        XDW_AID_BITMAP          : (5000, 5000),
+        }
+
+
+def _obj(arg):
+    """Get the ctypes object referred by byref() or pointer()."""
+    return getattr(arg, "_obj", arg)
+
+
+def _int(arg):
+    """Get int value of handle, ctypes int or their reference."""
+    arg = _obj(arg)
+    if arg is None:
+        return None
+    return getattr(arg, "value", arg)
+
+
+def _text(arg):
+    """Get str value of bytes, str or ctypes string."""
+    arg = _obj(arg)
+    arg = getattr(arg, "value", arg)
+    if isinstance(arg, bytes):
+        return arg.decode(CODEPAGE)
+    return arg
+
+
+def _path(arg):
+    return os.path.abspath(_text(arg))
+
+
+def _size(value, wide):
+    """Size of buffer needed to hold value as a C string."""
+    if isinstance(value, bytes):
+        return len(value) + 1
+    if wide:
+        return len(value.encode("utf-16-le")) + 2
+    return len(value.encode(CODEPAGE)) + 1
+
+
+def _put(buf, value):
+    """Write value to ctypes object buf without overflow."""
+    obj = _obj(buf)
+    if obj is None:
+        return
+    if isinstance(value, str):
+        if obj._type_ is c_char:
+            value = value.encode(CODEPAGE)
+        obj.value = value[:len(obj) - 1]
+    elif isinstance(value, bytes):
+        obj.value = value[:len(obj) - 1]
+    elif isinstance(value, (list, tuple)):  # points
+        points = (XDW_POINT * len(value))(*[XDW_POINT(x, y) for (x, y) in value])
+        memmove(obj, points, min(sizeof(obj), sizeof(points)))
+    elif isinstance(obj, Array):  # int written into raw buffer
+        memmove(obj, byref(c_int(value)), min(sizeof(obj), sizeof(c_int)))
+    else:
+        obj.value = value
+
+
+def _attrvalue(attr_type, arg):
+    """Get Python value from argument given to XDW_Set*Attribute()."""
+    if attr_type == XDW_ATYPE_STRING:
+        return _text(arg)
+    return _int(arg)
+
+
+class SimAnnotation(object):
+
+    """Annotation held by the simulated DocuWorks API."""
+
+    def __init__(self, ann_type, x=0, y=0, width=0, height=0):
+        self.handle = None  # Given by SimulatedXDWAPI while opened.
+        self.type = ann_type
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.attributes = dict()  # {name (bytes): int, str or points}
+        self.properties = dict()  # {name (str): (type, value)}
+        self.userattrs = dict()  # {name (bytes): value (bytes)}
+        self.starch = False
+        self.annotations = []
+
+    def get_attribute(self, name):
+        if name in self.attributes:
+            return self.attributes[name]
+        if name not in XDW_ANNOTATION_ATTRIBUTE:
+            raise InvalidArgError()
+        t, unit, limited = XDW_ANNOTATION_ATTRIBUTE[name]
+        if limited and self.type not in limited:
+            raise InvalidArgError()
+        if t == 1:
+            return ""
+        if t == 2:
+            return [(self.x, self.y)]
+        if self.type == XDW_AID_FUSEN and name.endswith(b"Color"):
+            return XDW_COLOR_FUSEN.default
+        if isinstance(unit, XDWConst):
+            if name in (XDW_ATN_FontStyle, XDW_ATN_FontPitchAndFamily):
+                return 0
+            return unit.default if unit.default in unit else min(unit)
+        return 0
+
+    def to_dict(self):
+        return dict(
+                type=self.type,
+                rect=[self.x, self.y, self.width, self.height],
+                attributes=dict((k.decode(CODEPAGE), v)
+                                for (k, v) in self.attributes.items()),
+                properties=[[k, t, v]
+                            for (k, (t, v)) in self.properties.items()],
+                userattrs=dict((k.decode("latin-1"), v.decode("latin-1"))
+                               for (k, v) in self.userattrs.items()),
+                starch=self.starch,
+                annotations=[ann.to_dict() for ann in self.annotations],
+                )
+
+    @staticmethod
+    def from_dict(d):
+        ann = SimAnnotation(d["type"], *d["rect"])
+        ann.attributes = dict((k.encode(CODEPAGE), v)
+                              for (k, v) in d["attributes"].items())
+        ann.properties = dict((k, (t, v)) for (k, t, v) in d["properties"])
+        ann.userattrs = dict((k.encode("latin-1"), v.encode("latin-1"))
+                             for (k, v) in d["userattrs"].items())
+        ann.starch = d["starch"]
+        ann.annotations = [SimAnnotation.from_dict(a)
+                           for a in d["annotations"]]
+        return ann
+
+
+class SimPage(object):
+
+    """Page held by the simulated DocuWorks API."""
+
+    def __init__(self, width=A4[0], height=A4[1], text="",
+            page_type=XDW_PGT_FROMIMAGE, resolution=200, color=False):
+        self.width, self.height = width, height
+        self.type = page_type
+        self.resolution = resolution
+        self.compress_type = XDW_COMPRESS_NORMAL
+        self.degree = 0
+        self.color = bool(color)
+        self.text = text
+        self.userattrs = dict()
+        self.annotations = []
+
+    def to_dict(self):
+        d = dict(self.__dict__)
+        d["userattrs"] = dict((k.decode("latin-1"), v.decode("latin-1"))
+                              for (k, v) in self.userattrs.items())
+        d["annotations"] = [ann.to_dict() for ann in self.annotations]
+        return d
+
+    @staticmethod
+    def from_dict(d):
+        pg = SimPage()
+        pg.__dict__.update(d)
+        pg.userattrs = dict((k.encode("latin-1"), v.encode("latin-1"))
+                            for (k, v) in d["userattrs"].items())
+        pg.annotations = [SimAnnotation.from_dict(a)
+                          for a in d["annotations"]]
+        return pg
+
+
+class SimDocument(object):
+
+    """Document or binder held by the simulated DocuWorks API."""
+
+    def __init__(self, doc_type=XDW_DT_DOCUMENT, pages=None):
+        self.type = doc_type
+        self.pages = list(pages or [])  # SimPage's; for document
+        self.documents = []  # [name, SimDocument]'s; for binder
+        self.properties = dict()  # {name (str): (type, value)}
+        self.userattrs = dict()  # {name (bytes): value (bytes)}
+        self.show_annotations = True
+        self.binder_color = XDW_BINDER_COLOR.default
+        self.binder_size = XDW_BINDER_SIZE.default
+
+    def all_pages(self):
+        if self.type == XDW_DT_BINDER:
+            return [pg for (_, doc) in self.documents for pg in doc.pages]
+        return self.pages
+
+    def locate(self, page, append=False):
+        """Get (SimDocument, index) for 1-based absolute page number."""
+        if self.type != XDW_DT_BINDER:
+            docs = [self]
+        else:
+            docs = [doc for (_, doc) in self.documents]
+        for doc in docs:
+            if 0 < page <= len(doc.pages):
+                return (doc, page - 1)
+            page -= len(doc.pages)
+        if append and page == 1 and docs:
+            return (docs[-1], len(docs[-1].pages))
+        raise InvalidArgError()
+
+    def page(self, page):
+        doc, index = self.locate(page)
+        return doc.pages[index]
+
+    def to_dict(self):
+        return dict(
+                format=SIM_FORMAT,
+                version=SIM_FORMAT_VERSION,
+                type=self.type,
+                pages=[pg.to_dict() for pg in self.pages],
+                documents=[[name, doc.to_dict()]
+                           for (name, doc) in self.documents],
+                properties=[[k, t, v]
+                            for (k, (t, v)) in self.properties.items()],
+                userattrs=dict((k.decode("latin-1"), v.decode("latin-1"))
+                               for (k, v) in self.userattrs.items()),
+                show_annotations=self.show_annotations,
+                binder_color=self.binder_color,
+                binder_size=self.binder_size,
+                )
+
+    @staticmethod
+    def from_dict(d):
+        doc = SimDocument(d["type"])
+        doc.pages = [SimPage.from_dict(pg) for pg in d["pages"]]
+        doc.documents = [[name, SimDocument.from_dict(dd)]
+                         for (name, dd) in d["documents"]]
+        doc.properties = dict((k, (t, v)) for (k, t, v) in d["properties"])
+        doc.userattrs = dict((k.encode("latin-1"), v.encode("latin-1"))
+                             for (k, v) in d["userattrs"].items())
+        doc.show_annotations = d["show_annotations"]
+        doc.binder_color = d["binder_color"]
+        doc.binder_size = d["binder_size"]
+        return doc
+
+    def copy(self):
+        return SimDocument.from_dict(self.to_dict())
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @staticmethod
+    def load(path):
+        """Load document from file.
+
+        Files not written by SimDocument.save() e.g. BLANKPAGE or image
+        files are regarded as a single blank page, or an empty binder.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError()
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(b"{"):
+            try:
+                d = json.loads(data.decode("utf-8"))
+            except ValueError:
+                d = None
+            if isinstance(d, dict) and d.get("format") == SIM_FORMAT:
+                return SimDocument.from_dict(d)
+        if path.lower().endswith(".xbd"):
+            return SimDocument(XDW_DT_BINDER)
+        return SimDocument(pages=[SimPage()])
+
+
+class SimHandle(object):
+
+    """Document handle of the simulated DocuWorks API."""
+
+    def __init__(self, path, doc, readonly=False):
+        self.path = path
+        self.doc = doc
+        self.readonly = readonly
+
+
+def api(func, name=None):
+    """Decorator to make a method behave like a function in xdwapi.dll.
+
+    Decorated method waits for the configured latency, and returns an error
+    code instead of raising XDWError.
+    """
+    name = name or func.__name__
+    @wraps(func)
+    def apifunc(self, *args):
+        delay = self.delay(name)
+        if delay:
+            time.sleep(delay)
+        try:
+            result = func(self, *args)
+        except XDWError as e:
+            return e.code
+        return 0 if result is None else result
+    apifunc.__name__ = name
+    return apifunc
+
+
+def alias(method, name):
+    """Provide an API method under another name, e.g. its wide char version."""
+    return api(method.__wrapped__, name=name)
+
+
+class SimulatedXDWAPI(object):
+
+    """In-process substitute for xdwapi.dll.
+
+    Documents, pages, annotations, attributes and text are held in memory
+    while opened, and stored in plain JSON files by XDW_SaveDocument() etc.
+    so that ordinary file operations keep working.  API's not simulated
+    raise AttributeError just like missing functions of a DLL.
+
+    latency     (float) seconds to wait in every API call
+                (dict) {api_name: seconds}; key None gives the default
+    version     (str) DocuWorks version reported by XDW_GetInformation()
+    """
+
+    def __init__(self, latency=0.0, version="9.0.0"):
+        self.latency = latency
+        self.version = version
+        self.handles = dict()  # {int: SimHandle}
+        self.annotations = dict()  # {int: SimAnnotation}
+        self._serial = itertools.count(1)
+
+    def delay(self, name):
+        """Get latency in seconds for API named name."""
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(name, latency.get(None, 0.0))
+        return latency
+
+    ### fixtures
+
+    @staticmethod
+    def make_document(path, pages=1, text="", annotations=0, **kw):
+        """Create a document file readable by SimulatedXDWAPI.
+
+        path        (str) pathname to create
+        pages       (int) number of pages
+        text        (str) page text; "{page}" is replaced by page number
+        annotations (int) number of text annotations on each page
+        **kw        other arguments for SimPage()
+
+        Returns the pathname.
+        """
+        doc = SimDocument()
+        for p in range(pages):
+            pg = SimPage(text=text.format(page=p + 1), **kw)
+            for i in range(annotations):
+                ann = SimAnnotation(XDW_AID_TEXT,
+                        1000 + 100 * i % (pg.width - 6000),
+                        1000 + 1100 * i % (pg.height - 2000),
+                        *DEFAULT_ANNOTATION_SIZE[XDW_AID_TEXT])
+                ann.attributes[XDW_ATN_Text] = "Annotation {0}-{1}".format(
+                        p + 1, i + 1)
+                pg.annotations.append(ann)
+            doc.pages.append(pg)
+        doc.save(path)
+        return path
+
+    @staticmethod
+    def make_binder(path, documents):
+        """Create a binder file readable by SimulatedXDWAPI.
+
+        path        (str) pathname to create
+        documents   (list of str) pathnames of documents to bind
+
+        Returns the pathname.
+        """
+        binder = SimDocument(XDW_DT_BINDER)
+        for docpath in documents:
+            name = os.path.splitext(os.path.basename(docpath))[0]
+            binder.documents.append([name, SimDocument.load(docpath)])
+        binder.save(path)
+        return path
+
+    ### internal helpers
+
+    def _handle(self, handle):
+        try:
+            return self.handles[_int(handle)]
+        except KeyError:
+            raise InvalidArgError()
+
+    def _doc(self, handle):
+        return self._handle(handle).doc
+
+    def _writable(self, handle):
+        h = self._handle(handle)
+        if h.readonly:
+            raise AccessDeniedError()
+        return h.doc
+
+    def _register(self, ann):
+        if ann.handle is None:
+            ann.handle = next(self._serial)
+        self.annotations[ann.handle] = ann
+        for child in ann.annotations:
+            self._register(child)
+
+    def _unregister(self, ann):
+        self.annotations.pop(ann.handle, None)
+        for child in ann.annotations:
+            self._unregister(child)
+
+    def _ann(self, handle):
+        try:
+            return self.annotations[_int(handle)]
+        except KeyError:
+            raise InvalidArgError()
+
+    def _container(self, doc, ann):
+        """Get the list which holds annotation ann."""
+        for pg in doc.all_pages():
+            stack = [pg.annotations]
+            while stack:
+                anns = stack.pop()
+                if ann in anns:
+                    return anns
+                stack.extend(a.annotations for a in anns)
+        raise InvalidArgError()
+
+    def _open(self, path, readonly=False):
+        doc = SimDocument.load(path)
+        handle = next(self._serial)
+        self.handles[handle] = SimHandle(path, doc, readonly=readonly)
+        for pg in doc.all_pages():
+            for ann in pg.annotations:
+                self._register(ann)
+        return handle
+
+    @staticmethod
+    def _string(value, buf, size, wide=False):
+        """Emulate the common protocol to get string values."""
+        required = _size(value, wide)
+        if buf is None:
+            return required
+        if size < required:
+            raise InsufficientBufferError()
+        _put(buf, value)
+        return required
+
+    @staticmethod
+    def _new_document(input_path):
+        doc = SimDocument.load(input_path)
+        if doc.type == XDW_DT_BINDER:
+            raise BadFormatError()
+        return doc
+
+    ### environment
+
+    @api
+    def XDW_GetInformation(self, index, buf, size, reserved):
+        return self._string(self._information(index), buf, size)
+
+    @api
+    def XDW_GetInformationW(self, index, buf, size, reserved):
+        return self._string(self._information(index), buf, size, wide=True)
+
+    def _information(self, index):
+        if index == XDW_GI_VERSION:
+            return self.version
+        elif index == XDW_GI_DWDESK_FILENAME_DELIMITER:
+            return "_"
+        elif index == XDW_GI_DWDESK_FILENAME_DIGITS:
+            return "\x03"
+        raise InfoNotFoundError()
+
+    @api
+    def XDW_Finalize(self, reserved):
+        pass
+
+    ### file
+
+    @api
+    def XDW_GetProtectionInformation(self, path, info, reserved):
+        if not os.path.exists(_path(path)):
+            raise FileNotFoundError()
+        info = _obj(info)
+        info.nProtectType = XDW_PROTECT_NONE
+        info.nPermission = ALL_PERMISSIONS
+
+    XDW_GetProtectionInformationW = alias(
+            XDW_GetProtectionInformation, "XDW_GetProtectionInformationW")
+
+    @api
+    def XDW_OpenDocumentHandle(self, path, handle, open_mode):
+        readonly = (_obj(open_mode).nOption == XDW_OPEN_READONLY)
+        _put(handle, self._open(_path(path), readonly=readonly))
+
+    XDW_OpenDocumentHandleW = alias(
+            XDW_OpenDocumentHandle, "XDW_OpenDocumentHandleW")
+
+    @api
+    def XDW_CloseDocumentHandle(self, handle, reserved):
+        h = self._handle(handle)
+        for pg in h.doc.all_pages():
+            for ann in pg.annotations:
+                self._unregister(ann)
+        del self.handles[_int(handle)]
+
+    @api
+    def XDW_SaveDocument(self, handle, reserved):
+        h = self._handle(handle)
+        if h.readonly:
+            raise AccessDeniedError()
+        h.doc.save(h.path)
+
+    @api
+    def XDW_GetDocumentInformation(self, handle, info, reserved=None):
+        doc = self._doc(handle)
+        info = _obj(info)
+        info.nPages = len(doc.all_pages())
+        info.nVersion = int(self.version.split(".")[0]) + 3
+        info.nOriginalData = 0
+        info.nDocType = doc.type
+        info.nPermission = ALL_PERMISSIONS
+        info.nShowAnnotations = int(doc.show_annotations)
+        info.nDocuments = len(doc.documents)
+        info.nBinderColor = doc.binder_color
+        info.nBinderSize = doc.binder_size
+
+    @api
+    def XDW_ShowOrHideAnnotations(self, handle, show, reserved):
+        self._doc(handle).show_annotations = bool(show)
+
+    @api
+    def XDW_GetDocumentSignatureNumber(self, handle, reserved):
+        self._doc(handle)
+        return 0
+
+    @api
+    def XDW_CreateXdwFromImageFile(self, input_path, output_path, option,
+            *reserved):
+        input_path, output_path = _path(input_path), _path(output_path)
+        if not os.path.exists(input_path):
+            raise FileNotFoundError()
+        SimDocument(pages=[SimPage()]).save(output_path)
+
+    XDW_CreateXdwFromImageFileW = alias(
+            XDW_CreateXdwFromImageFile, "XDW_CreateXdwFromImageFileW")
+
+    @api
+    def XDW_CreateBinder(self, path, init_data, reserved):
+        path = _path(path)
+        if os.path.exists(path):
+            raise FileExistsError()
+        binder = SimDocument(XDW_DT_BINDER)
+        init_data = _obj(init_data)
+        if init_data is not None:
+            binder.binder_color = init_data.nBinderColor
+            binder.binder_size = init_data.nBinderSize
+        binder.save(path)
+
+    XDW_CreateBinderW = alias(XDW_CreateBinder, "XDW_CreateBinderW")
+
+    @api
+    def XDW_MergeXdwFiles(self, input_paths, count, output_path, reserved):
+        input_paths = _obj(input_paths)
+        merged = SimDocument()
+        for i in range(count):
+            merged.pages.extend(
+                    self._new_document(_path(input_paths[i])).pages)
+        merged.save(_path(output_path))
+
+    XDW_MergeXdwFilesW = alias(XDW_MergeXdwFiles, "XDW_MergeXdwFilesW")
+
+    @api
+    def XDW_OptimizeDocument(self, input_path, output_path, reserved):
+        SimDocument.load(_path(input_path)).save(_path(output_path))
+
+    XDW_OptimizeDocumentW = alias(
+            XDW_OptimizeDocument, "XDW_OptimizeDocumentW")
+
+    @api
+    def XDW_GetFullText(self, handle, output_path, reserved):
+        doc = self._doc(handle)
+        with open(_path(output_path), "w", encoding=CODEPAGE) as f:
+            f.write("\f".join(pg.text for pg in doc.all_pages()))
+
+    @api
+    def XDW_GetFullTextW(self, handle, output_path, reserved):
+        doc = self._doc(handle)
+        with open(_path(output_path), "w", encoding="utf-16") as f:
+            f.write("\f".join(pg.text for pg in doc.all_pages()))
+
+    ### document attributes
+
+    @api
+    def XDW_GetUserAttribute(self, handle, name, buf, size, reserved):
+        doc = self._doc(handle)
+        try:
+            value = doc.userattrs[_obj(name)]
+        except KeyError:
+            raise InvalidArgError()
+        return self._string(value, buf, size)
+
+    @api
+    def XDW_SetUserAttribute(self, handle, name, value, size, reserved):
+        doc = self._writable(handle)
+        if value:
+            doc.userattrs[_obj(name)] = bytes(value[:size])
+        else:
+            doc.userattrs.pop(_obj(name), None)
+
+    @api
+    def XDW_GetDocumentAttributeNumber(self, handle, reserved):
+        return len(self._doc(handle).properties)
+
+    def _property(self, doc, name):
+        name = _text(name)
+        if name in doc.properties:
+            return (name,) + doc.properties[name]
+        if name.encode(CODEPAGE) in XDW_DOCUMENT_ATTRIBUTE_W:
+            return (name, XDW_ATYPE_STRING, "")
+        raise InvalidArgError()
+
+    def _property_by_order(self, properties, order):
+        if not (0 < order <= len(properties)):
+            raise InvalidArgError()
+        name = list(properties)[order - 1]
+        return (name,) + properties[name]
+
+    def _get_attribute(self, attribute, ptype, buf, size,
+            ptext_type=None, pname=None, wide=False):
+        """Emulate the common protocol to get typed attributes."""
+        name, t, value = attribute
+        if pname is not None:
+            _put(pname, name)
+        if ptype is not None:
+            _put(ptype, t)
+        if ptext_type is not None:
+            _put(ptext_type, XDW_TEXT_UNICODE)
+        if t == XDW_ATYPE_STRING:
+            return self._string(value, buf, size, wide=wide)
+        if isinstance(value, list):
+            required = len(value) * sizeof(XDW_POINT)
+        else:
+            required = sizeof(c_int)
+        if buf is None:
+            return required
+        if size < required:
+            raise InsufficientBufferError()
+        _put(buf, value)
+        return required
+
+    @api
+    def XDW_GetDocumentAttributeByName(self, handle, name, ptype, buf, size,
+            reserved):
+        return self._get_attribute(
+                self._property(self._doc(handle), name), ptype, buf, size)
+
+    @api
+    def XDW_GetDocumentAttributeByNameW(self, handle, name, ptype, buf, size,
+            ptext_type, codepage, reserved):
+        return self._get_attribute(
+                self._property(self._doc(handle), name), ptype, buf, size,
+                ptext_type=ptext_type, wide=True)
+
+    @api
+    def XDW_GetDocumentAttributeByOrder(self, handle, order, pname, ptype,
+            buf, size, reserved):
+        return self._get_attribute(
+                self._property_by_order(self._doc(handle).properties, order),
+                ptype, buf, size, pname=pname)
+
+    @api
+    def XDW_GetDocumentAttributeByOrderW(self, handle, order, pname, ptype,
+            buf, size, ptext_type, codepage, reserved):
+        return self._get_attribute(
+                self._property_by_order(self._doc(handle).properties, order),
+                ptype, buf, size, ptext_type=ptext_type, pname=pname,
+                wide=True)
+
+    @api
+    def XDW_SetDocumentAttribute(self, handle, name, attr_type, value,
+            *reserved):
+        doc = self._writable(handle)
+        name = _text(name)
+        if value is None:
+            doc.properties.pop(name, None)
+        else:
+            doc.properties[name] = (attr_type, _attrvalue(attr_type, value))
+
+    XDW_SetDocumentAttributeW = alias(
+            XDW_SetDocumentAttribute, "XDW_SetDocumentAttributeW")
+
+    ### binder
+
+    @api
+    def XDW_GetDocumentInformationInBinder(self, handle, pos, info,
+            reserved):
+        binder = self._doc(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        doc = binder.documents[pos - 1][1]
+        info = _obj(info)
+        info.nPages = len(doc.pages)
+        info.nVersion = int(self.version.split(".")[0]) + 3
+        info.nOriginalData = 0
+        info.nDocType = XDW_DT_DOCUMENT
+        info.nPermission = ALL_PERMISSIONS
+        info.nShowAnnotations = int(binder.show_annotations)
+
+    @api
+    def XDW_GetDocumentNameInBinder(self, handle, pos, buf, size, reserved):
+        binder = self._doc(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        return self._string(binder.documents[pos - 1][0], buf, size)
+
+    @api
+    def XDW_GetDocumentNameInBinderW(self, handle, pos, buf, size,
+            ptext_type, codepage, reserved):
+        binder = self._doc(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        _put(ptext_type, XDW_TEXT_UNICODE)
+        return self._string(binder.documents[pos - 1][0], buf, size,
+                            wide=True)
+
+    @api
+    def XDW_SetDocumentNameInBinder(self, handle, pos, name, *reserved):
+        binder = self._writable(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        binder.documents[pos - 1][0] = _text(name)
+
+    XDW_SetDocumentNameInBinderW = alias(
+            XDW_SetDocumentNameInBinder, "XDW_SetDocumentNameInBinderW")
+
+    @api
+    def XDW_InsertDocumentToBinder(self, handle, pos, input_path, reserved):
+        binder = self._writable(handle)
+        if not (0 < pos <= len(binder.documents) + 1):
+            raise InvalidArgError()
+        input_path = _path(input_path)
+        doc = self._new_document(input_path)
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        binder.documents.insert(pos - 1, [name, doc])
+        for pg in doc.pages:
+            for ann in pg.annotations:
+                self._register(ann)
+
+    XDW_InsertDocumentToBinderW = alias(
+            XDW_InsertDocumentToBinder, "XDW_InsertDocumentToBinderW")
+
+    @api
+    def XDW_GetDocumentFromBinder(self, handle, pos, output_path, reserved):
+        binder = self._doc(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        output_path = _path(output_path)
+        if os.path.exists(output_path):
+            raise FileExistsError()
+        binder.documents[pos - 1][1].save(output_path)
+
+    XDW_GetDocumentFromBinderW = alias(
+            XDW_GetDocumentFromBinder, "XDW_GetDocumentFromBinderW")
+
+    @api
+    def XDW_DeleteDocumentInBinder(self, handle, pos, reserved):
+        binder = self._writable(handle)
+        if not (0 < pos <= len(binder.documents)):
+            raise InvalidArgError()
+        _, doc = binder.documents.pop(pos - 1)
+        for pg in doc.pages:
+            for ann in pg.annotations:
+                self._unregister(ann)
+
+    ### page
+
+    @api
+    def XDW_GetPageInformation(self, handle, page, info, reserved=None):
+        pg = self._doc(handle).page(page)
+        info = _obj(info)
+        width, height = pg.width, pg.height
+        if pg.degree in (90, 270):
+            width, height = height, width
+        info.nWidth, info.nHeight = width, height
+        info.nPageType = pg.type
+        info.nHorRes = info.nVerRes = pg.resolution
+        info.nCompressType = pg.compress_type
+        info.nAnnotations = len(pg.annotations)
+        if isinstance(info, XDW_PAGE_INFO_EX):
+            info.nDegree = pg.degree
+            info.nOrgWidth, info.nOrgHeight = pg.width, pg.height
+            info.nOrgHorRes = info.nOrgVerRes = pg.resolution
+            info.nImageWidth = int(pg.width / 2540.0 * pg.resolution)
+            info.nImageHeight = int(pg.height / 2540.0 * pg.resolution)
+
+    @api
+    def XDW_GetPageColorInformation(self, handle, page, info, reserved):
+        pg = self._doc(handle).page(page)
+        info = _obj(info)
+        info.nColor = int(pg.color)
+        info.nImageDepth = 24 if pg.color else 1
+
+    @api
+    def XDW_GetPageTextToMemory(self, handle, page, buf, size, reserved):
+        return self._string(self._doc(handle).page(page).text, buf, size)
+
+    @api
+    def XDW_GetPageTextToMemoryW(self, handle, page, buf, size, reserved):
+        return self._string(self._doc(handle).page(page).text, buf, size,
+                            wide=True)
+
+    @api
+    def XDW_GetPageUserAttribute(self, handle, page, name, buf, size,
+            reserved):
+        pg = self._doc(handle).page(page)
+        try:
+            value = pg.userattrs[_obj(name)]
+        except KeyError:
+            raise InvalidArgError()
+        return self._string(value, buf, size)
+
+    @api
+    def XDW_SetPageUserAttribute(self, handle, page, name, value, size,
+            reserved):
+        self._writable(handle)
+        pg = self._doc(handle).page(page)
+        if value:
+            pg.userattrs[_obj(name)] = bytes(value[:size])
+        else:
+            pg.userattrs.pop(_obj(name), None)
+
+    @api
+    def XDW_GetPageFormAttribute(self, handle, form, name, buf, size,
+            reserved):
+        self._doc(handle)
+        return self._string("", buf, size)
+
+    @api
+    def XDW_DeletePage(self, handle, page, reserved):
+        doc, index = self._writable(handle).locate(page)
+        for ann in doc.pages.pop(index).annotations:
+            self._unregister(ann)
+
+    @api
+    def XDW_RotatePage(self, handle, page, degree, reserved):
+        pg = self._writable(handle).page(page)
+        pg.degree = (pg.degree + degree) % 360
+
+    @api
+    def XDW_GetPage(self, handle, page, output_path, reserved):
+        pg = self._doc(handle).page(page)
+        output_path = _path(output_path)
+        if os.path.exists(output_path):
+            raise FileExistsError()
+        SimDocument(pages=[pg]).copy().save(output_path)
+
+    XDW_GetPageW = alias(XDW_GetPage, "XDW_GetPageW")
+
+    @api
+    def XDW_InsertDocument(self, handle, page, input_path, reserved):
+        doc, index = self._writable(handle).locate(page, append=True)
+        new = self._new_document(_path(input_path))
+        doc.pages[index:index] = new.pages
+        for pg in new.pages:
+            for ann in pg.annotations:
+                self._register(ann)
+
+    XDW_InsertDocumentW = alias(XDW_InsertDocument, "XDW_InsertDocumentW")
+
+    @api
+    def XDW_CreateXdwFromImageFileAndInsertDocument(self, handle, page,
+            input_path, option, reserved):
+        doc, index = self._writable(handle).locate(page, append=True)
+        if not os.path.exists(_path(input_path)):
+            raise FileNotFoundError()
+        doc.pages.insert(index, SimPage())
+
+    XDW_CreateXdwFromImageFileAndInsertDocumentW = alias(
+            XDW_CreateXdwFromImageFileAndInsertDocument,
+            "XDW_CreateXdwFromImageFileAndInsertDocumentW")
+
+    ### annotation
+
+    @api
+    def XDW_GetAnnotationInformation(self, handle, page, parent, index, info,
+            reserved):
+        if _int(parent):
+            anns = self._ann(parent).annotations
+        else:
+            anns = self._doc(handle).page(page).annotations
+        if not (0 < index <= len(anns)):
+            raise InvalidArgError()
+        ann = anns[index - 1]
+        info = _obj(info)
+        info.handle = ann.handle
+        info.nHorPos, info.nVerPos = ann.x, ann.y
+        info.nWidth, info.nHeight = ann.width, ann.height
+        info.nAnnotationType = ann.type
+        info.nChildAnnotations = len(ann.annotations)
+
+    def _new_annotation(self, ann_type, hpos, vpos, init_data):
+        width, height = DEFAULT_ANNOTATION_SIZE.get(ann_type, (0, 0))
+        ann = SimAnnotation(ann_type, hpos, vpos, width, height)
+        init_data = _obj(init_data)
+        if ann_type in (XDW_AID_FUSEN, XDW_AID_RECTANGLE, XDW_AID_ARC):
+            ann.width, ann.height = init_data.nWidth, init_data.nHeight
+        elif ann_type == XDW_AID_STAMP:
+            ann.width = init_data.nWidth
+        elif ann_type == XDW_AID_STRAIGHTLINE:
+            h, v = init_data.nHorVec, init_data.nVerVec
+            ann.attributes[XDW_ATN_Points] = [(hpos, vpos), (h, v)]
+            ann.x, ann.y = min(hpos, hpos + h), min(vpos, vpos + v)
+            ann.width, ann.height = abs(h), abs(v)
+        elif ann_type in (XDW_AID_MARKER, XDW_AID_POLYGON):
+            points = [(init_data.pPoints[i].x, init_data.pPoints[i].y)
+                      for i in range(init_data.nCounts)]
+            ann.attributes[XDW_ATN_Points] = points
+            x0, y0 = points[0]
+            xs = [x0] + [x0 + x for (x, y) in points[1:]]
+            ys = [y0] + [y0 + y for (x, y) in points[1:]]
+            ann.x, ann.y = min(xs), min(ys)
+            ann.width, ann.height = max(xs) - ann.x, max(ys) - ann.y
+        self._register(ann)
+        return ann
+
+    @api
+    def XDW_AddAnnotation(self, handle, ann_type, page, hpos, vpos,
+            init_data, new_handle, reserved):
+        pg = self._writable(handle).page(page)
+        ann = self._new_annotation(ann_type, hpos, vpos, init_data)
+        pg.annotations.append(ann)
+        _put(new_handle, ann.handle)
+
+    @api
+    def XDW_AddAnnotationOnParentAnnotation(self, handle, parent, ann_type,
+            hpos, vpos, init_data, new_handle, reserved):
+        self._writable(handle)
+        parent = self._ann(parent)
+        ann = self._new_annotation(ann_type, hpos, vpos, init_data)
+        parent.annotations.append(ann)
+        _put(new_handle, ann.handle)
+
+    @api
+    def XDW_RemoveAnnotation(self, handle, ann_handle, reserved):
+        doc = self._writable(handle)
+        ann = self._ann(ann_handle)
+        self._container(doc, ann).remove(ann)
+        self._unregister(ann)
+
+    @api
+    def XDW_SetAnnotationSize(self, handle, ann_handle, width, height,
+            reserved):
+        self._writable(handle)
+        ann = self._ann(ann_handle)
+        ann.width, ann.height = width, height
+
+    @api
+    def XDW_SetAnnotationPosition(self, handle, ann_handle, hpos, vpos,
+            reserved):
+        self._writable(handle)
+        ann = self._ann(ann_handle)
+        ann.x, ann.y = hpos, vpos
+
+    @api
+    def XDW_StarchAnnotation(self, handle, ann_handle, starch, reserved):
+        self._writable(handle)
+        self._ann(ann_handle).starch = bool(starch)
+
+    def _annotation_attribute(self, ann_handle, name):
+        ann = self._ann(ann_handle)
+        name = _obj(name)
+        if isinstance(name, str):
+            name = name.encode(CODEPAGE)
+        value = ann.get_attribute(name)
+        if isinstance(value, str):
+            return (name, XDW_ATYPE_STRING, value)
+        elif isinstance(value, list):
+            return (name, XDW_ATYPE_OTHER, value)
+        return (name, XDW_ATYPE_INT, value)
+
+    @api
+    def XDW_GetAnnotationAttribute(self, ann_handle, name, buf, size,
+            reserved):
+        return self._get_attribute(
+                self._annotation_attribute(ann_handle, name),
+                None, buf, size)
+
+    @api
+    def XDW_GetAnnotationAttributeW(self, ann_handle, name, buf, size,
+            ptext_type, codepage, reserved):
+        return self._get_attribute(
+                self._annotation_attribute(ann_handle, name),
+                None, buf, size, ptext_type=ptext_type, wide=True)
+
+    @api
+    def XDW_SetAnnotationAttribute(self, handle, ann_handle, name, attr_type,
+            value, *reserved):
+        self._writable(handle)
+        ann = self._ann(ann_handle)
+        name = _obj(name)
+        if isinstance(name, str):
+            name = name.encode(CODEPAGE)
+        ann.get_attribute(name)  # Check if name is valid.
+        if name == XDW_ATN_Points:
+            raise InvalidArgError()
+        ann.attributes[name] = _attrvalue(attr_type, value)
+
+    XDW_SetAnnotationAttributeW = alias(
+            XDW_SetAnnotationAttribute, "XDW_SetAnnotationAttributeW")
+
+    @api
+    def XDW_GetAnnotationUserAttribute(self, ann_handle, name, buf, size,
+            reserved):
+        ann = self._ann(ann_handle)
+        try:
+            value = ann.userattrs[_obj(name)]
+        except KeyError:
+            raise InvalidArgError()
+        return self._string(value, buf, size)
+
+    @api
+    def XDW_SetAnnotationUserAttribute(self, handle, ann_handle, name, value,
+            size, reserved):
+        self._writable(handle)
+        ann = self._ann(ann_handle)
+        if value:
+            ann.userattrs[_obj(name)] = bytes(value[:size])
+        else:
+            ann.userattrs.pop(_obj(name), None)
+
+    @api
+    def XDW_GetAnnotationCustomAttributeNumber(self, ann_handle, reserved):
+        return len(self._ann(ann_handle).properties)
+
+    @api
+    def XDW_GetAnnotationCustomAttributeByName(self, ann_handle, name, ptype,
+            buf, size, reserved):
+        ann = self._ann(ann_handle)
+        name = _text(name)
+        try:
+            t, value = ann.properties[name]
+        except KeyError:
+            raise InvalidArgError()
+        return self._get_attribute((name, t, value), ptype, buf, size,
+                                   wide=True)
+
+    @api
+    def XDW_GetAnnotationCustomAttributeByOrder(self, ann_handle, order,
+            pname, ptype, buf, size, reserved):
+        ann = self._ann(ann_handle)
+        return self._get_attribute(
+                self._property_by_order(ann.properties, order),
+                ptype, buf, size, pname=pname, wide=True)
+
+    @api
+    def XDW_SetAnnotationCustomAttribute(self, handle, ann_handle, name,
+            attr_type, value, reserved):
+        self._writable(handle)
+        ann = self._ann(ann_handle)
+        name = _text(name)
+        if value is None:
+            ann.properties.pop(name, None)
+        else:
+            ann.properties[name] = (attr_type, _attrvalue(attr_type, value))
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""xdwstats.py -- call counters and latency histograms of XDWAPI
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import math
+from time import perf_counter
+from contextlib import contextmanager
+
+from . import xdwapi
+
+
+__all__ = ("CallStats", "Statistics", "stats", "enable_stats", "measure")
+
+BUCKETS_PER_OCTAVE = 4  # resolution of latency histograms, ~19%
+
+# Expected by the single-pass reads which retry with a larger buffer.
+_RETRY_CODE = xdwapi.XDW_E_INSUFFICIENT_BUFFER & 0xFFFFFFFF
+
+
+class CallStats(object):
+
+    """Call count and latency histogram of an XDW_* function.
+
+    XDW_E_INSUFFICIENT_BUFFER is counted in retries, not in errors.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total = 0.0  # in seconds
+        self.min = None
+        self.max = None
+        self.histogram = dict()  # bucket -> count
+
+    def __repr__(self):
+        return "{cls}({name}; {calls} calls, {errors} errors, " \
+                "{retries} retries, {total:.6f}s)".format(
+                        cls=self.__class__.__name__, name=self.name,
+                        calls=self.calls, errors=self.errors,
+                        retries=self.retries, total=self.total)
+
+    def add(self, elapsed, error=False, retry=False):
+        """Record a call.
+
+        elapsed     (float) latency in seconds
+        error       (bool) True if XDWAPI returned an error code
+        retry       (bool) True if XDWAPI asked for a larger buffer
+        """
+        self.calls += 1
+        if retry:
+            self.retries += 1
+        elif error:
+            self.errors += 1
+        self.total += elapsed
+        if self.min is None or elapsed < self.min:
+            self.min = elapsed
+        if self.max is None or self.max < elapsed:
+            self.max = elapsed
+        ns = elapsed * 1e9
+        bucket = int(math.log2(ns) * BUCKETS_PER_OCTAVE) if 1 < ns else 0
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    @property
+    def mean(self):
+        return self.total / self.calls if self.calls else 0.0
+
+    def percentile(self, p):
+        """Estimate latency in seconds at percentile p (0-100)."""
+        if not self.calls:
+            return 0.0
+        rank = self.calls * p / 100.0
+        n = 0
+        for bucket in sorted(self.histogram):
+            n += self.histogram[bucket]
+            if rank <= n:
+                break
+        upper = 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e9
+        return max(self.min, min(upper, self.max))
+
+
+class Statistics(dict):
+
+    """CallStats of XDW_* functions, keyed by function name."""
+
+    def __missing__(self, name):
+        result = self[name] = CallStats(name)
+        return result
+
+    def __str__(self):
+        lines = ["{0:<48} {1:>8} {2:>6} {3:>7} {4:>10} {5:>10} {6:>10}"
+                .format("function", "calls", "errors", "retries",
+                        "total(ms)", "p50(us)", "p99(us)")]
+        for st in sorted(self.values(), key=lambda st: -st.total):
+            lines.append(
+                    "{0:<48} {1:>8} {2:>6} {3:>7} {4:>10.3f} {5:>10.1f} "
+                    "{6:>10.1f}".format(st.name, st.calls, st.errors,
+                        st.retries, st.total * 1e3, st.percentile(50) * 1e6,
+                        st.percentile(99) * 1e6))
+        return "\n".join(lines)
+
+    @property
+    def calls(self):
+        return sum(st.calls for st in self.values())
+
+    @property
+    def total(self):
+        return sum(st.total for st in self.values())
+
+
+_STATS = Statistics()
+_collectors = []  # active Statistics
+
+
+def _collecting(collector):
+    return any(c is collector for c in _collectors)
+
+
+def _stop(collector):
+    # Statistics are compared by identity; equal ones may be collecting.
+    for i, c in enumerate(_collectors):
+        if c is collector:
+            del _collectors[i]
+            break
+
+
+def _measured(name, func):
+    def call(*args):
+        t = perf_counter()
+        result = func(*args)
+        elapsed = perf_counter() - t
+        error = isinstance(result, int) and bool(result & 0x80000000)
+        retry = error and (result & 0xFFFFFFFF) == _RETRY_CODE
+        for collector in _collectors:
+            collector[name].add(elapsed, error, retry)
+        return result
+    return call
+
+
+def _install():
+    """Hook XDW_* functions only while someone is collecting."""
+    hooked = _measured in xdwapi._function_wrappers
+    if _collectors and not hooked:
+        xdwapi._function_wrappers.append(_measured)
+    elif not _collectors and hooked:
+        xdwapi._function_wrappers.remove(_measured)
+    else:
+        return
+    xdwapi._functions.clear()
+
+
+def stats(reset=False):
+    """Get process-wide statistics collected since enable_stats().
+
+    reset       (bool) clear the statistics after getting them
+    """
+    global _STATS
+    result = _STATS
+    if reset:
+        enabled = _collecting(_STATS)
+        enable_stats(False)
+        _STATS = Statistics()
+        enable_stats(enabled)
+    return result
+
+
+def enable_stats(flag=True):
+    """Enable or disable process-wide statistics of XDWAPI calls.
+
+    XDW_* functions are not hooked at all unless statistics are enabled
+    or measure() is running.
+    """
+    if flag and not _collecting(_STATS):
+        _collectors.append(_STATS)
+    elif not flag:
+        _stop(_STATS)
+    _install()
+
+
+@contextmanager
+def measure():
+    """Context manager to collect statistics of XDWAPI calls in a block.
+
+    Example:
+
+        with measure() as st:
+            doc.fulltext()
+        print(st)
+    """
+    collector = Statistics()
+    _collectors.append(collector)
+    _install()
+    try:
+        yield collector
+    finally:
+        _stop(collector)
+        _install()
@@ -20,6 +20,8 @@ from tempfile import mkstemp, mkdtemp
 
 __all__ = ("XDWTemp",)
 
+DIR_PREFIX = "xdwtemp-"  # prefix of temporary directory names
+
 
 class XDWTemp(object):
 
@@ -68,7 +70,7 @@ class XDWTemp(object):
         prefix      (str or unicode) prefix of temporary file name
         autoclose   (bool) call close() automatically before destruction
         """
-        fd, path = mkstemp(suffix=suffix, prefix=prefix, dir=mkdtemp())
+        fd, path = mkstemp(suffix=suffix, prefix=prefix, dir=mkdtemp(prefix=DIR_PREFIX))
         os.close(fd)
         os.remove(path)  # Directory is not removed.
         self.path = path
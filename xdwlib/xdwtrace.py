@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix :
+
+"""xdwtrace.py -- record and replay XDWAPI call traces
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import gzip
+import json
+import base64
+import tempfile
+from contextlib import contextmanager
+from ctypes import Array, byref, c_int, addressof, sizeof, string_at, memmove
+from ctypes import _SimpleCData
+
+from . import xdwapi
+from .common import cp
+from .xdwtemp import DIR_PREFIX
+
+
+__all__ = ("TraceRecorder", "ReplayXDWAPI", "record", "load_trace")
+
+TRACE_FORMAT = "xdwtrace"
+TRACE_VERSION = 2
+
+_CArgObject = type(byref(c_int()))
+
+# XDW_* functions which write a file, and the index of the path argument.
+FILE_OUTPUTS = {
+        "XDW_GetFullText": 1,
+        "XDW_GetFullTextW": 1,
+        }
+
+
+def _target(arg):
+    """Get ctypes object which XDWAPI may write into, or None."""
+    if isinstance(arg, _CArgObject):
+        return arg._obj
+    if isinstance(arg, Array):
+        return arg
+    return None
+
+
+def _argument(arg):
+    """Get JSON-compatible value of argument to compare on replay.
+
+    Buffers, structures and pointers are given as {"p": 1} since only
+    their presence can be compared.  Paths made by XDWTemp, whose names
+    differ in each run, are given as {"temp": 1}.
+    """
+    if isinstance(arg, _SimpleCData):
+        arg = arg.value
+    if arg is None or isinstance(arg, (bool, int, float)):
+        return arg
+    if isinstance(arg, (str, bytes)):
+        tempdir = os.path.join(tempfile.gettempdir(), DIR_PREFIX)
+        if isinstance(arg, bytes):
+            tempdir = cp(tempdir)
+        if arg.startswith(tempdir):
+            return {"temp": 1}
+        if isinstance(arg, str):
+            return {"s": arg}
+        return {"b": base64.b64encode(arg).decode("ascii")}
+    return {"p": 1}
+
+
+def _memory(obj):
+    return string_at(addressof(obj), sizeof(obj))
+
+
+def _changed(before, after):
+    """Get (start, end) of the range where before and after differ."""
+    start = 0
+    while before[start] == after[start]:
+        start += 1
+    end = len(after)
+    while before[end - 1] == after[end - 1]:
+        end -= 1
+    return (start, end)
+
+
+class TraceRecorder(object):
+
+    """Recorder of XDW_* calls, their results and what they wrote.
+
+    Each entry of the trace is [name, result, outputs, arguments] where
+    outputs is a list of [argument_index, offset, base64_data] for the
+    bytes changed in buffers and structures passed by reference, and
+    arguments are values of arguments given by _argument().  Functions
+    in FILE_OUTPUTS have base64_data of the file written as the 5th item.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+
+    def __repr__(self):
+        return "{cls}({path}; {n} calls)".format(
+                cls=self.__class__.__name__, path=self.path,
+                n=len(self.entries))
+
+    def wrap(self, name, func):
+        """Wrapper to hook XDW_* functions, see xdwapi._function_wrappers."""
+        def call(*args):
+            targets = []
+            for (i, arg) in enumerate(args):
+                obj = _target(arg)
+                if obj is not None:
+                    targets.append((i, obj, _memory(obj)))
+            result = func(*args)
+            outputs = []
+            for (i, obj, before) in targets:
+                after = _memory(obj)
+                if after != before:
+                    start, end = _changed(before, after)
+                    outputs.append([i, start,
+                            base64.b64encode(after[start:end]).decode("ascii")])
+            entry = [name, result, outputs, [_argument(a) for a in args]]
+            if name in FILE_OUTPUTS and not result & 0x80000000:
+                with open(args[FILE_OUTPUTS[name]], "rb") as f:
+                    entry.append(base64.b64encode(f.read()).decode("ascii"))
+            self.entries.append(entry)
+            return result
+        return call
+
+    def save(self, path=None):
+        """Save the trace as gzip-compressed JSON lines."""
+        with gzip.open(path or self.path, "wt", encoding="ascii") as f:
+            f.write(json.dumps(dict(
+                    format=TRACE_FORMAT, version=TRACE_VERSION)) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def load_trace(path):
+    """Load trace entries saved by TraceRecorder.
+
+    Entries of version 1, which have no arguments, get None instead.
+    """
+    with gzip.open(path, "rt", encoding="ascii") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != TRACE_FORMAT:
+            raise ValueError("not a trace file: " + path)
+        if TRACE_VERSION < header.get("version", 0):
+            raise ValueError("unsupported trace version {0}".format(
+                    header.get("version")))
+        entries = [json.loads(line) for line in f]
+    if header.get("version", 0) < 2:
+        for entry in entries:
+            entry[3:3] = [None]
+    return entries
+
+
+@contextmanager
+def record(path):
+    """Context manager to record XDW_* calls in a block into path.
+
+    Start recording before opening documents so that the replay can
+    repeat the same calls from the beginning.
+
+    Example:
+
+        with record("job.xdwtrace"):
+            doc = xdwopen("sample.xdw")
+            text = doc.fulltext()
+            doc.close()
+
+    and replay it later, even on a machine without DocuWorks:
+
+        XDWLIB_BACKEND=replay XDWLIB_TRACE=job.xdwtrace python job.py
+    """
+    recorder = TraceRecorder(path)
+    xdwapi._reset_state()
+    xdwapi._function_wrappers.append(recorder.wrap)
+    xdwapi._functions.clear()
+    try:
+        yield recorder
+    finally:
+        xdwapi._function_wrappers.remove(recorder.wrap)
+        xdwapi._functions.clear()
+        recorder.save()
+
+
+class ReplayXDWAPI(object):
+
+    """Backend which answers XDW_* calls from a recorded trace.
+
+    Calls must come in the same order and with the same arguments as
+    recorded, otherwise RuntimeError is raised.  Values written by XDWAPI
+    are written into the buffers and structures given by the caller again.
+
+    path        (str) trace file; defaults to environment XDWLIB_TRACE
+    """
+
+    def __init__(self, path=None):
+        path = path or os.environ.get("XDWLIB_TRACE")
+        if not path:
+            raise ValueError("trace file is required; set XDWLIB_TRACE")
+        self.path = path
+        self.entries = load_trace(path)
+        self.pos = 0
+        xdwapi._reset_state()
+
+    def __repr__(self):
+        return "{cls}({path}; {pos}/{n})".format(
+                cls=self.__class__.__name__, path=self.path,
+                pos=self.pos, n=len(self.entries))
+
+    def __getattr__(self, name):
+        if not name.startswith("XDW_"):
+            raise AttributeError(name)
+        def call(*args):
+            return self.replay(name, args)
+        call.__name__ = name
+        return call
+
+    def replay(self, name, args):
+        """Answer the next call in the trace.
+
+        XDW_Finalize is always accepted, as it is called at exit however
+        far the replay went.  It consumes the trace only if recorded next.
+        """
+        if name == "XDW_Finalize":
+            if (self.pos < len(self.entries) and
+                    self.entries[self.pos][0] == name):
+                self.pos += 1
+            return 0
+        if len(self.entries) <= self.pos:
+            raise RuntimeError("trace exhausted at {0}".format(name))
+        entry = self.entries[self.pos]
+        expected, result, outputs, arguments = entry[:4]
+        if name != expected:
+            raise RuntimeError("call #{0} is {1} while {2} is recorded".format(
+                    self.pos, name, expected))
+        if arguments is not None:
+            given = [_argument(arg) for arg in args]
+            if given != arguments:
+                raise RuntimeError(
+                        "call #{0} {1} has arguments {2} while {3} is "
+                        "recorded".format(self.pos, name, given, arguments))
+        for (i, offset, data) in outputs:
+            obj = _target(args[i]) if i < len(args) else None
+            if obj is None:
+                raise RuntimeError("call #{0} {1} has no buffer at argument "
+                        "{2} while one is recorded".format(self.pos, name, i))
+            data = base64.b64decode(data)
+            memmove(addressof(obj) + offset, data,
+                    min(len(data), sizeof(obj) - offset))
+        self.pos += 1
+        if 4 < len(entry):
+            with open(args[FILE_OUTPUTS[name]], "wb") as f:
+                f.write(base64.b64decode(entry[4]))
+        return result